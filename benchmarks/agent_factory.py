@@ -0,0 +1,109 @@
+"""Benchmark: per-request agent construction overhead of the agent factory.
+
+Usage: python benchmarks/agent_factory.py [--iterations 500]
+"""
+import argparse
+import gc
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Bootstrap: ensure src/ is on sys.path (same as main.py)
+_src = Path(__file__).resolve().parent.parent / "src"
+if str(_src) not in sys.path:
+    sys.path.insert(0, str(_src))
+
+from agno.agent import Agent
+from agno.models.openai import OpenAIChat
+from agents.critique_agent import critique_agent_spec
+from agents.factory import AgentSpec, agent_scope, build_agent, get_agent
+from agents.planner_agent import itinerary_planner_spec
+from agents.research_agents import activities_researcher_spec, destination_researcher_spec, hotel_finder_spec
+from core.utils import make_agent_observable
+
+SPECS = (
+    destination_researcher_spec,
+    hotel_finder_spec,
+    activities_researcher_spec,
+    itinerary_planner_spec,
+    critique_agent_spec,
+)
+
+
+def build_from_scratch(spec: AgentSpec) -> Agent:
+    """Baseline: what building the agents per request looked like without the factory."""
+    agent = Agent(
+        id=spec.id,
+        name=spec.name,
+        role=spec.role,
+        description=spec.description,
+        instructions=spec.instructions,
+        model=OpenAIChat(id=spec.model_id),
+        tools=list(spec.tools) or None,
+        output_schema=spec.output_schema,
+        session_state=dict(spec.session_state),
+        add_session_state_to_context=spec.add_session_state_to_context,
+        markdown=spec.markdown,
+    )
+    make_agent_observable(agent, spec.id)
+    return agent
+
+
+def factory_request() -> None:
+    """One request's worth of agents, built through agent_scope like a workflow run."""
+    with agent_scope():
+        for spec in SPECS:
+            get_agent(spec)
+
+
+def scratch_request() -> None:
+    for spec in SPECS:
+        build_from_scratch(spec)
+
+
+def time_per_request(fn, iterations: int):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def retained_bytes(count: int) -> tuple:
+    """Memory held by `count` live agent sets, and what is left after they are released."""
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    live = [[build_agent(spec) for spec in SPECS] for _ in range(count)]
+    held = tracemalloc.get_traced_memory()[0] - base
+    del live
+    gc.collect()
+    left = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return held, left
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure per-request agent construction overhead.")
+    parser.add_argument("--iterations", type=int, default=500, help="Requests to build per measurement")
+    parser.add_argument("--live-sets", type=int, default=100, help="Concurrent requests for the memory check")
+    args = parser.parse_args()
+
+    # Warm up imports, schema caches and the shared model objects
+    factory_request()
+    scratch_request()
+
+    print(f"Per-request construction of {len(SPECS)} agents ({args.iterations} requests)")
+    print(f"{'Approach':<28}{'median (µs)':>12}{'p95 (µs)':>12}")
+    for label, fn in (("factory (shared models)", factory_request), ("from scratch", scratch_request)):
+        median, p95 = time_per_request(fn, args.iterations)
+        print(f"{label:<28}{median:>12,.0f}{p95:>12,.0f}")
+
+    held, left = retained_bytes(args.live_sets)
+    print(f"\nMemory for {args.live_sets} concurrent requests: {held / 1024:,.0f} KiB "
+          f"({held / args.live_sets / 1024:,.1f} KiB per request); "
+          f"{max(left, 0) / 1024:,.0f} KiB retained after they finish")
@@ -0,0 +1,246 @@
+"""Benchmark: the plan executors (workflow, fast, team) head to head on the same query corpus.
+
+Makes real OpenAI and Tavily calls (OPENAI_API_KEY and TAVILY_API_KEY must be set).
+--judge also scores every finished plan with the Manager's rubric, for a quality comparison.
+
+Usage: python benchmarks/executors.py [--executors workflow,fast,team] [--corpus queries.txt]
+                                      [--repeat 1] [--concurrency 1] [--judge] [--json results.json]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+# Bootstrap: ensure src/ is on sys.path (same as main.py)
+_src = Path(__file__).resolve().parent.parent / "src"
+if str(_src) not in sys.path:
+    sys.path.insert(0, str(_src))
+
+from dotenv import load_dotenv
+from agno.models.openai import OpenAIChat
+from agents.critique_agent import critique_agent_spec
+from agents.factory import agent_scope, get_agent
+from core.schemas import CritiqueResult
+from workflows.executors import EXECUTORS, get_executor
+
+DEFAULT_CORPUS = (
+    "Plan a 3-day trip to Kyoto, Japan for a solo traveler interested in temples and local food. Budget is mid-range.",
+    "Plan a 4-day trip to Lisbon for a couple who love food, wine and viewpoints. Mid-range budget.",
+    "Plan a 5-day family trip to Bali with two kids, focusing on beaches and nature. Budget-friendly.",
+    "Plan a 3-day luxury trip to Paris interested in museums, fashion and fine dining.",
+    "Plan a 4-day backpacking trip to Bangkok on a budget, interested in street food and nightlife.",
+)
+
+# Which benchmark run the current task belongs to (inherited by the run's parallel tasks and threads)
+_current_run: ContextVar[Optional[str]] = ContextVar("benchmark_run", default=None)
+
+
+@dataclass
+class LlmCall:
+    run: Optional[str]
+    start: float
+    end: float
+    input_tokens: int
+    output_tokens: int
+    cached_tokens: int = 0
+
+
+@dataclass
+class RunResult:
+    executor: str
+    query: str
+    latency_s: float
+    ok: bool
+    llm_calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0
+    peak_concurrency: int = 0
+    mean_concurrency: float = 0.0
+    quality_score: Optional[float] = None
+    error: str = ""
+
+
+@dataclass
+class LlmCallRecorder:
+    """Records every OpenAIChat invocation (timing and token usage) while active."""
+    calls: List[LlmCall] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def _record(self, start: float, response) -> None:
+        usage = getattr(response, "response_usage", None)
+        call = LlmCall(_current_run.get(), start, time.perf_counter(),
+                       getattr(usage, "input_tokens", 0) or 0, getattr(usage, "output_tokens", 0) or 0,
+                       getattr(usage, "cache_read_tokens", 0) or 0)
+        with self._lock:
+            self.calls.append(call)
+
+    @contextmanager
+    def active(self) -> Iterator["LlmCallRecorder"]:
+        original_invoke, original_ainvoke = OpenAIChat.invoke, OpenAIChat.ainvoke
+        recorder = self
+
+        def invoke(self, *args, **kwargs):
+            start = time.perf_counter()
+            response = original_invoke(self, *args, **kwargs)
+            recorder._record(start, response)
+            return response
+
+        async def ainvoke(self, *args, **kwargs):
+            start = time.perf_counter()
+            response = await original_ainvoke(self, *args, **kwargs)
+            recorder._record(start, response)
+            return response
+
+        OpenAIChat.invoke, OpenAIChat.ainvoke = invoke, ainvoke
+        try:
+            yield self
+        finally:
+            OpenAIChat.invoke, OpenAIChat.ainvoke = original_invoke, original_ainvoke
+
+    def for_run(self, run: str) -> List[LlmCall]:
+        with self._lock:
+            return [c for c in self.calls if c.run == run]
+
+
+def concurrency(calls: List[LlmCall], wall_s: float) -> tuple:
+    """(peak overlapping LLM calls, mean LLM calls in flight over the run's wall time)."""
+    events = sorted([(c.start, 1) for c in calls] + [(c.end, -1) for c in calls])
+    peak = current = 0
+    for _, delta in events:
+        current += delta
+        peak = max(peak, current)
+    busy = sum(c.end - c.start for c in calls)
+    return peak, busy / wall_s if wall_s else 0.0
+
+
+async def judge(plan: str) -> Optional[float]:
+    """The Manager's 0-10 quality score for a finished plan (None if the review fails)."""
+    with agent_scope():
+        response = await get_agent(critique_agent_spec).arun(
+            f"TRAVEL PLAN TO REVIEW:\n{plan}\n\nREVIEW STATUS: independent quality assessment of a finished plan."
+        )
+    return response.content.quality_score if isinstance(response.content, CritiqueResult) else None
+
+
+async def run_one(executor_name: str, query: str, recorder: LlmCallRecorder, score: bool = False) -> RunResult:
+    run = uuid.uuid4().hex
+    token = _current_run.set(run)
+    start = time.perf_counter()
+    result = RunResult(executor=executor_name, query=query, latency_s=0.0, ok=False)
+    content = None
+    try:
+        output = await get_executor(executor_name).run(query, run)
+        content = getattr(output, "content", None)
+        result.ok = bool(content)
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    finally:
+        _current_run.reset(token)
+        result.latency_s = time.perf_counter() - start
+
+    calls = recorder.for_run(run)
+    result.llm_calls = len(calls)
+    result.input_tokens = sum(c.input_tokens for c in calls)
+    result.output_tokens = sum(c.output_tokens for c in calls)
+    result.cached_tokens = sum(c.cached_tokens for c in calls)
+    result.peak_concurrency, result.mean_concurrency = concurrency(calls, result.latency_s)
+    if score and result.ok:
+        # Outside the run (no run ID), so the judge's call is not counted as the run's
+        try:
+            result.quality_score = await judge(str(content))
+        except Exception as e:
+            print(f"  [{executor_name}] judge failed: {type(e).__name__}: {e}")
+    quality = f"  quality {result.quality_score:.1f}" if result.quality_score is not None else ""
+    print(f"  [{executor_name}] {result.latency_s:6.1f}s  {result.llm_calls:3d} LLM calls{quality}  "
+          f"{'ok' if result.ok else 'FAILED ' + result.error}  {query[:60]}")
+    return result
+
+
+async def benchmark(executor_name: str, corpus: List[str], repeat: int, parallel: int,
+                    recorder: LlmCallRecorder, score: bool = False) -> List[RunResult]:
+    """Run the corpus `repeat` times with up to `parallel` queries in flight."""
+    semaphore = asyncio.Semaphore(parallel)
+
+    async def bounded(query: str) -> RunResult:
+        async with semaphore:
+            return await run_one(executor_name, query, recorder, score)
+
+    return list(await asyncio.gather(*(bounded(q) for _ in range(repeat) for q in corpus)))
+
+
+def summarize(results: List[RunResult]) -> Dict[str, Optional[float]]:
+    ok = [r for r in results if r.ok] or results
+    latencies = sorted(r.latency_s for r in ok)
+    scores = [r.quality_score for r in ok if r.quality_score is not None]
+    return {
+        "runs": len(results),
+        "failures": sum(not r.ok for r in results),
+        "p50_s": statistics.median(latencies),
+        "p95_s": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "llm_calls": statistics.mean(r.llm_calls for r in ok),
+        "input_tokens": statistics.mean(r.input_tokens for r in ok),
+        "output_tokens": statistics.mean(r.output_tokens for r in ok),
+        "cached_tokens": statistics.mean(r.cached_tokens for r in ok),
+        "peak_concurrency": max(r.peak_concurrency for r in ok),
+        "mean_concurrency": statistics.mean(r.mean_concurrency for r in ok),
+        "quality_score": statistics.mean(scores) if scores else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare plan executors on latency, LLM calls, tokens and concurrency.")
+    parser.add_argument("--executors", default=",".join(EXECUTORS), help="Comma-separated executor names")
+    parser.add_argument("--corpus", type=Path, help="Text file with one query per line (default: built-in corpus)")
+    parser.add_argument("--repeat", type=int, default=1, help="Times to run the corpus per executor")
+    parser.add_argument("--concurrency", type=int, default=1, help="Queries in flight at once")
+    parser.add_argument("--judge", action="store_true", help="Score each finished plan 0-10 with the Manager's rubric")
+    parser.add_argument("--json", type=Path, help="Also write per-run results and summaries to this file")
+    args = parser.parse_args()
+
+    load_dotenv()
+    corpus = [line.strip() for line in args.corpus.read_text(encoding="utf-8").splitlines() if line.strip()] \
+        if args.corpus else list(DEFAULT_CORPUS)
+    names = [n.strip() for n in args.executors.split(",") if n.strip()]
+
+    async def run_all() -> Dict[str, List[RunResult]]:
+        # One event loop for every executor, so the shared model clients stay usable
+        results = {}
+        for name in names:
+            print(f"\n{name}: {len(corpus)} queries x {args.repeat}, {args.concurrency} in flight")
+            results[name] = await benchmark(name, corpus, args.repeat, args.concurrency, recorder, args.judge)
+        return results
+
+    recorder = LlmCallRecorder()
+    with recorder.active():
+        all_results = asyncio.run(run_all())
+
+    summaries = {name: summarize(results) for name, results in all_results.items()}
+    print(f"\n{'Executor':<10}{'runs':>6}{'fail':>6}{'p50 (s)':>9}{'p95 (s)':>9}{'LLM calls':>11}"
+          f"{'tokens in':>11}{'cached':>9}{'tokens out':>12}{'peak conc.':>12}{'mean conc.':>12}{'quality':>9}")
+    for name, s in summaries.items():
+        print(f"{name:<10}{s['runs']:>6}{s['failures']:>6}{s['p50_s']:>9.1f}{s['p95_s']:>9.1f}{s['llm_calls']:>11.1f}"
+              f"{s['input_tokens']:>11,.0f}{s['cached_tokens']:>9,.0f}{s['output_tokens']:>12,.0f}{s['peak_concurrency']:>12}"
+              f"{s['mean_concurrency']:>12.2f}"
+              f"{'-' if s['quality_score'] is None else format(s['quality_score'], '.1f'):>9}")
+    print("\nLLM calls, tokens and concurrency are per run (mean over successful runs; peak is the max).")
+    print("Cached = input tokens served from the provider's prompt cache (billed at the cached rate).")
+    if args.judge:
+        print("Quality = mean 0-10 score from the Manager's rubric (--judge); the judge's calls are not counted above.")
+
+    if args.json:
+        args.json.write_text(json.dumps({
+            "corpus": corpus,
+            "summaries": summaries,
+            "runs": {name: [asdict(r) for r in results] for name, results in all_results.items()},
+        }, indent=2), encoding="utf-8")
+        print(f"Wrote {args.json}")
@@ -0,0 +1,363 @@
+"""Load generator: concurrent users against the Gradio generate_travel_plan API.
+
+Open-loop arrivals (Poisson or evenly spaced) in ramp stages, with queries drawn from the
+UI's example list. Reports latency percentiles, error rate, queue wait and throughput per
+stage and over time, as JSON that can be diffed between releases (--compare).
+
+--stub serves the real Gradio app in-process with a simulated plan_trip (no API calls),
+which measures the server and its queue on their own.
+
+Usage: python benchmarks/load_test.py [--url http://127.0.0.1:7860 | --stub]
+                                      [--stages 60s@0.1,120s@0.1-0.5] [--arrivals poisson] [--fast]
+                                      [--out load.json] [--compare baseline.json]
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+# Bootstrap: ensure src/ is on sys.path (same as main.py)
+_src = Path(__file__).resolve().parent.parent / "src"
+if str(_src) not in sys.path:
+    sys.path.insert(0, str(_src))
+
+import httpx
+from frontend import EXAMPLE_QUERIES, create_gradio_interface
+
+API_NAME = "generate_travel_plan"
+_STAGE_RE = re.compile(r"^(?P<duration>\d+(?:\.\d+)?)s@(?P<start>\d*\.?\d+)(?:-(?P<end>\d*\.?\d+))?$")
+
+
+@dataclass
+class Stage:
+    """duration_s seconds of arrivals whose rate ramps linearly from start_rps to end_rps."""
+    duration_s: float
+    start_rps: float
+    end_rps: float
+
+    @property
+    def label(self) -> str:
+        rate = f"{self.start_rps:g}" if self.start_rps == self.end_rps else f"{self.start_rps:g}-{self.end_rps:g}"
+        return f"{self.duration_s:g}s@{rate}"
+
+    def rate_at(self, t: float) -> float:
+        return self.start_rps + (self.end_rps - self.start_rps) * (t / self.duration_s)
+
+
+def parse_stages(text: str) -> List[Stage]:
+    """'60s@0.5,120s@0.5-2' -> 60 s at 0.5 req/s, then 120 s ramping from 0.5 to 2 req/s."""
+    stages = []
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        match = _STAGE_RE.match(part)
+        if not match:
+            raise ValueError(f"Bad stage {part!r}; expected <seconds>s@<rps> or <seconds>s@<rps>-<rps>")
+        start = float(match["start"])
+        stages.append(Stage(float(match["duration"]), start, float(match["end"] or start)))
+    return stages
+
+
+def arrival_schedule(stages: List[Stage], arrivals: str, rng: random.Random) -> List[tuple]:
+    """(send time, stage index) for every request, fixed up front so the load is open-loop."""
+    schedule, offset = [], 0.0
+    for index, stage in enumerate(stages):
+        t = 0.0
+        while True:
+            rate = stage.rate_at(t)
+            if rate <= 0:
+                t += 1.0  # idle second of a ramp that starts at zero
+                if t >= stage.duration_s:
+                    break
+                continue
+            t += rng.expovariate(rate) if arrivals == "poisson" else 1.0 / rate
+            if t >= stage.duration_s:
+                break
+            schedule.append((offset + t, index))
+        offset += stage.duration_s
+    return schedule
+
+
+@dataclass
+class RequestRecord:
+    stage: int
+    query: int
+    sent_s: float
+    outcome: str = "pending"  # ok | error | cancelled | rejected | timeout | client_dropped
+    latency_s: Optional[float] = None
+    queue_wait_s: Optional[float] = None
+    queue_rank: Optional[int] = None
+    http_status: Optional[int] = None
+    detail: str = ""
+
+
+def classify(output: dict, success: bool) -> tuple:
+    """Map a process_completed payload to (outcome, detail) using the handler's status message."""
+    if not success:
+        return "error", str(output.get("error") or output)[:200]
+    status = str((output.get("data") or [""])[0])
+    if "Successfully" in status:
+        return "ok", ""
+    return ("cancelled" if "cancelled" in status.lower() else "error"), status[:200]
+
+
+async def send_request(client: httpx.AsyncClient, base_url: str, record: RequestRecord, query: str,
+                       run_start: float, timeout: float, fast: bool = False) -> None:
+    """Join the queue as a fresh session and follow its event stream to completion."""
+    session = uuid.uuid4().hex
+    joined = None
+    try:
+        async with asyncio.timeout(timeout):
+            response = await client.post(f"{base_url}/gradio_api/call/{API_NAME}",
+                                         json={"data": [query, fast], "session_hash": session})
+            record.http_status = response.status_code
+            if response.status_code != 200:
+                record.outcome = "rejected"
+                record.detail = response.text[:200]
+                return
+            joined = time.perf_counter()
+            async with client.stream("GET", f"{base_url}/gradio_api/queue/data",
+                                     params={"session_hash": session}) as stream:
+                async for line in stream.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    message = json.loads(line[5:])
+                    kind = message.get("msg")
+                    if kind == "estimation" and record.queue_rank is None:
+                        record.queue_rank = message.get("rank")
+                    elif kind == "process_starts":
+                        record.queue_wait_s = time.perf_counter() - joined
+                    elif kind == "process_completed":
+                        record.outcome, record.detail = classify(message.get("output") or {}, message.get("success"))
+                        return
+                    elif kind == "unexpected_error":
+                        record.outcome, record.detail = "error", str(message.get("message"))[:200]
+                        return
+            record.outcome, record.detail = "error", "event stream closed before completion"
+    except TimeoutError:
+        record.outcome = "timeout"
+    except httpx.HTTPError as e:
+        record.outcome, record.detail = "error", f"{type(e).__name__}: {e}"[:200]
+    finally:
+        record.latency_s = time.perf_counter() - (run_start + record.sent_s)
+
+
+async def generate_load(base_url: str, stages: List[Stage], arrivals: str, seed: int,
+                        timeout: float, max_in_flight: int, fast: bool = False) -> List[RequestRecord]:
+    """Fire every scheduled request at its send time, whatever is still in flight."""
+    rng = random.Random(seed)
+    schedule = arrival_schedule(stages, arrivals, rng)
+    records = [RequestRecord(stage=stage, query=rng.randrange(len(EXAMPLE_QUERIES)), sent_s=t)
+               for t, stage in schedule]
+    print(f"Sending {len(records)} requests over {sum(s.duration_s for s in stages):g}s "
+          f"({arrivals} arrivals, stages {','.join(s.label for s in stages)})")
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=64)
+    async with httpx.AsyncClient(limits=limits, timeout=httpx.Timeout(30.0, read=None)) as client:
+        run_start = time.perf_counter()
+        tasks = set()
+        for record in records:
+            delay = run_start + record.sent_s - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(tasks) >= max_in_flight:
+                # The client, not the server, is the bottleneck: record it rather than stall the schedule
+                record.outcome, record.latency_s = "client_dropped", 0.0
+                continue
+            task = asyncio.create_task(send_request(client, base_url, record, EXAMPLE_QUERIES[record.query],
+                                                    run_start, timeout, fast))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            print(f"Schedule done; waiting for {len(tasks)} requests in flight")
+            await asyncio.gather(*tasks)
+    return records
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (None for no values)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered) + 0.5)) - 1))]
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 3)
+
+
+def summarize(records: List[RequestRecord], window_s: float) -> Dict[str, object]:
+    """Latency and queue-wait percentiles, outcome counts, error rate and throughput."""
+    outcomes: Dict[str, int] = {}
+    for r in records:
+        outcomes[r.outcome] = outcomes.get(r.outcome, 0) + 1
+    ok_latency = [r.latency_s for r in records if r.outcome == "ok"]
+    waits = [r.queue_wait_s for r in records if r.queue_wait_s is not None]
+    sent = len(records)
+    return {
+        "sent": sent,
+        "outcomes": dict(sorted(outcomes.items())),
+        "error_rate": _round((sent - outcomes.get("ok", 0)) / sent) if sent else None,
+        "offered_rps": _round(sent / window_s) if window_s else None,
+        "throughput_rps": _round(len(ok_latency) / window_s) if window_s else None,
+        "latency_s": {f"p{q}": _round(percentile(ok_latency, q)) for q in (50, 90, 95, 99)}
+                     | {"max": _round(max(ok_latency, default=None))},
+        "queue_wait_s": {f"p{q}": _round(percentile(waits, q)) for q in (50, 95, 99)}
+                        | {"max": _round(max(waits, default=None))},
+    }
+
+
+def timeline(records: List[RequestRecord], bucket_s: float) -> List[Dict[str, object]]:
+    """Per-bucket arrivals, completions, errors, requests in flight, throughput and median latency."""
+    if not records:
+        return []
+    end = max(r.sent_s + (r.latency_s or 0.0) for r in records)
+    buckets = []
+    for i in range(int(end // bucket_s) + 1):
+        lo, hi = i * bucket_s, (i + 1) * bucket_s
+        finished = [r for r in records if r.latency_s is not None and lo <= r.sent_s + r.latency_s < hi]
+        ok = [r.latency_s for r in finished if r.outcome == "ok"]
+        waits = [r.queue_wait_s for r in finished if r.queue_wait_s is not None]
+        buckets.append({
+            "t_s": lo,
+            "sent": sum(lo <= r.sent_s < hi for r in records),
+            "completed_ok": len(ok),
+            "failed": len(finished) - len(ok),
+            "in_flight": sum(r.sent_s < hi and r.sent_s + (r.latency_s or 0.0) >= hi for r in records),
+            "throughput_rps": _round(len(ok) / bucket_s),
+            "latency_p50_s": _round(percentile(ok, 50)),
+            "queue_wait_p50_s": _round(percentile(waits, 50)),
+        })
+    return buckets
+
+
+def build_report(records: List[RequestRecord], stages: List[Stage], args: argparse.Namespace,
+                 target: str, started_at: str) -> Dict[str, object]:
+    total_s = sum(s.duration_s for s in stages)
+    per_stage = []
+    for index, stage in enumerate(stages):
+        stage_records = [r for r in records if r.stage == index]
+        per_stage.append({"stage": stage.label} | summarize(stage_records, stage.duration_s))
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                  cwd=Path(__file__).resolve().parent).stdout.strip() or None
+    except OSError:
+        revision = None
+    return {
+        "meta": {
+            "target": target,
+            "stub": args.stub,
+            "stages": [s.label for s in stages],
+            "arrivals": args.arrivals,
+            "fast": args.fast,
+            "seed": args.seed,
+            "timeout_s": args.timeout,
+            "started_at": started_at,
+            "git_revision": revision,
+        },
+        "summary": summarize(records, total_s),
+        "stages": per_stage,
+        "timeline": timeline(records, args.bucket),
+        "requests": [asdict(r) | {"latency_s": _round(r.latency_s), "queue_wait_s": _round(r.queue_wait_s),
+                                  "sent_s": _round(r.sent_s)} for r in records],
+    }
+
+
+def print_report(report: Dict[str, object]) -> None:
+    print(f"\n{'Stage':<18}{'sent':>6}{'error %':>9}{'thru rps':>10}{'p50 (s)':>9}{'p95 (s)':>9}"
+          f"{'p99 (s)':>9}{'wait p50':>10}{'wait p95':>10}")
+    for row in report["stages"] + [{"stage": "all"} | report["summary"]]:
+        lat, wait = row["latency_s"], row["queue_wait_s"]
+        cells = [row["error_rate"] * 100 if row["error_rate"] is not None else None, row["throughput_rps"],
+                 lat["p50"], lat["p95"], lat["p99"], wait["p50"], wait["p95"]]
+        widths = (9, 10, 9, 9, 9, 10, 10)
+        print(f"{row['stage']:<18}{row['sent']:>6}"
+              + "".join(f"{'-' if v is None else f'{v:.2f}':>{w}}" for v, w in zip(cells, widths)))
+    print(f"\nOutcomes: {report['summary']['outcomes']}")
+
+
+def compare(report: Dict[str, object], baseline: Dict[str, object]) -> None:
+    """Print the summary metrics of this run next to a baseline report."""
+    def flat(summary: Dict[str, object]) -> Dict[str, Optional[float]]:
+        values = {"error_rate": summary["error_rate"], "throughput_rps": summary["throughput_rps"]}
+        values |= {f"latency_{k}_s": v for k, v in summary["latency_s"].items()}
+        values |= {f"queue_wait_{k}_s": v for k, v in summary["queue_wait_s"].items()}
+        return values
+
+    current, previous = flat(report["summary"]), flat(baseline["summary"])
+    print(f"\nCompared with {baseline['meta'].get('git_revision')} ({baseline['meta'].get('started_at')}):")
+    print(f"{'metric':<22}{'baseline':>11}{'current':>11}{'change':>10}")
+    for metric, value in current.items():
+        before = previous.get(metric)
+        change = f"{(value - before) / before * 100:+.1f}%" if value is not None and before else "-"
+        print(f"{metric:<22}{'-' if before is None else f'{before:.3f}':>11}"
+              f"{'-' if value is None else f'{value:.3f}':>11}{change:>10}")
+    if baseline["meta"].get("stages") != report["meta"]["stages"]:
+        print("Note: the baseline used different stages, so the numbers are not directly comparable.")
+    if bool(baseline["meta"].get("fast")) != report["meta"]["fast"]:
+        mode = {True: "fast mode", False: "the full pipeline"}
+        print(f"Note: comparing {mode[report['meta']['fast']]} with a baseline run in {mode[bool(baseline['meta'].get('fast'))]}.")
+
+
+def start_stub_server(median_s: float, error_rate: float, seed: int) -> str:
+    """Serve the real Gradio app in-process over a plan_trip that only sleeps. Returns its URL."""
+    rng = random.Random(seed)
+
+    async def stub_plan_trip(query: str, run_id: Optional[str] = None, executor: Optional[str] = None):
+        # Log-normal service time around the median, like real runs with a long tail
+        await asyncio.sleep(median_s * rng.lognormvariate(0.0, 0.4))
+        if rng.random() < error_rate:
+            raise RuntimeError("simulated planning failure")
+        return SimpleNamespace(content=f"# Comprehensive Travel Plan\n\n(stub plan for: {query[:60]})")
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    interface, custom_css, theme = create_gradio_interface(stub_plan_trip, lambda run_id, reason: False)
+    # Same launch settings as main.py apart from the address
+    interface.launch(server_name="127.0.0.1", server_port=port, share=False, show_error=True, quiet=True,
+                     css=custom_css, theme=theme, prevent_thread_lock=True)
+    return f"http://127.0.0.1:{port}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Open-loop load test of the generate_travel_plan API.")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", default="http://127.0.0.1:7860", help="Base URL of a running main.py")
+    target.add_argument("--stub", action="store_true", help="Serve the app in-process with a simulated backend")
+    parser.add_argument("--stages", default="60s@0.1", help="Comma-separated <seconds>s@<rps>[-<rps>] stages")
+    parser.add_argument("--arrivals", choices=("poisson", "constant"), default="poisson")
+    parser.add_argument("--fast", action="store_true", help="Tick the UI's fast mode on every request")
+    parser.add_argument("--seed", type=int, default=0, help="Seeds arrivals and the query mix")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Per-request timeout in seconds")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="Client-side cap on open requests")
+    parser.add_argument("--bucket", type=float, default=10.0, help="Timeline bucket size in seconds")
+    parser.add_argument("--stub-latency", type=float, default=20.0, help="Median simulated plan time (--stub)")
+    parser.add_argument("--stub-error-rate", type=float, default=0.0, help="Simulated failure rate (--stub)")
+    parser.add_argument("--out", type=Path, help="Write the JSON report here")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON report to compare against")
+    args = parser.parse_args()
+
+    stages = parse_stages(args.stages)
+    base_url = start_stub_server(args.stub_latency, args.stub_error_rate, args.seed) if args.stub \
+        else args.url.rstrip("/")
+    started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    records = asyncio.run(generate_load(base_url, stages, args.arrivals, args.seed, args.timeout,
+                                        args.max_in_flight, args.fast))
+
+    report = build_report(records, stages, args, "stub" if args.stub else base_url, started_at)
+    print_report(report)
+    if args.compare:
+        compare(report, json.loads(args.compare.read_text(encoding="utf-8")))
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"Wrote {args.out}")
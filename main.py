@@ -8,63 +8,91 @@ _src = Path(__file__).parent / "src"
 if str(_src) not in sys.path:
     sys.path.insert(0, str(_src))
 
+import time
+import uuid
+from typing import Optional
+from agno.run.base import RunStatus
+from agno.run.workflow import WorkflowRunOutput
 from langfuse import observe, propagate_attributes
 
 # Import configuration (initializes Langfuse and OpenLIT)
 from core.config import langfuse
-from core.utils import make_agent_observable
-
-# Import agents
-from agents.research_agents import destination_researcher, hotel_finder, activities_researcher
-from agents.planner_agent import itinerary_planner
-from agents.critique_agent import critique_agent
-
-# Import workflow
-from workflows.travel_workflow import travel_planning_workflow
+from core.cancellation import RunCancelled, cancel_reason_label, get_in_flight_runs
+from core.coalescing import PLAN_COALESCING_ENABLED, get_coalesced_runs
+from core.diagnostics import ensure_loop_monitor
+from core.memory_report import ensure_memory_monitor
+from core.metrics import plan_duration, runs_cancelled, runs_in_flight, start_metrics_server
+from core.run_budget import RunBudget, budget_scope
+from core.shared_cache import PLAN_CACHE_TTL_SECONDS, cache_key, get_shared_cache
+from core.trip_spec import parse_trip_spec
+from core.worker_pool import PLAN_WORKERS, WorkerPool
+
+# Import the plan executor (PLAN_EXECUTOR=workflow|fast|team, or per request)
+from workflows.executors import get_executor
 
 # Import Gradio interface
 from frontend import create_gradio_interface
 
 
-# Apply Langfuse observation to all agents
-make_agent_observable(destination_researcher, "destination-researcher")
-make_agent_observable(hotel_finder, "hotel-finder")
-make_agent_observable(activities_researcher, "activities-researcher")
-make_agent_observable(itinerary_planner, "itinerary-planner")
-make_agent_observable(critique_agent, "critique-agent")
-
-
 @observe(as_type="span", name="Travel Planning Pipeline")
-async def plan_trip(query: str):
+async def plan_trip(query: str, run_id: Optional[str] = None, executor: Optional[str] = None):
     """
     Run the travel planning workflow with Langfuse tracing.
+
+    executor picks the pipeline for this request ("workflow", "fast" or "team");
+    PLAN_EXECUTOR is used when it is not given. Fast mode runs one combined
+    research agent and a single planner pass, with no Manager review.
+
+    Every step is checkpointed under run_id. Passing the run_id of a failed or
+    interrupted run resumes it from the last completed step, so research agents,
+    drafts and critiques that already finished are not paid for again.
+
+    cancel_trip(run_id) stops the run while it is in flight; plan_trip then
+    raises RunCancelled and the cancellation is recorded on the trace.
+
+    A request whose normalized query matches a run already in flight joins that
+    run instead of starting its own, so a burst of identical requests costs one
+    workflow execution. Cancelling a joined request only detaches it.
     
     Workflow Structure:
     ==================
-    Travel Planning Pipeline (span)
-    └── travel-planning-workflow (agent)
+    Travel Planning Pipeline (span)        [trip spec parsed locally, attached as metadata]
+    └── travel-planning-workflow (agent)   [one per leg, run concurrently, for multi-city trips]
+        ├── Prefetch Searches (concurrent tavily-web-search, no LLM)
         ├── Research Team Phase (runs ONCE only)
         │   ├── destination-researcher (agent) → tavily-web-search
         │   ├── hotel-finder (agent) → tavily-web-search
         │   └── activities-researcher (agent) → tavily-web-search
         │
-        ├── Team Lead <-> Manager Revision Loop (max 2 iterations)
+        ├── Team Lead <-> Manager Revision Loop (2 iterations by default, up to MAX_REVIEW_ROUNDS = 3;
+        │                                         fewer when the run budget runs low)
         │   ├── Iteration 1:
-        │   │   ├── itinerary-planner (team lead) → creates initial report
+        │   │   ├── itinerary-planner (team lead) → creates initial structured plan
         │   │   └── critique-agent (manager) → reviews and approves/requests revision
-        │   └── Iteration 2 (if Manager requested revision):
-        │       ├── itinerary-planner (team lead) → revises report based on Manager feedback
+        │   ├── Iteration 2 (if Manager requested revision):
+        │   │   ├── itinerary-planner (team lead) → revises plan based on Manager feedback
+        │   │   └── critique-agent (manager) → approval, or a last revision request
+        │   └── Iteration 3 (only if review history expects another revision to pay off):
+        │       ├── itinerary-planner (team lead) → revises plan again
         │       └── critique-agent (manager) → final approval
         │
         └── Present Final Report
-            └── itinerary-planner (team lead) → presents Manager-approved plan to user
+            └── local renderer → markdown report from the Manager-approved plan
     
     Benefits:
     - Research agents (Tavily tool calls) run ONLY ONCE at the start
     - Only itinerary planner revises in loop, no redundant research calls
-    - Maximum 2 loop iterations = 1 revision opportunity
+    - 2 loop iterations by default = 1 revision opportunity; review history can allow one more
+      (MAX_REVIEW_ROUNDS, default 3) or skip a revision that won't pay off
     - Mimics real org structure: Research Team → Team Lead → Manager approval
-    - Final output is from itinerary planner (natural language), not critique (structured)
+    - Final report is rendered locally from the planner's structured plan (no extra LLM pass)
+
+    Fast mode (executor="fast"):
+    ============================
+    travel-planning-workflow (agent)
+        ├── Prefetch Searches (one concurrent batch, no LLM)
+        ├── combined-researcher (agent) → all three research outputs in one structured output
+        └── itinerary-planner (team lead) → single pass, rendered locally (no Manager review)
     """
     with propagate_attributes(
         # Change these attributes to your own
@@ -79,23 +107,88 @@ async def plan_trip(query: str):
             "execution_mode": "parallel_once_then_revision_loop"
         }
     ):
-        response = travel_planning_workflow.arun(query)
-
-        # Handle both coroutine and async generator returns.
-        # Agno versions differ: some return WorkflowRunOutput directly,
-        # others return an AsyncIterator of events.
-        import asyncio
-        import inspect
-
-        if asyncio.iscoroutine(response):
-            result = await response
-        elif inspect.isasyncgen(response):
-            result = None
-            async for item in response:
-                result = item
-        else:
-            # Already a WorkflowRunOutput (sync return)
-            result = response
+        run_id = run_id or uuid.uuid4().hex
+        ensure_loop_monitor()  # no-op unless LOOP_MONITOR=1
+        ensure_memory_monitor()  # no-op unless MEMORY_REPORT=1
+
+        # Destinations, length, travelers, interests and budget, parsed locally once per run
+        spec = parse_trip_spec(query)
+        executor = get_executor(executor)
+        try:
+            langfuse.update_current_span(
+                metadata={"run_id": run_id, "executor": executor.name, "trip_spec": spec.as_dict()}
+            )
+        except AttributeError:
+            pass
+
+        # A plan finished recently for the same query (by any worker process) is served as is
+        plan_key = cache_key(executor.name, query)
+        cached_plan = get_shared_cache().get("plan", plan_key) if PLAN_CACHE_TTL_SECONDS > 0 else None
+        if cached_plan is not None:
+            plan_duration.observe(0.0, "cached")
+            try:
+                langfuse.update_current_span(metadata={"plan_cache": "hit"})
+                langfuse.update_current_trace(input=query, output=cached_plan, tags=["cached"])
+            except AttributeError:
+                pass
+            return WorkflowRunOutput(input=query, content=cached_plan, run_id=run_id, status=RunStatus.completed)
+
+        # The workflow executor splits multi-destination trips into legs planned concurrently.
+        # Identical requests in flight at the same time share one execution (charged to the first one's budget)
+        def start_run():
+            return executor.run(query, run_id, spec)
+
+        def joined(owner_run_id: str) -> None:
+            try:
+                langfuse.update_current_span(metadata={"coalesced_into": owner_run_id})
+                langfuse.update_current_trace(tags=["coalesced"])
+            except AttributeError:
+                pass
+
+        work = get_coalesced_runs().join(plan_key, run_id, start_run, joined) if PLAN_COALESCING_ENABLED else start_run()
+
+        # Every agent call of the run is charged to its token, cost and time budget
+        budget = RunBudget()
+        started, outcome = time.perf_counter(), "failed"
+        try:
+            with runs_in_flight.track(), budget_scope(budget):
+                result = await get_in_flight_runs().run(run_id, work)
+            outcome = "completed"
+        except RunCancelled as e:
+            outcome = "cancelled"
+            runs_cancelled.inc(cancel_reason_label(e.reason))  # the raw reason goes on the trace only
+            try:
+                langfuse.update_current_span(
+                    level="WARNING",
+                    status_message=str(e),
+                    metadata={"run_id": run_id, "cancelled": True, "cancel_reason": e.reason},
+                )
+                langfuse.update_current_trace(input=query, tags=["cancelled"])
+            except AttributeError:
+                pass
+            raise
+        finally:
+            plan_duration.observe(time.perf_counter() - started, outcome)
+            try:
+                langfuse.update_current_span(metadata={"run_budget": budget.as_dict()})
+            except AttributeError:
+                pass
+
+        failed = result is None or str(getattr(result, "status", "")).lower().endswith("error")
+        # Plans built from degraded research or cut short by the run budget are returned but not cached
+        quality = (getattr(result, "metadata", None) or {}) if result else {}
+        degraded = bool(quality.get("degraded_inputs") or quality.get("budget_stop"))
+        if degraded:
+            try:
+                langfuse.update_current_span(metadata={
+                    "degraded_inputs": quality.get("degraded_inputs"),
+                    "budget_stop": quality.get("budget_stop"),
+                })
+            except AttributeError:
+                pass
+        if (not failed and not degraded and isinstance(result.content, str) and result.content
+                and PLAN_CACHE_TTL_SECONDS > 0):
+            get_shared_cache().set("plan", plan_key, result.content, PLAN_CACHE_TTL_SECONDS)
 
         # Update trace with final input/output
         try:
@@ -110,6 +203,14 @@ async def plan_trip(query: str):
         return result
 
 
+def cancel_trip(run_id: str, reason: str = "cancelled by user") -> bool:
+    """
+    Cancel an in-flight plan_trip run (safe to call from any thread).
+    Returns False when no run with this ID is in flight.
+    """
+    return get_in_flight_runs().cancel(run_id, reason)
+
+
 if __name__ == "__main__":
     print("=" * 70)
     print("TRAVEL PLANNING WORKFLOW - WEB INTERFACE")
@@ -117,9 +218,23 @@ if __name__ == "__main__":
     print("\nStarting Gradio interface...")
     print("Langfuse tracing is enabled for all workflows")
     print("=" * 70)
+
+    # Prometheus/OpenMetrics scrape endpoint (METRICS_PORT, 0 disables it)
+    try:
+        start_metrics_server()
+    except OSError as e:
+        print(f"Metrics endpoint not started: {e}")
     
+    # PLAN_WORKERS=N runs plans in N worker processes; this process keeps the UI and the queue
+    plan_func, cancel_func = plan_trip, cancel_trip
+    if PLAN_WORKERS > 0:
+        pool = WorkerPool(PLAN_WORKERS).start()
+        plan_func, cancel_func = pool.plan_trip, pool.cancel_trip
+
     # Create and launch the Gradio interface
-    interface, custom_css, theme = create_gradio_interface(plan_trip)
+    interface, custom_css, theme = create_gradio_interface(plan_func, cancel_func)
+    if PLAN_WORKERS > 0:
+        interface.queue(default_concurrency_limit=pool.capacity)
     interface.launch(
         server_name="0.0.0.0",
         server_port=7860,
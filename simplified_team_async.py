@@ -1,4 +1,7 @@
 import asyncio
+import sys
+import uuid
+from pathlib import Path
 from textwrap import dedent
 from dotenv import load_dotenv
 from pydantic import BaseModel
@@ -12,6 +15,13 @@ from agno.utils.pprint import pprint_run_response
 from langfuse import get_client, observe, propagate_attributes
 import openlit
 
+# Bootstrap: ensure src/ is on sys.path for the shared trace spool
+_src = Path(__file__).parent / "src"
+if str(_src) not in sys.path:
+    sys.path.insert(0, str(_src))
+
+from core.trace_spool import install_trace_spool
+from workflows.executors import TeamExecutor
 
 # Load environment variables
 load_dotenv()
@@ -19,6 +29,9 @@ load_dotenv()
 # Initialize Langfuse client
 langfuse = get_client()
 
+# Spool exported spans to local disk and upload them in the background (TRACE_SPOOL=0 disables)
+install_trace_spool(langfuse)
+
 # Verify connection
 if langfuse.auth_check():
     print("Langfuse client is authenticated and ready!")
@@ -228,8 +241,9 @@ travel_team = Team(
 @observe(as_type="agent", name="travel-planning-team")
 async def run_travel_team(query: str):
     """Run the travel planning team asynchronously for concurrent agent execution."""
-    response = await travel_team.arun(query)  # Use arun() for concurrent execution
-    return response
+    # Same executor interface as main.py (PLAN_EXECUTOR=team), over this script's own team
+    executor = TeamExecutor(team_factory=lambda: travel_team)
+    return await executor.run(query, run_id=uuid.uuid4().hex)
 
 # ============================================================================
 # MAIN PIPELINE with @observe
@@ -290,5 +304,5 @@ if __name__ == "__main__":
     # Print the result
     pprint_run_response(result, markdown=True)
 
-    langfuse.flush()  # Ensure traces are sent before script exits
+    langfuse.flush()  # Hand buffered spans to the spool; the uploader drains it at exit
 
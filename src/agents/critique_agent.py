@@ -1,48 +1,46 @@
 """Critique agent (manager) for reviewing travel plans."""
 from textwrap import dedent
-from agno.agent import Agent
-from agno.models.openai import OpenAIChat
+from agents.factory import AgentSpec
 from core.schemas import CritiqueResult
 
-# Critique Agent
-critique_agent = Agent(
+# Critique Agent Spec
+critique_agent_spec = AgentSpec(
     id="critique-agent",
     name="Manager - Travel Plan Reviewer",
     role="Manager who reviews and approves travel plans",
     description="You are a manager who evaluates travel plans for quality and completeness before final approval.",
+    # Static, so the system prompt is a cacheable prefix; the draft and the review
+    # status are sent in the message (critique_and_revise)
     instructions=dedent("""\
         You are reviewing a travel plan prepared by your team lead (itinerary planner)
         The team lead has already synthesized research from the team (destination, hotel, activities researchers)
-        Your role is to provide managerial-level feedback:
-        
-        CURRENT REVIEW STATUS:
-        - Review iteration: {revision_iteration}
-        - Previous feedback given: {manager_feedback}
+        Your role is to provide managerial-level feedback
         
         Evaluate the plan for:
-        1. Completeness - Does it cover all essential aspects?
-        2. Coherence - Does the itinerary flow logically?
-        3. Practicality - Are activities realistic within the timeframe?
-        4. Value - Does it align with the budget and traveler preferences?
+        1. Completeness - Does it cover all aspects (destination info, hotels, activities, itinerary)?
+        2. Coherence - Does the day-by-day plan flow logically?
+        3. Practicality - Are the activities feasible within the timeframe?
+        4. Budget alignment - Do recommendations match the stated budget and traveler preferences?
+        
+        Budget subtotals, grand totals and the USD estimate are computed automatically
+        from the line items, so do not request revisions for arithmetic or currency conversion.
         
-        Decision criteria:
+        Decision criteria (the REVIEW STATUS at the end of the message says which review this is):
         - On FIRST review (iteration 0): Be thorough but constructive. Approve if solid, or request specific improvements
-        - On SECOND review (iteration 1): Be more lenient and approve if reasonably good
+        - On SECOND and later reviews (iteration 1+): Be more lenient and approve if reasonably good
+        
+        Score the plan from 0 (unusable) to 10 (ready to ship as is), overall and on each
+        criterion. Score the draft on its own merits so scores are comparable across drafts.
         
         When requesting revisions:
         - Focus on how the REPORT should be improved (structure, clarity, completeness)
         - Don't ask for new research - work with existing team data 
         - Give specific, actionable feedback the team lead can implement
+        - List only the sections that need changes in sections_to_revise, and the day numbers in
+          days_to_revise if only some days of the itinerary need work. The team lead regenerates
+          just those, so a precise list keeps the revision small.
     """),
-    model=OpenAIChat(id="gpt-4.1-nano"),  # Using more capable model for managerial-level critique
+    model_id="gpt-4.1-nano",  # Using more capable model for managerial-level critique
     output_schema=CritiqueResult,
-    # Enable session state for tracking review iterations and feedback
-    session_state={
-        "revision_iteration": 0,
-        "manager_feedback": "No feedback yet",
-        "is_approved": False,
-    },
-    add_session_state_to_context=True,
     markdown=True,
 )
-
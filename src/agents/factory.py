@@ -0,0 +1,94 @@
+"""Per-request agent factory built from immutable agent specs."""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple, Type
+from agno.agent import Agent
+from agno.models.openai import OpenAIChat
+from pydantic import BaseModel
+from core.utils import make_agent_observable
+from tools.tool_budget import tool_budget_hook
+
+
+@dataclass(frozen=True)
+class AgentSpec:
+    """
+    Immutable recipe for an agent. Instructions are compiled (dedented) once when the
+    spec is defined; default session state is frozen and copied into each new agent.
+    """
+    id: str
+    name: str
+    role: str
+    description: str
+    instructions: str
+    output_schema: Type[BaseModel]
+    model_id: str = "gpt-4.1-nano"
+    tools: Tuple[Any, ...] = ()
+    session_state: Mapping[str, Any] = field(default_factory=dict)
+    add_session_state_to_context: bool = False
+    markdown: bool = True
+    # Caps per run: tool calls, and model turns that issue tool calls (None = unlimited)
+    tool_call_limit: Optional[int] = None
+    max_tool_rounds: Optional[int] = None
+
+    def __post_init__(self):
+        object.__setattr__(self, "tools", tuple(self.tools))
+        object.__setattr__(self, "session_state", MappingProxyType(dict(self.session_state)))
+
+
+@lru_cache(maxsize=None)
+def shared_model(model_id: str) -> OpenAIChat:
+    """One model object per model ID, so every agent reuses the same pooled OpenAI clients."""
+    return OpenAIChat(id=model_id)
+
+
+def build_agent(spec: AgentSpec) -> Agent:
+    """Build a fresh, Langfuse-instrumented agent from a spec."""
+    agent = Agent(
+        id=spec.id,
+        name=spec.name,
+        role=spec.role,
+        description=spec.description,
+        instructions=spec.instructions,
+        model=shared_model(spec.model_id),
+        tools=list(spec.tools) or None,
+        # Every tool call is counted per agent; calls past the spec's caps are refused
+        tool_hooks=[tool_budget_hook(spec.id, spec.tool_call_limit, spec.max_tool_rounds)] if spec.tools else None,
+        output_schema=spec.output_schema,
+        session_state=dict(spec.session_state),
+        add_session_state_to_context=spec.add_session_state_to_context,
+        markdown=spec.markdown,
+    )
+    make_agent_observable(agent, spec.id)
+    return agent
+
+
+# Agents of the request running in the current context (None outside agent_scope)
+_request_agents: ContextVar[Optional[Dict[str, Agent]]] = ContextVar("request_agents", default=None)
+
+
+@contextmanager
+def agent_scope() -> Iterator[Dict[str, Agent]]:
+    """
+    Give the enclosed request its own agents. They are built lazily on first use,
+    shared by the request's parallel steps, and released when the scope exits.
+    """
+    agents: Dict[str, Agent] = {}
+    token = _request_agents.set(agents)
+    try:
+        yield agents
+    finally:
+        _request_agents.reset(token)
+
+
+def get_agent(spec: AgentSpec) -> Agent:
+    """Return the current request's agent for a spec (a throwaway agent outside agent_scope)."""
+    agents = _request_agents.get()
+    if agents is None:
+        return build_agent(spec)
+    agent = agents.get(spec.id)
+    if agent is None:
+        agent = agents[spec.id] = build_agent(spec)
+    return agent
@@ -1,100 +1,71 @@
 """Itinerary planner agent (team lead)."""
 from textwrap import dedent
-from agno.agent import Agent
-from agno.models.openai import OpenAIChat
+from agents.factory import AgentSpec
+from core.schemas import DailyItinerary, PlanSectionRevision
 
-# Itinerary Planner Agent
-itinerary_planner = Agent(
+# Itinerary Planner Agent Spec
+itinerary_planner_spec = AgentSpec(
     id="itinerary-planner",
     name="Team Lead - Itinerary Planner",
     role="Team lead who synthesizes team research into comprehensive travel plans",
     description="You are a team lead who takes research from your team members and creates manager-ready travel plans for approval.",
+    # Static, so the system prompt is a cacheable prefix; the revision round's feedback
+    # and previous draft are appended to the end of the message (build_planner_prompt)
     instructions=dedent("""\
         You receive research from your team (destination, hotel, and activities researchers)
         
         Your job is to synthesize this information into a comprehensive, polished travel plan
         
-        CURRENT STATUS:
-        - Revision iteration: {revision_iteration}
-        - Manager's last feedback: {manager_feedback}
-        - Previous draft: {previous_draft}
-        
-        When creating the initial plan (iteration 0):
+        When creating the initial plan (the message has no REVISION REQUEST):
         - Review ALL research from the destination, hotel, and activities team members
         - Synthesize their findings into a cohesive narrative
         - Create a logical day-by-day schedule balancing activities with rest
-        - Group nearby attractions to minimize travel time
+        - Group nearby attractions to minimize travel time: follow the PRECOMPUTED DAILY CLUSTERS
+          when provided (they are computed from real coordinates), and place unclustered items by area
         
-        When revising based on Manager feedback (iteration > 0):
-        - Carefully read the Manager's critique from session state: {manager_feedback}
-        - Review your previous draft: {previous_draft}
+        When revising based on Manager feedback (the message ends with a REVISION REQUEST):
+        - Carefully read the Manager's feedback in the REVISION REQUEST
+        - Review your previous draft, included after the feedback
         - Address ALL points raised in the feedback
         - Improve structure, clarity, and completeness as requested
         - Work with the EXISTING research data - don't make up new information
         - Polish the presentation for manager approval
         
-        When presenting the final approved plan:
-        - Present the Manager-approved version as the final deliverable
-        - Make it user-friendly and ready for the traveler to use
-        - Ensure it's comprehensive and professional
-
-        Output format (comprehensive markdown report):
-        # Comprehensive Travel Plan: [Destination] [Amount of Days] Day Trip
-        ## Executive Summary
-        ## Destination Overview (from destination research)
-        ## Accommodation Recommendations (from hotel research)
-        ## Activities & Experiences (from activities research)
-        
-        ## Day-by-Day Itinerary
-        IMPORTANT: Format the itinerary as a table with THREE columns:
-        - Column 1: Day (with bold day headers like **Day 1: Theme**)
-        - Column 2: Activities & Timing (with time ranges and activity descriptions)
-        - Column 3: Notes (practical tips, booking advice, transportation notes)
-        - Use format: HH:MM – HH:MM in timing column
-        - Group activities by day with bold day headers in the Day column
-        - Provide helpful notes for each activity (booking tips, transport mode, timing considerations)
-        
-        Example format:
-        | Day | Activities & Timing | Notes |
-        |-----|---------------------|-------|
-        | **Day 1: Arrival & Introduction** | | |
-        | 09:00 – 10:30 | Arrival at airport and transfer to hotel; check-in | Ensure transfer time is sufficient based on transport mode |
-        | 11:00 – 13:00 | Visit Nishiki Market; explore local foods | Consider walking or short taxi ride from hotel |
-        | 13:30 – 15:00 | Lunch at local restaurant | Reserve in advance if possible |
-        | **Day 2: Temples & Culture** | | |
-        | 08:00 – 09:00 | Breakfast at hotel | Breakfast timings may vary |
-        | 09:30 – 12:00 | Visit famous temple | Use public transport for efficiency |
-        
-        ## Transportation Guide
-        
-        ## Budget Breakdown
-        IMPORTANT: Format the budget as a detailed table with THREE columns:
-        - Column 1: Category (accommodation, meals, transportation, activities, etc.)
-        - Column 2: Estimated Cost (in local currency)
-        - Column 3: Notes (details, booking tips, cost-saving options)
-        - Include subtotals and grand total
-        - Provide per-day and total trip costs
-        
-        Example format:
-        | Category | Estimated Cost | Notes |
-        |----------|----------------|-------|
-        | Accommodation | 25,000/night × 5 nights = 125,000 | Mid-range hotel near city center; book early for discounts |
-        | Meals | 4,000/day × 5 days = 20,000 | Mix of local restaurants and street food |
-        | Transportation | 3,000/day × 5 days = 15,000 | IC card for trains/buses; day passes available |
-        | Activities & Entrance Fees | 2,500/day × 5 days = 12,500 | Temple entries, workshops, experiences |
-        | Shopping & Souvenirs | 10,000 total | Budget varies by preference |
-        | **Total (5 days)** | **~182,500** | **Per person estimate; ~$1,200 USD** |
-        
-        ## Additional Notes and Travel Tips
+        Output format (structured plan - the markdown report is rendered from it automatically):
+        - destination, trip_days and the local currency code
+        - executive_summary: a short, engaging overview of the trip
+        - days: one entry per day with a short theme and chronological time slots
+          - start_time / end_time in HH:MM (24-hour) format
+          - activity: what happens in the slot (attraction, meal, transfer, rest)
+          - notes: booking tips, transport mode, timing considerations
+        - transportation_guide: how to get around during the trip
+        - budget_items: per-person line items (accommodation, meals, transportation, activities, shopping)
+          - Use unit "night" or "day" with a quantity, or unit "total" for one-off amounts
+          - Amounts in local currency; subtotals and the grand total are computed for you
+        - additional_notes: extra travel tips for the traveler
     """),
-    model=OpenAIChat(id="gpt-4.1-nano"),
-    # Enable session state for tracking revisions and feedback
-    session_state={
-        "revision_iteration": 0,
-        "manager_feedback": "No feedback yet - this is the initial draft",
-        "previous_draft": "No previous draft",
-    },
-    add_session_state_to_context=True,
+    model_id="gpt-4.1-nano",
+    output_schema=DailyItinerary,
     markdown=True,
 )
 
+
+# Section Reviser Agent Spec (revision rounds that only touch the sections the Manager flagged)
+itinerary_reviser_spec = AgentSpec(
+    id="itinerary-reviser",
+    name="Team Lead - Section Reviser",
+    role="Team lead who revises the flagged sections of an existing travel plan",
+    description="You are a team lead who fixes exactly what the manager flagged in a travel plan, leaving the rest untouched.",
+    instructions=dedent("""\
+        You receive the Manager's feedback and ONLY the sections of your plan that the Manager flagged
+        
+        Revise those sections so they address ALL points in the feedback:
+        - Fill in only the fields for the flagged sections; leave every other field null
+        - days: return only the days you were given, each keeping its day_number
+        - budget_items: return the complete revised list of line items (subtotals and totals are computed for you)
+        - Keep the trip's destination, length and currency unchanged
+        - Work with the EXISTING research data - don't make up new information
+    """),
+    model_id="gpt-4.1-nano",
+    output_schema=PlanSectionRevision,
+)
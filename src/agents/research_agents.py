@@ -1,12 +1,17 @@
 """Specialized research agents for travel planning."""
+import os
 from textwrap import dedent
-from agno.agent import Agent
-from agno.models.openai import OpenAIChat
+from agents.factory import AgentSpec
 from tools.web_search import web_search_tool
-from core.schemas import DestinationInfo, AccommodationOptions, ActivitiesInfo
+from core.schemas import DestinationInfo, AccommodationOptions, ActivitiesInfo, ResearchBundle
 
-# Destination Researcher Agent
-destination_researcher = Agent(
+# Per research agent run: web searches, and model turns that issue them (0 = unlimited).
+# Searches of one turn run concurrently, so rounds rather than calls set the research latency
+RESEARCH_TOOL_CALL_LIMIT = int(os.getenv("RESEARCH_TOOL_CALL_LIMIT", "6")) or None
+RESEARCH_SEARCH_ROUNDS = int(os.getenv("RESEARCH_SEARCH_ROUNDS", "2")) or None
+
+# Destination Researcher Agent Spec
+destination_researcher_spec = AgentSpec(
     id="destination-researcher",
     name="Destination Researcher",
     role="Expert at researching travel destinations",
@@ -17,14 +22,16 @@ destination_researcher = Agent(
         Discover local tips, cultural etiquette, and hidden gems
         Focus on practical, up-to-date information
     """),
-    model=OpenAIChat(id="gpt-4.1-nano"),
-    tools=[web_search_tool],
+    model_id="gpt-4.1-nano",
+    tools=(web_search_tool,),
+    tool_call_limit=RESEARCH_TOOL_CALL_LIMIT,
+    max_tool_rounds=RESEARCH_SEARCH_ROUNDS,
     output_schema=DestinationInfo,
     markdown=True,
 )
 
-# Hotel & Accommodation Finder Agent
-hotel_finder = Agent(
+# Hotel & Accommodation Finder Agent Spec
+hotel_finder_spec = AgentSpec(
     id="hotel-finder",
     name="Hotel & Accommodation Finder",
     role="Expert at finding the best hotels and accommodations",
@@ -35,14 +42,16 @@ hotel_finder = Agent(
         Look for good locations near attractions
         Provide booking tips and best times to book
     """),
-    model=OpenAIChat(id="gpt-4.1-nano"),
-    tools=[web_search_tool],
+    model_id="gpt-4.1-nano",
+    tools=(web_search_tool,),
+    tool_call_limit=RESEARCH_TOOL_CALL_LIMIT,
+    max_tool_rounds=RESEARCH_SEARCH_ROUNDS,
     output_schema=AccommodationOptions,
     markdown=True,
 )
 
-# Activities & Experiences Researcher Agent
-activities_researcher = Agent(
+# Activities & Experiences Researcher Agent Spec
+activities_researcher_spec = AgentSpec(
     id="activities-researcher",
     name="Activities & Experiences Researcher",
     role="Expert at finding local activities, transportation, and unique experiences",
@@ -54,9 +63,31 @@ activities_researcher = Agent(
         Discover food tours, cultural workshops, and authentic local experiences
         Provide estimated costs for activities and transportation
     """),
-    model=OpenAIChat(id="gpt-4.1-nano"),
-    tools=[web_search_tool],
+    model_id="gpt-4.1-nano",
+    tools=(web_search_tool,),
+    tool_call_limit=RESEARCH_TOOL_CALL_LIMIT,
+    max_tool_rounds=RESEARCH_SEARCH_ROUNDS,
     output_schema=ActivitiesInfo,
     markdown=True,
 )
 
+
+# Combined Researcher Agent Spec (fast mode: all three research outputs from one agent run)
+combined_researcher_spec = AgentSpec(
+    id="combined-researcher",
+    name="Combined Travel Researcher",
+    role="Expert at researching a destination, its accommodation and its activities in one pass",
+    description="You are a travel research specialist who covers the destination, places to stay and things to do in a single, fast research pass.",
+    instructions=dedent("""\
+        Cover all three areas: the destination (attractions, weather, local tips), accommodation (specific hotels across price bands, booking tips) and activities (things to do, transportation, food, estimated costs)
+        Work from the prefetched search results when they are provided
+        If essential information is missing, request every search you need in ONE turn; there is no second search round
+        Keep each section concise and practical
+    """),
+    model_id="gpt-4.1-nano",
+    tools=(web_search_tool,),
+    tool_call_limit=RESEARCH_TOOL_CALL_LIMIT,
+    max_tool_rounds=1,
+    output_schema=ResearchBundle,
+    markdown=True,
+)
@@ -0,0 +1,46 @@
+"""Agno Team variant of the travel planner (leader delegates to every member at once)."""
+from textwrap import dedent
+from agno.team import Team
+from agents.factory import get_agent, shared_model
+from agents.planner_agent import itinerary_planner_spec
+from agents.research_agents import activities_researcher_spec, destination_researcher_spec, hotel_finder_spec
+
+TEAM_MODEL_ID = "gpt-4.1-nano"
+
+TEAM_INSTRUCTIONS = dedent("""\
+    You are a travel planning manager coordinating a team of specialists
+    Delegate tasks to multiple team members simultaneously when possible
+    Ask the Destination Researcher to gather info about the destination
+    Ask the Hotel Finder to find accommodation options
+    Ask the Activities Researcher to find activities, transportation and local experiences
+    Ask the Itinerary Planner to create a day-by-day schedule based on the findings
+
+    You will also act as the final report writer, combining all findings into a comprehensive, easy-to-read travel plan
+    The final report should be in markdown format with the following format:
+    # Comprehensive Travel Plan: [Destination] [Amount of Days] Day Trip
+    ## Destination Overview
+    ## Accommodation Recommendations
+    ### [Amount of Days] Day Itinerary
+    ### Additional Notes and Travel Tips
+    ### Summary Table of the Day-by-Day Plan
+""")
+
+
+def build_travel_team() -> Team:
+    """Build a Team over the current request's agents (call inside agent_scope)."""
+    return Team(
+        id="travel-planning-team",
+        name="Travel Planning Team",
+        members=[
+            get_agent(destination_researcher_spec),
+            get_agent(hotel_finder_spec),
+            get_agent(activities_researcher_spec),
+            get_agent(itinerary_planner_spec),
+        ],
+        model=shared_model(TEAM_MODEL_ID),
+        instructions=TEAM_INSTRUCTIONS,
+        show_members_responses=True,
+        markdown=True,
+        # Delegate to all members at once for parallel execution
+        delegate_to_all_members=True,
+    )
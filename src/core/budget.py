@@ -0,0 +1,259 @@
+"""Deterministic budget arithmetic and currency conversion for the Budget Breakdown table."""
+import argparse
+import json
+import os
+import re
+import urllib.request
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from core.schemas import BudgetLineItem
+
+# Offline exchange rate table (units of currency per 1 USD).
+# Refresh it with: cd src && python -m core.budget --refresh
+RATES_PATH = Path(os.getenv("EXCHANGE_RATES_PATH", Path(__file__).parent / "data" / "exchange_rates.json"))
+RATES_SOURCE_URL = os.getenv("EXCHANGE_RATES_URL", "https://open.er-api.com/v6/latest/USD")
+
+# Cost cells the parser reads exactly (once currency symbols and codes are removed):
+# "25,000/night × 5 nights = 125,000", "25,000 per night x 5" and "3,000 total" or "3,000".
+# Any other wording (ranges, reversed "2 x 3,000/day", ...) makes the table unparseable.
+_AMOUNT = r"~?(?P<cost>\d[\d,]*(?:\.\d+)?)"
+_PER_UNIT_PATTERN = re.compile(
+    _AMOUNT + r"\s*(?:/|per)\s*(?P<unit>night|day)s?\s*[×x*]\s*(?P<quantity>\d+(?:\.\d+)?)"
+    r"(?:\s*(?:night|day)s?)?(?:\s*=\s*~?\d[\d,]*(?:\.\d+)?)?",
+    re.IGNORECASE,
+)
+_TOTAL_PATTERN = re.compile(_AMOUNT + r"(?:\s*total)?", re.IGNORECASE)
+
+# Currency symbols with an unambiguous ISO code ("$" is left to the USD default; "¥" is read as yen)
+CURRENCY_SYMBOLS = {"¥": "JPY", "€": "EUR", "£": "GBP", "₩": "KRW", "₹": "INR", "฿": "THB", "₫": "VND",
+                    "₺": "TRY", "₱": "PHP", "₪": "ILS"}
+_CURRENCY_PATTERN = re.compile(r"\b[A-Z]{3}\b|[$" + "".join(CURRENCY_SYMBOLS) + "]")
+_BUDGET_HEADING_PATTERN = re.compile(r"^##\s+Budget Breakdown\s*$", re.MULTILINE)
+
+
+@dataclass(frozen=True)
+class BudgetSummary:
+    """Computed subtotals and totals for a list of budget line items."""
+    items: List[BudgetLineItem]
+    subtotals: List[float]
+    total: float
+    per_day: float
+    trip_days: int
+    currency: str
+    total_usd: Optional[float]
+
+
+def format_amount(value: float) -> str:
+    """Format a money amount with thousands separators and no trailing .00"""
+    return f"{value:,.0f}" if float(value).is_integer() else f"{value:,.2f}"
+
+
+def table_cell(text: str) -> str:
+    """Make free text safe to place inside a markdown table cell."""
+    return " ".join(str(text).split()).replace("|", "\\|")
+
+
+@lru_cache(maxsize=1)
+def load_exchange_rates() -> Dict[str, float]:
+    """Load the offline USD-based exchange rate table (cached after the first call)."""
+    with open(RATES_PATH, encoding="utf-8") as f:
+        return {code.upper(): float(rate) for code, rate in json.load(f)["rates"].items()}
+
+
+def refresh_exchange_rates(url: str = RATES_SOURCE_URL, timeout: float = 10.0) -> int:
+    """
+    Download a fresh USD-based rate table and overwrite the offline file.
+    Returns the number of currencies written. Never called on the request path.
+    """
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        payload = json.load(response)
+
+    rates = payload.get("rates") or {}
+    if not rates:
+        raise ValueError(f"No rates found in response from {url}")
+
+    with open(RATES_PATH, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "base": "USD",
+                "as_of": payload.get("time_last_update_utc", ""),
+                "source": url,
+                "rates": rates,
+            },
+            f,
+            indent=2,
+        )
+    load_exchange_rates.cache_clear()
+    return len(rates)
+
+
+def convert_to_usd(amount: float, currency: str) -> Optional[float]:
+    """Convert an amount to USD using the offline table. Returns None for unknown currencies."""
+    rate = load_exchange_rates().get(currency.upper())
+    return amount / rate if rate else None
+
+
+def convert_currency(amount: float, from_currency: str, to_currency: str) -> Optional[float]:
+    """Convert between two currencies through USD. Returns None when either is unknown."""
+    if from_currency.upper() == to_currency.upper():
+        return amount
+    usd = convert_to_usd(amount, from_currency)
+    rate = load_exchange_rates().get(to_currency.upper())
+    return usd * rate if usd is not None and rate else None
+
+
+def line_subtotal(item: BudgetLineItem) -> float:
+    """Subtotal of one line item: one-off amounts count once, per-unit costs are multiplied."""
+    return item.unit_cost if item.unit == "total" else item.unit_cost * item.quantity
+
+
+def compute_budget(items: List[BudgetLineItem], currency: str, trip_days: Optional[int] = None) -> BudgetSummary:
+    """Compute subtotals, grand total, per-day average and the USD estimate."""
+    if not trip_days:
+        # Infer the trip length from the longest per-day line item
+        trip_days = int(max((i.quantity for i in items if i.unit == "day"), default=1))
+
+    subtotals = [line_subtotal(item) for item in items]
+    total = sum(subtotals)
+
+    return BudgetSummary(
+        items=items,
+        subtotals=subtotals,
+        total=total,
+        per_day=total / trip_days if trip_days else total,
+        trip_days=trip_days,
+        currency=currency,
+        total_usd=convert_to_usd(total, currency),
+    )
+
+
+def _cost_cell(item: BudgetLineItem, subtotal: float) -> str:
+    """Render the Estimated Cost cell, e.g. '25,000/night × 5 nights = 125,000'."""
+    if item.unit == "total":
+        return f"{format_amount(subtotal)} total"
+    plural = item.unit if item.quantity == 1 else f"{item.unit}s"
+    return (
+        f"{format_amount(item.unit_cost)}/{item.unit} × {format_amount(item.quantity)} {plural}"
+        f" = {format_amount(subtotal)}"
+    )
+
+
+def render_budget_table(summary: BudgetSummary) -> str:
+    """Render the three-column Budget Breakdown table with per-day and grand total rows."""
+    rows = [
+        "| Category | Estimated Cost | Notes |",
+        "|----------|----------------|-------|",
+    ]
+    for item, subtotal in zip(summary.items, summary.subtotals):
+        rows.append(f"| {table_cell(item.category)} | {_cost_cell(item, subtotal)} | {table_cell(item.notes)} |")
+
+    usd_note = f"; ~${format_amount(round(summary.total_usd))} USD" if summary.total_usd is not None else ""
+    rows.append(
+        f"| **Per day (average)** | **~{format_amount(round(summary.per_day))} {summary.currency}** | "
+        f"**Over {summary.trip_days} days** |"
+    )
+    rows.append(
+        f"| **Total ({summary.trip_days} days)** | **~{format_amount(round(summary.total))} {summary.currency}** | "
+        f"**Per person estimate{usd_note}** |"
+    )
+    return "\n".join(rows)
+
+
+def parse_cost_cell(text: str) -> Optional[Tuple[float, str, float]]:
+    """(unit cost, unit, quantity) of an Estimated Cost cell, or None unless it is one of the exact forms."""
+    cell = " ".join(_CURRENCY_PATTERN.sub(" ", text).split())
+    per_unit = _PER_UNIT_PATTERN.fullmatch(cell)
+    if per_unit:
+        return float(per_unit["cost"].replace(",", "")), per_unit["unit"].lower(), float(per_unit["quantity"])
+    total = _TOTAL_PATTERN.fullmatch(cell)
+    if total:
+        return float(total["cost"].replace(",", "")), "total", 1.0
+    return None
+
+
+def parse_budget_table(markdown: str) -> Optional[List[BudgetLineItem]]:
+    """
+    Parse line items from the Budget Breakdown table of a free-text report.
+    Bold summary rows (totals, per-day averages) are skipped; they are recomputed.
+    Returns None when any line item's cost cannot be read exactly, so callers leave
+    the table as written rather than recompute it from a guess.
+    """
+    heading = _BUDGET_HEADING_PATTERN.search(markdown)
+    if not heading:
+        return []
+
+    items = []
+    for line in markdown[heading.end():].splitlines():
+        line = line.strip()
+        if line.startswith("## "):
+            break
+        if not line.startswith("|"):
+            continue
+
+        cells = [c.strip() for c in line.strip("|").split("|")]
+        if len(cells) < 2 or cells[0].startswith("**") or set(cells[0]) <= set("-: ") or cells[0] == "Category":
+            continue
+
+        cost = parse_cost_cell(cells[1])
+        if cost is None:
+            return None
+        unit_cost, unit, quantity = cost
+
+        items.append(BudgetLineItem(
+            category=cells[0],
+            unit_cost=unit_cost,
+            unit=unit,
+            quantity=quantity,
+            notes=cells[2] if len(cells) > 2 else "",
+        ))
+    return items
+
+
+def detect_currency(markdown: str) -> Optional[str]:
+    """Find the first known currency code or symbol (other than USD) used in the Budget Breakdown section."""
+    heading = _BUDGET_HEADING_PATTERN.search(markdown)
+    section = markdown[heading.end():] if heading else markdown
+    rates = load_exchange_rates()
+    for token in _CURRENCY_PATTERN.findall(section):
+        code = CURRENCY_SYMBOLS.get(token, token)
+        if code in rates and code != "USD":
+            return code
+    return None
+
+
+def rewrite_budget_breakdown(markdown: str, currency: Optional[str] = None, trip_days: Optional[int] = None) -> str:
+    """
+    Replace the Budget Breakdown table of a free-text report with recomputed totals.
+    Returns the report unchanged when no table is found or any of its rows cannot be parsed.
+    """
+    items = parse_budget_table(markdown)
+    if not items:
+        return markdown
+
+    heading = _BUDGET_HEADING_PATTERN.search(markdown)
+    assert heading is not None  # parse_budget_table found items under this heading
+
+    # Locate the contiguous table block that follows the heading
+    lines = markdown[heading.end():].split("\n")
+    start = next(i for i, l in enumerate(lines) if l.strip().startswith("|"))
+    end = start
+    while end < len(lines) and lines[end].strip().startswith("|"):
+        end += 1
+
+    summary = compute_budget(items, currency or detect_currency(markdown) or "USD", trip_days)
+    lines[start:end] = render_budget_table(summary).split("\n")
+    return markdown[:heading.end()] + "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the offline exchange rate table.")
+    parser.add_argument("--refresh", action="store_true", help="Download fresh rates and overwrite the table")
+    parser.add_argument("--url", default=RATES_SOURCE_URL, help="USD-based rate source URL")
+    args = parser.parse_args()
+
+    if args.refresh:
+        print(f"Updated {refresh_exchange_rates(args.url)} currencies in {RATES_PATH}")
+    else:
+        print(f"{len(load_exchange_rates())} currencies in {RATES_PATH}")
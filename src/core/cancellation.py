@@ -0,0 +1,97 @@
+"""Cooperative cancellation of in-flight planning runs."""
+import asyncio
+import threading
+from typing import Any, Awaitable, Dict, Optional, Tuple
+
+# Cancel reason of a request whose shared (coalesced) execution was stopped
+SHARED_RUN_CANCELLED = "shared_run_cancelled"
+
+# Cancel reasons are free text from callers (UI, API, worker messages); metrics only see these labels
+_CANCEL_REASON_LABELS = (
+    (SHARED_RUN_CANCELLED, "shared"),
+    ("superseded", "superseded"),
+    ("page closed", "disconnected"),
+    ("request cancelled", "disconnected"),
+    ("disconnect", "disconnected"),
+    ("user", "user"),
+)
+
+
+def cancel_reason_label(reason: str) -> str:
+    """Map a cancel reason to one of user, superseded, disconnected, shared or other."""
+    reason = (reason or "").lower()
+    for marker, label in _CANCEL_REASON_LABELS:
+        if marker in reason:
+            return label
+    return "other"
+
+
+class RunCancelled(Exception):
+    """Raised by InFlightRuns.run when the run was cancelled through InFlightRuns.cancel."""
+
+    def __init__(self, run_id: str, reason: str, detail: str = ""):
+        super().__init__(f"Run {run_id} was cancelled ({detail or reason})")
+        self.run_id = run_id
+        self.reason = reason
+
+
+class InFlightRuns:
+    """
+    Registry of running plans keyed by run ID.
+
+    Each run executes in its own asyncio task, so cancel() tears down the whole
+    tree at once: the Parallel research branches, the revision loop, every pending
+    agent arun() and the HTTP requests they are awaiting. cancel() is thread-safe
+    and may be called from any thread or event loop (UI callbacks, an API handler).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tasks: Dict[str, Tuple[asyncio.AbstractEventLoop, asyncio.Task]] = {}
+        self._reasons: Dict[str, str] = {}
+
+    async def run(self, run_id: str, work: Awaitable[Any]) -> Any:
+        """Await work as a cancellable run. Raises RunCancelled if cancel(run_id) is called meanwhile."""
+        task = asyncio.ensure_future(work)
+        with self._lock:
+            self._tasks[run_id] = (asyncio.get_running_loop(), task)
+        try:
+            return await task
+        except asyncio.CancelledError:
+            with self._lock:
+                reason = self._reasons.pop(run_id, None)
+            if reason is None:
+                raise  # the caller itself was cancelled; let it propagate
+            raise RunCancelled(run_id, reason) from None
+        finally:
+            with self._lock:
+                if self._tasks.get(run_id, (None, None))[1] is task:
+                    del self._tasks[run_id]
+                    self._reasons.pop(run_id, None)
+
+    def cancel(self, run_id: str, reason: str = "cancelled by user") -> bool:
+        """Request cancellation of a run. Returns False if it is not running."""
+        with self._lock:
+            entry = self._tasks.get(run_id)
+            if entry is None or entry[1].done():
+                return False
+            self._reasons[run_id] = reason
+        loop, task = entry
+        loop.call_soon_threadsafe(task.cancel, reason)
+        return True
+
+    def is_running(self, run_id: str) -> bool:
+        with self._lock:
+            entry = self._tasks.get(run_id)
+        return entry is not None and not entry[1].done()
+
+
+_in_flight: Optional[InFlightRuns] = None
+
+
+def get_in_flight_runs() -> InFlightRuns:
+    """Return the process-wide registry of in-flight runs."""
+    global _in_flight
+    if _in_flight is None:
+        _in_flight = InFlightRuns()
+    return _in_flight
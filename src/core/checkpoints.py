@@ -0,0 +1,147 @@
+"""Durable SQLite checkpoint store for resuming workflow runs."""
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+from pydantic import BaseModel
+from core import schemas
+
+CHECKPOINT_DB_PATH = Path(os.getenv("CHECKPOINT_DB_PATH", ".checkpoints/checkpoints.db"))
+CHECKPOINT_TTL_HOURS = float(os.getenv("CHECKPOINT_TTL_HOURS", "72"))
+# How often a long-running process applies the retention windows of its local stores
+STORE_PURGE_INTERVAL_SECONDS = float(os.getenv("STORE_PURGE_INTERVAL_SECONDS", "3600"))
+
+
+@dataclass
+class Checkpoint:
+    """A completed step: its output content and the session state right after it ran."""
+    content: Any
+    session_state: Dict[str, Any]
+
+
+def encode_content(content: Any) -> str:
+    """Serialize step content, remembering which schema a structured output used."""
+    if isinstance(content, BaseModel):
+        return json.dumps({"schema": type(content).__name__, "data": content.model_dump()})
+    return json.dumps({"schema": None, "data": content}, default=str)
+
+
+def decode_content(payload: str) -> Any:
+    """Inverse of encode_content; structured outputs are re-validated into their schema."""
+    record = json.loads(payload)
+    schema = getattr(schemas, record["schema"], None) if record["schema"] else None
+    return schema.model_validate(record["data"]) if schema else record["data"]
+
+
+class CheckpointStore:
+    """
+    Step checkpoints keyed by (run_id, step_key), stored in a local SQLite file.
+
+    Writes are tiny and infrequent (one per workflow step), so a single
+    connection guarded by a lock is enough; WAL mode keeps readers unblocked.
+    """
+
+    def __init__(self, path: Path = CHECKPOINT_DB_PATH, ttl_hours: float = CHECKPOINT_TTL_HOURS):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_hours = ttl_hours
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                query TEXT NOT NULL,
+                status TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                run_id TEXT NOT NULL,
+                step_key TEXT NOT NULL,
+                content TEXT NOT NULL,
+                session_state TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (run_id, step_key)
+            );
+        """)
+        self.purge_expired(ttl_hours)
+
+    def start_run(self, run_id: str, query: str) -> bool:
+        """Register a run. Returns True when it already had checkpoints (i.e. this is a resume)."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO runs (run_id, query, status, updated_at) VALUES (?, ?, 'running', ?) "
+                "ON CONFLICT(run_id) DO UPDATE SET status = 'running', updated_at = excluded.updated_at",
+                (run_id, query, time.time()),
+            )
+            row = self._conn.execute("SELECT COUNT(*) FROM checkpoints WHERE run_id = ?", (run_id,)).fetchone()
+        return row[0] > 0
+
+    def finish_run(self, run_id: str, status: str) -> None:
+        """Record the final status of a run ('completed', 'failed' or 'cancelled')."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE runs SET status = ?, updated_at = ? WHERE run_id = ?", (status, time.time(), run_id)
+            )
+        if time.monotonic() - self._purged_at >= STORE_PURGE_INTERVAL_SECONDS:
+            self.purge_expired(self.ttl_hours)
+
+    def get_query(self, run_id: str) -> Optional[str]:
+        """Return the original query of a run, if known."""
+        with self._lock:
+            row = self._conn.execute("SELECT query FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return row[0] if row else None
+
+    def save(self, run_id: str, step_key: str, content: Any, session_state: Dict[str, Any]) -> None:
+        """Persist a completed step."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?)",
+                (run_id, step_key, encode_content(content), json.dumps(session_state, default=str), time.time()),
+            )
+
+    def load(self, run_id: str, step_key: str) -> Optional[Checkpoint]:
+        """Load a completed step, or None if it has not run yet."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, session_state FROM checkpoints WHERE run_id = ? AND step_key = ?",
+                (run_id, step_key),
+            ).fetchone()
+        if row is None:
+            return None
+        return Checkpoint(content=decode_content(row[0]), session_state=json.loads(row[1]))
+
+    def latest_output(self, step_key: str, query: str) -> Optional[Any]:
+        """Most recent checkpointed output of a step from any run with the same query (a warm cache)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT c.content FROM checkpoints c JOIN runs r ON r.run_id = c.run_id "
+                "WHERE c.step_key = ? AND lower(trim(r.query)) = lower(trim(?)) "
+                "ORDER BY c.created_at DESC LIMIT 1",
+                (step_key, query),
+            ).fetchone()
+        return decode_content(row[0]) if row else None
+
+    def purge_expired(self, ttl_hours: float) -> None:
+        """Delete runs (and their checkpoints) not touched within the retention window."""
+        cutoff = time.time() - ttl_hours * 3600
+        self._purged_at = time.monotonic()
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM checkpoints WHERE run_id IN (SELECT run_id FROM runs WHERE updated_at < ?)", (cutoff,)
+            )
+            self._conn.execute("DELETE FROM runs WHERE updated_at < ?", (cutoff,))
+
+
+_store: Optional[CheckpointStore] = None
+
+
+def get_checkpoint_store() -> CheckpointStore:
+    """Return the process-wide checkpoint store (opened lazily)."""
+    global _store
+    if _store is None:
+        _store = CheckpointStore()
+    return _store
@@ -0,0 +1,88 @@
+"""Coalescing of identical concurrent plan requests onto one workflow execution."""
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from core.cancellation import SHARED_RUN_CANCELLED, RunCancelled
+from core.metrics import Counter
+
+# PLAN_COALESCING=0 gives every request its own workflow execution
+PLAN_COALESCING_ENABLED = os.getenv("PLAN_COALESCING", "1").lower() in ("1", "true", "yes")
+
+plan_requests = Counter(
+    "travel_plan_requests_total",
+    "plan_trip requests that started a workflow execution (leader) or joined an identical one in flight (joined)",
+    labels=("role",),
+)
+
+
+@dataclass
+class _SharedRun:
+    task: asyncio.Task
+    owner_run_id: str
+    subscribers: int = 0
+
+
+class CoalescedRuns:
+    """
+    Identical plan requests in flight at the same time share one execution.
+
+    The first request for a key starts the work as its own task; later requests subscribe
+    to it. Every subscriber awaits the task through asyncio.shield, so cancelling one
+    subscriber's run (cancel_trip on its run_id, whether it started the work or not) only
+    detaches that subscriber. The work itself is cancelled when its last subscriber
+    leaves. Its result, or its error, reaches every subscriber still waiting.
+    """
+
+    def __init__(self):
+        # Tasks belong to one event loop, so requests coalesce per loop
+        self._runs: Dict[Tuple[int, str], _SharedRun] = {}
+
+    async def join(self, key: str, run_id: str, start: Callable[[], Awaitable[Any]],
+                   on_join: Optional[Callable[[str], None]] = None) -> Any:
+        """
+        The result of the execution in flight for key, or of start() when there is none.
+        on_join(owner_run_id) is called when the request subscribes to another run.
+        """
+        slot = (id(asyncio.get_running_loop()), key)
+        shared = self._runs.get(slot)
+        if shared is None or shared.task.done():
+            shared = self._runs[slot] = _SharedRun(task=asyncio.ensure_future(start()), owner_run_id=run_id)
+            shared.task.add_done_callback(lambda task, slot=slot: self._finished(slot, task))
+            plan_requests.inc("leader")
+        else:
+            plan_requests.inc("joined")
+            print(f"Run {run_id} joined identical run {shared.owner_run_id} already in flight")
+            if on_join is not None:
+                on_join(shared.owner_run_id)
+
+        shared.subscribers += 1
+        try:
+            return await asyncio.shield(shared.task)
+        except asyncio.CancelledError:
+            if shared.task.cancelled():  # the shared execution itself was stopped, not just this subscriber
+                raise RunCancelled(run_id, SHARED_RUN_CANCELLED,
+                                   f"shared run {shared.owner_run_id} was cancelled") from None
+            raise
+        finally:
+            shared.subscribers -= 1
+            if shared.subscribers == 0 and not shared.task.done():
+                shared.task.cancel("every subscriber left")
+
+    def _finished(self, slot: Tuple[int, str], task: asyncio.Task) -> None:
+        shared = self._runs.get(slot)
+        if shared is not None and shared.task is task:
+            del self._runs[slot]
+        if not task.cancelled():
+            task.exception()  # retrieved here, so an execution every subscriber left logs nothing
+
+
+_coalesced: Optional[CoalescedRuns] = None
+
+
+def get_coalesced_runs() -> CoalescedRuns:
+    """Return the process-wide registry of shared plan executions."""
+    global _coalesced
+    if _coalesced is None:
+        _coalesced = CoalescedRuns()
+    return _coalesced
@@ -2,6 +2,7 @@
 from dotenv import load_dotenv
 from langfuse import get_client
 import openlit
+from core.trace_spool import install_trace_spool
 
 
 # Load environment variables
@@ -10,6 +11,9 @@ load_dotenv()
 # Initialize Langfuse client
 langfuse = get_client()
 
+# Spool exported spans to local disk and upload them in the background (TRACE_SPOOL=0 disables)
+install_trace_spool(langfuse)
+
 # Verify connection
 if langfuse.auth_check():
     print("Langfuse client is authenticated and ready!")
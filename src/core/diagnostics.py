@@ -0,0 +1,203 @@
+"""Opt-in event-loop lag monitor and blocking-call detector."""
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+import traceback
+from collections import Counter as Tally, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from core.metrics import Counter, Histogram
+
+# Enable with LOOP_MONITOR=1. A callback that holds the loop longer than the threshold is reported.
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR", "0").lower() in ("1", "true", "yes")
+LOOP_MONITOR_THRESHOLD_MS = float(os.getenv("LOOP_MONITOR_THRESHOLD_MS", "100"))
+LOOP_MONITOR_INTERVAL_MS = float(os.getenv("LOOP_MONITOR_INTERVAL_MS", "20"))
+LOOP_MONITOR_REPORT_SECONDS = float(os.getenv("LOOP_MONITOR_REPORT_SECONDS", "60"))
+# Optional folded-stack profile of blocked time (flamegraph.pl / speedscope compatible)
+LOOP_MONITOR_PROFILE_PATH = os.getenv("LOOP_MONITOR_PROFILE_PATH", "")
+
+# What the current task is doing, e.g. "Manager Review#0 > critique-agent"
+_activity: ContextVar[str] = ContextVar("loop_monitor_activity", default="")
+
+loop_lag = Histogram(
+    "travel_event_loop_lag_seconds",
+    "Scheduling delay of the event loop (only sampled when LOOP_MONITOR=1)",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+loop_blocks = Counter(
+    "travel_event_loop_blocks_total",
+    "Callbacks that blocked the event loop longer than the threshold, by workflow activity",
+    labels=("activity",),
+)
+
+
+@contextmanager
+def activity(label: str) -> Iterator[None]:
+    """Label what the current task is doing, so blocking calls can be attributed to it."""
+    parent = _activity.get()
+    token = _activity.set(f"{parent} > {label}" if parent else label)
+    try:
+        yield
+    finally:
+        _activity.reset(token)
+
+
+@dataclass
+class BlockEvent:
+    """One episode of the event loop being blocked."""
+    activity: str
+    stack: List[traceback.FrameSummary]
+    started_at: float
+    duration: float = 0.0
+
+
+@dataclass
+class _ReportWindow:
+    lags: deque = field(default_factory=lambda: deque(maxlen=10_000))
+    events: List[BlockEvent] = field(default_factory=list)
+
+
+class LoopMonitor:
+    """
+    Samples scheduling lag with a coroutine on the monitored loop, and watches its
+    heartbeat from a separate thread. When the heartbeat stalls past the threshold,
+    the loop thread's stack is captured (and re-sampled while it stays blocked)
+    together with the activity of the task that is running.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, threshold_ms: float = LOOP_MONITOR_THRESHOLD_MS,
+                 interval_ms: float = LOOP_MONITOR_INTERVAL_MS, report_seconds: float = LOOP_MONITOR_REPORT_SECONDS,
+                 profile_path: str = LOOP_MONITOR_PROFILE_PATH):
+        self.loop = loop
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.report_seconds = report_seconds
+        self.profile_path = Path(profile_path) if profile_path else None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat = time.monotonic()
+        self._window = _ReportWindow()
+        self._folded: Tally = Tally()  # folded stack -> milliseconds blocked
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """Start sampling; must be called from the monitored loop's thread."""
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self.loop.create_task(self._sample_lag(), name="loop-monitor")
+        threading.Thread(target=self._watch, name="loop-monitor-watchdog", daemon=True).start()
+        print(f"Event-loop monitor on: threshold {self.threshold * 1000:g} ms, report every {self.report_seconds:g}s")
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    async def _sample_lag(self) -> None:
+        while not self._stopped.is_set():
+            start = self.loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(self.loop.time() - start - self.interval, 0.0)
+            self._heartbeat = time.monotonic()
+            loop_lag.observe(lag)
+            with self._lock:
+                self._window.lags.append(lag)
+
+    def _watch(self) -> None:
+        event: Optional[BlockEvent] = None
+        next_report = time.monotonic() + self.report_seconds
+        tick = min(self.interval, self.threshold / 4)
+
+        while not self._stopped.wait(tick):
+            now = time.monotonic()
+            blocked_for = now - self._heartbeat - self.interval
+            if blocked_for > self.threshold:
+                stack, label = self._capture()
+                if event is None:
+                    event = BlockEvent(activity=label, stack=stack, started_at=now - blocked_for)
+                    sampled = blocked_for  # attribute the time before detection to the first sample
+                else:
+                    sampled = blocked_for - event.duration
+                self._folded[self._fold(label, stack)] += sampled * 1000
+                event.duration = blocked_for
+            elif event is not None:
+                self._record(event)
+                event = None
+
+            if self.report_seconds and now >= next_report:
+                self.report()
+                next_report = now + self.report_seconds
+
+    def _capture(self) -> Tuple[List[traceback.FrameSummary], str]:
+        """Stack of the loop thread and the activity of its running task."""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = traceback.extract_stack(frame) if frame is not None else []
+        task = asyncio.current_task(self.loop)
+        label = task.get_context().get(_activity, "") if task is not None else ""
+        return stack, label or "(outside workflow steps)"
+
+    @staticmethod
+    def _fold(label: str, stack: List[traceback.FrameSummary]) -> str:
+        frames = [f"{Path(f.filename).stem}:{f.name}" for f in stack]
+        return ";".join([f"[{label}]"] + frames)
+
+    def _record(self, event: BlockEvent) -> None:
+        loop_blocks.inc(event.activity)
+        with self._lock:
+            self._window.events.append(event)
+
+    def report(self) -> None:
+        """Print lag percentiles and the worst blocking call sites since the last report."""
+        with self._lock:
+            window, self._window = self._window, _ReportWindow()
+
+        lags = sorted(window.lags)
+        if lags:
+            p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))]
+            print(f"[loop-monitor] lag p50 {statistics.median(lags) * 1000:.1f} ms, "
+                  f"p99 {p99 * 1000:.1f} ms, max {lags[-1] * 1000:.1f} ms; "
+                  f"{len(window.events)} blocking call(s) over {self.threshold * 1000:g} ms")
+
+        by_site: Dict[Tuple[str, str], List[BlockEvent]] = {}
+        for event in window.events:
+            by_site.setdefault((event.activity, _call_site(event.stack)), []).append(event)
+        worst = sorted(by_site.items(), key=lambda item: -sum(e.duration for e in item[1]))
+        for (label, site), events in worst[:5]:
+            print(f"   {sum(e.duration for e in events) * 1000:8.0f} ms total, {len(events)}x, "
+                  f"max {max(e.duration for e in events) * 1000:.0f} ms  [{label}]  {site}")
+
+        if self.profile_path and self._folded:
+            self.write_profile()
+
+    def write_profile(self) -> None:
+        """Write the accumulated blocked time as folded stacks (milliseconds per stack)."""
+        self.profile_path.parent.mkdir(parents=True, exist_ok=True)
+        lines = [f"{stack} {round(ms)}" for stack, ms in self._folded.most_common()]
+        self.profile_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def _call_site(stack: List[traceback.FrameSummary]) -> str:
+    """The innermost frame in project code (falling back to the innermost frame)."""
+    for frame in reversed(stack):
+        if "site-packages" not in frame.filename and "/lib/python" not in frame.filename:
+            return f"{Path(frame.filename).name}:{frame.lineno} in {frame.name}"
+    return f"{Path(stack[-1].filename).name}:{stack[-1].lineno} in {stack[-1].name}" if stack else "(unknown)"
+
+
+_monitors: Dict[int, LoopMonitor] = {}
+
+
+def ensure_loop_monitor() -> Optional[LoopMonitor]:
+    """Start the monitor on the running loop once, when LOOP_MONITOR is enabled."""
+    if not LOOP_MONITOR_ENABLED:
+        return None
+    loop = asyncio.get_running_loop()
+    monitor = _monitors.get(id(loop))
+    if monitor is None:
+        monitor = _monitors[id(loop)] = LoopMonitor(loop)
+        monitor.start()
+    return monitor
@@ -0,0 +1,255 @@
+"""Offline POI proximity index and day clustering for itinerary planning."""
+import difflib
+import json
+import math
+import os
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Bundled POI dataset; point POI_DATASET_PATH at your own JSON file to import a larger one.
+# Expected format: {"pois": [{"name", "city", "lat", "lon", "aliases": [...]}, ...]}
+POI_DATASET_PATH = Path(os.getenv("POI_DATASET_PATH", Path(__file__).parent / "data" / "pois.json"))
+
+EARTH_RADIUS_KM = 6371.0
+
+# Words that carry no identity when matching attraction names
+_STOPWORDS = {"the", "a", "an", "of", "de", "du", "la", "le", "visit", "tour", "explore", "at", "to"}
+
+
+@dataclass(frozen=True)
+class Poi:
+    """A point of interest with coordinates."""
+    name: str
+    city: str
+    lat: float
+    lon: float
+    aliases: Tuple[str, ...] = ()
+
+    @property
+    def xyz(self) -> Tuple[float, float, float]:
+        """Unit-sphere cartesian coordinates (chord distance is monotonic in great-circle distance)."""
+        lat, lon = math.radians(self.lat), math.radians(self.lon)
+        return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+
+
+@dataclass
+class DayClusters:
+    """Attractions grouped by day, plus any names that could not be located."""
+    days: List[List[Poi]] = field(default_factory=list)
+    unlocated: List[str] = field(default_factory=list)
+
+
+def _normalize(name: str) -> str:
+    """Lowercase, strip accents and punctuation, drop filler words."""
+    text = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii").lower()
+    tokens = re.sub(r"[^a-z0-9 ]+", " ", text).split()
+    return " ".join(t for t in tokens if t not in _STOPWORDS)
+
+
+def _chord_km(a: Tuple[float, float, float], b: Tuple[float, float, float]) -> float:
+    """Great-circle distance in km between two unit-sphere points."""
+    chord = math.dist(a, b)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+def haversine_km(a: Poi, b: Poi) -> float:
+    """Great-circle distance in km between two POIs."""
+    return _chord_km(a.xyz, b.xyz)
+
+
+class PoiIndex:
+    """
+    KD-tree over unit-sphere coordinates for fast nearest-neighbour lookups,
+    plus a name index for matching free-text attraction names to POIs.
+    """
+
+    def __init__(self, pois: Sequence[Poi]):
+        self.pois = list(pois)
+        self._points = [p.xyz for p in self.pois]
+        self._tree = self._build(list(range(len(self.pois))), depth=0)
+
+        self._names: Dict[str, int] = {}
+        for i, poi in enumerate(self.pois):
+            for name in (poi.name, *poi.aliases):
+                self._names.setdefault(_normalize(name), i)
+
+    def _build(self, indices: List[int], depth: int):
+        """Build a KD-tree node as (index, axis, left, right)."""
+        if not indices:
+            return None
+        axis = depth % 3
+        indices.sort(key=lambda i: self._points[i][axis])
+        mid = len(indices) // 2
+        return (
+            indices[mid],
+            axis,
+            self._build(indices[:mid], depth + 1),
+            self._build(indices[mid + 1:], depth + 1),
+        )
+
+    def nearest(self, lat: float, lon: float, k: int = 1) -> List[Tuple[Poi, float]]:
+        """Return the k nearest POIs to a coordinate as (poi, distance_km), closest first."""
+        target = Poi("", "", lat, lon).xyz
+        best: List[Tuple[float, int]] = []  # (chord distance, index), kept sorted
+
+        def visit(node):
+            if node is None:
+                return
+            index, axis, left, right = node
+            distance = math.dist(target, self._points[index])
+            if len(best) < k or distance < best[-1][0]:
+                best.append((distance, index))
+                best.sort()
+                del best[k:]
+
+            delta = target[axis] - self._points[index][axis]
+            near, far = (left, right) if delta < 0 else (right, left)
+            visit(near)
+            if len(best) < k or abs(delta) < best[-1][0]:
+                visit(far)
+
+        visit(self._tree)
+        return [(self.pois[i], _chord_km(target, self._points[i])) for _, i in best]
+
+    def match(self, name: str, cities: Optional[Sequence[str]] = None) -> Optional[Poi]:
+        """
+        Match a free-text attraction name to a POI (exact alias, containment, then fuzzy).
+        When cities are given, only POIs in those cities are considered.
+        """
+        query = _normalize(name)
+        if not query:
+            return None
+
+        allowed = {c.lower() for c in cities} if cities else None
+        candidates = {
+            key: i for key, i in self._names.items()
+            if allowed is None or self.pois[i].city.lower() in allowed
+        }
+
+        if query in candidates:
+            return self.pois[candidates[query]]
+
+        # "Early morning hike at Fushimi Inari Shrine" contains the alias "fushimi inari shrine"
+        contained = [key for key in candidates if len(key) >= 4 and re.search(rf"\b{re.escape(key)}\b", query)]
+        if contained:
+            return self.pois[candidates[max(contained, key=len)]]
+
+        close = difflib.get_close_matches(query, list(candidates), n=1, cutoff=0.82)
+        return self.pois[candidates[close[0]]] if close else None
+
+    def cities_in(self, destination: str) -> List[str]:
+        """Cities from the dataset that are mentioned in a destination string."""
+        text = _normalize(destination)
+        return sorted({p.city for p in self.pois if re.search(rf"\b{re.escape(_normalize(p.city))}\b", text)})
+
+
+@lru_cache(maxsize=1)
+def load_poi_index() -> PoiIndex:
+    """Load the POI dataset and build the index (cached for the life of the process)."""
+    with open(POI_DATASET_PATH, encoding="utf-8") as f:
+        records = json.load(f)["pois"]
+    return PoiIndex([
+        Poi(r["name"], r["city"], float(r["lat"]), float(r["lon"]), tuple(r.get("aliases", ())))
+        for r in records
+    ])
+
+
+def _order_by_route(pois: List[Poi]) -> List[Poi]:
+    """Order a day's POIs with a greedy nearest-neighbour walk, starting from the westernmost."""
+    if not pois:
+        return []
+    remaining = sorted(pois, key=lambda p: p.lon)
+    route = [remaining.pop(0)]
+    while remaining:
+        nxt = min(remaining, key=lambda p: haversine_km(route[-1], p))
+        remaining.remove(nxt)
+        route.append(nxt)
+    return route
+
+
+def cluster_by_day(pois: Sequence[Poi], days: int, max_iterations: int = 10) -> List[List[Poi]]:
+    """
+    Split POIs into `days` geographically compact groups of balanced size.
+
+    Capacity-constrained k-means on the unit sphere: farthest-point seeding, then
+    greedy nearest-centre assignment where each day holds at most ceil(n / days) POIs.
+    Days beyond the number of POIs are returned empty (free / rest days).
+    """
+    unique = list(dict.fromkeys(pois))
+    if days <= 0:
+        return []
+    if not unique:
+        return [[] for _ in range(days)]
+
+    k = min(days, len(unique))
+    capacity = math.ceil(len(unique) / k)
+    points = [p.xyz for p in unique]
+
+    # Farthest-point seeding is deterministic and spreads the initial centres
+    centres = [points[0]]
+    while len(centres) < k:
+        centres.append(max(points, key=lambda pt: min(math.dist(pt, c) for c in centres)))
+
+    assignment: List[int] = []
+    for _ in range(max_iterations):
+        pairs = sorted(
+            (math.dist(pt, c), i, j) for i, pt in enumerate(points) for j, c in enumerate(centres)
+        )
+        new_assignment = [-1] * len(points)
+        load = [0] * k
+        for _, i, j in pairs:
+            if new_assignment[i] == -1 and load[j] < capacity:
+                new_assignment[i] = j
+                load[j] += 1
+
+        if new_assignment == assignment:
+            break
+        assignment = new_assignment
+
+        for j in range(k):
+            members = [points[i] for i in range(len(points)) if assignment[i] == j]
+            if members:
+                centres[j] = tuple(sum(axis) / len(members) for axis in zip(*members))
+
+    clusters = [_order_by_route([unique[i] for i in range(len(unique)) if assignment[i] == j]) for j in range(k)]
+    # Capacity limits can starve a centre; those days become free days like any surplus
+    clusters = [cluster for cluster in clusters if cluster]
+    # Deterministic west-to-east day order
+    clusters.sort(key=lambda cluster: cluster[0].lon)
+    return clusters + [[] for _ in range(days - len(clusters))]
+
+
+def build_day_clusters(names: Sequence[str], destination: str, days: int) -> DayClusters:
+    """Match attraction names to POIs near the destination and cluster them by day."""
+    index = load_poi_index()
+    cities = index.cities_in(destination) or None
+
+    located, unlocated = [], []
+    for name in names:
+        poi = index.match(name, cities)
+        if poi is None:
+            unlocated.append(name)
+        elif poi not in located:
+            located.append(poi)
+
+    return DayClusters(days=cluster_by_day(located, days), unlocated=unlocated)
+
+
+def format_day_clusters(clusters: DayClusters) -> str:
+    """Render day clusters as a compact planner-context block."""
+    lines = []
+    for day_number, pois in enumerate(clusters.days, start=1):
+        if pois:
+            stops = " -> ".join(p.name for p in pois)
+            hops = [haversine_km(a, b) for a, b in zip(pois, pois[1:])]
+            span = f" (longest hop ~{max(hops):.1f} km)" if hops else ""
+            lines.append(f"- Day {day_number}: {stops}{span}")
+        else:
+            lines.append(f"- Day {day_number}: flexible (arrival, rest, or unclustered activities)")
+    if clusters.unlocated:
+        lines.append(f"- Not in the POI index (place them by their area): {', '.join(clusters.unlocated)}")
+    return "\n".join(lines)
@@ -0,0 +1,158 @@
+"""Opt-in tracemalloc memory report: net allocations per workflow step and the fastest-growing allocation sites."""
+import os
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+from core.metrics import Gauge
+
+# Enable with MEMORY_REPORT=1 (tracemalloc slows allocation-heavy code, so it is off by default)
+MEMORY_REPORT_ENABLED = os.getenv("MEMORY_REPORT", "0").lower() in ("1", "true", "yes")
+MEMORY_REPORT_SECONDS = float(os.getenv("MEMORY_REPORT_SECONDS", "300"))
+# Frames kept per allocation (more frames = better attribution, more overhead) and sites listed per report
+MEMORY_REPORT_FRAMES = int(os.getenv("MEMORY_REPORT_FRAMES", "10"))
+MEMORY_REPORT_TOP = int(os.getenv("MEMORY_REPORT_TOP", "10"))
+
+process_memory = Gauge(
+    "travel_process_memory_bytes",
+    "Resident set size, and memory traced by tracemalloc, at the last memory report (MEMORY_REPORT=1)",
+    labels=("kind",),
+)
+
+
+def resident_bytes() -> Optional[int]:
+    """Current resident set size of this process (None where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+@dataclass
+class _StepMemory:
+    calls: int = 0
+    net_bytes: int = 0
+    max_net_bytes: int = 0
+
+
+class MemoryMonitor:
+    """
+    Traces allocations with tracemalloc. Each workflow step records how much traced memory
+    grew while it ran (process-wide, so concurrent runs blur the attribution; the
+    allocation-site diff is the precise view). Every report prints RSS, the per-step
+    table and the allocation sites that grew most since the previous report.
+    """
+
+    def __init__(self, frames: int = MEMORY_REPORT_FRAMES, report_seconds: float = MEMORY_REPORT_SECONDS,
+                 top: int = MEMORY_REPORT_TOP):
+        self.frames = frames
+        self.report_seconds = report_seconds
+        self.top = top
+        self._steps: Dict[str, _StepMemory] = {}
+        self._lock = threading.Lock()
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self._baseline = self._snapshot()
+        if self.report_seconds:
+            threading.Thread(target=self._run, name="memory-report", daemon=True).start()
+        print(f"Memory report on: {self.frames} frame(s) per allocation, report every {self.report_seconds:g}s")
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.report_seconds):
+            self.report()
+
+    @contextmanager
+    def step(self, label: str) -> Iterator[None]:
+        """Record the traced-memory growth of the enclosed step."""
+        before = tracemalloc.get_traced_memory()[0]
+        try:
+            yield
+        finally:
+            net = tracemalloc.get_traced_memory()[0] - before
+            with self._lock:
+                stats = self._steps.setdefault(label, _StepMemory())
+                stats.calls += 1
+                stats.net_bytes += net
+                stats.max_net_bytes = max(stats.max_net_bytes, net)
+
+    @staticmethod
+    def _snapshot() -> tracemalloc.Snapshot:
+        # The tracer's own bookkeeping would otherwise top every report
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+
+    def report(self) -> List[str]:
+        """Print (and return) memory usage, per-step growth and the top growing allocation sites."""
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        rss = resident_bytes()
+        process_memory.inc("traced", amount=current - process_memory.values().get(("traced",), 0.0))
+        if rss is not None:
+            process_memory.inc("rss", amount=rss - process_memory.values().get(("rss",), 0.0))
+
+        lines = [f"[memory] rss {_mb(rss) if rss is not None else 'n/a'}, traced {_mb(current)} "
+                 f"(peak {_mb(peak)} since last report)"]
+        with self._lock:
+            steps = sorted(self._steps.items(), key=lambda item: -item[1].net_bytes)
+        for label, stats in steps[:self.top]:
+            lines.append(f"   step {label}: {stats.calls}x, net {_mb(stats.net_bytes)} "
+                         f"(mean {_kb(stats.net_bytes / stats.calls)}, max {_kb(stats.max_net_bytes)})")
+
+        snapshot = self._snapshot()
+        if self._baseline is not None:
+            for diff in snapshot.compare_to(self._baseline, "lineno")[:self.top]:
+                if diff.size_diff <= 0:
+                    break
+                frame = diff.traceback[0]
+                lines.append(f"   +{_kb(diff.size_diff)} in {diff.count_diff:+d} block(s)  "
+                             f"{frame.filename}:{frame.lineno}")
+        self._baseline = snapshot
+
+        for line in lines:
+            print(line)
+        return lines
+
+
+def _mb(size: float) -> str:
+    return f"{size / 2**20:.1f} MB"
+
+
+def _kb(size: float) -> str:
+    return f"{size / 1024:.1f} KB"
+
+
+_monitor: Optional[MemoryMonitor] = None
+_monitor_lock = threading.Lock()
+
+
+def ensure_memory_monitor() -> Optional[MemoryMonitor]:
+    """Start the process-wide memory monitor once, when MEMORY_REPORT is enabled."""
+    global _monitor
+    if not MEMORY_REPORT_ENABLED:
+        return None
+    with _monitor_lock:
+        if _monitor is None:
+            _monitor = MemoryMonitor()
+            _monitor.start()
+    return _monitor
+
+
+@contextmanager
+def step_memory(label: str) -> Iterator[None]:
+    """Attribute the enclosed step's memory growth to label (no-op unless the monitor is running)."""
+    if _monitor is None:
+        yield
+        return
+    with _monitor.step(label):
+        yield
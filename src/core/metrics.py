@@ -0,0 +1,309 @@
+"""Lightweight in-process metrics for the travel planning pipeline, with an OpenMetrics endpoint."""
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Port of the Prometheus/OpenMetrics scrape endpoint started next to the Gradio app (0 disables it)
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Latency buckets (seconds) spanning a fast local step up to a slow LLM call
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 45.0, 60.0, 90.0, 120.0, 180.0, 300.0)
+
+_registry: List["_Metric"] = []
+
+
+class _Metric:
+    """
+    Base for metrics whose hot path is lock-free: each thread records into its own
+    shard (a plain dict), and shards are only merged when the metric is read.
+    """
+    kind = "unknown"
+
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._shards_lock = threading.Lock()
+        # Latest values pushed by each worker process (see absorb_metrics), merged like shards
+        self._remote: Dict[str, dict] = {}
+        _registry.append(self)
+
+    def _new_value(self):
+        raise NotImplementedError
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = defaultdict(self._new_value)
+            with self._shards_lock:  # once per thread
+                self._shards.append(values)
+            return values
+
+    def _snapshot_shards(self) -> List[dict]:
+        with self._shards_lock:
+            shards = list(self._shards)
+            remote = list(self._remote.values())
+        # dict() copies in one step under the GIL, so a concurrent writer cannot tear it
+        return [dict(shard) for shard in shards] + remote
+
+
+class Counter(_Metric):
+    """A monotonically increasing counter with optional label values."""
+    kind = "counter"
+
+    def _new_value(self):
+        return 0.0
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        """Increment the counter for the given label values."""
+        self._shard()[tuple(label_values)] += amount
+
+    def values(self) -> Dict[Tuple[str, ...], float]:
+        """Snapshot of the current values by label values."""
+        merged: Dict[Tuple[str, ...], float] = defaultdict(float)
+        for shard in self._snapshot_shards():
+            for key, value in shard.items():
+                merged[key] += value
+        return dict(merged)
+
+
+class Gauge(Counter):
+    """A value that goes up and down (e.g. runs in flight)."""
+    kind = "gauge"
+
+    def dec(self, *label_values: str, amount: float = 1.0) -> None:
+        """Decrement the gauge for the given label values."""
+        self._shard()[tuple(label_values)] -= amount
+
+    @contextmanager
+    def track(self, *label_values: str) -> Iterator[None]:
+        """Increment for the duration of the block."""
+        self.inc(*label_values)
+        try:
+            yield
+        finally:
+            self.dec(*label_values)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in fixed buckets (cumulative on export)."""
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, description, labels)
+
+    def _new_value(self):
+        # Per-bucket counts (last slot is +Inf), then sum and count
+        return [0] * (len(self.buckets) + 1) + [0.0, 0]
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """Record one observation for the given label values."""
+        slot = self._shard()[tuple(label_values)]
+        slot[bisect_left(self.buckets, value)] += 1
+        slot[-2] += value
+        slot[-1] += 1
+
+    @contextmanager
+    def time(self, *label_values: str) -> Iterator[None]:
+        """Observe the wall-clock duration of the block, in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def values(self) -> Dict[Tuple[str, ...], List[float]]:
+        """Snapshot of [bucket counts..., +Inf count, sum, count] by label values."""
+        merged: Dict[Tuple[str, ...], List[float]] = {}
+        for shard in self._snapshot_shards():
+            for key, slot in shard.items():
+                total = merged.setdefault(key, self._new_value())
+                for i, value in enumerate(list(slot)):
+                    total[i] += value
+        return merged
+
+
+def snapshot_metrics() -> Dict[str, dict]:
+    """Current values of every registered metric by name (what a worker process pushes to its front)."""
+    return {metric.name: metric.values() for metric in _registry}
+
+
+def absorb_metrics(source: str, snapshot: Dict[str, dict]) -> None:
+    """Merge a worker's snapshot into this process's metrics, replacing that worker's previous one."""
+    for metric in _registry:
+        if metric.name in snapshot:
+            with metric._shards_lock:
+                metric._remote[source] = snapshot[metric.name]
+
+
+def retire_metrics(source: str) -> None:
+    """Forget an exited worker's gauges; its counters and histograms keep counting toward the totals."""
+    for metric in _registry:
+        if isinstance(metric, Gauge):
+            with metric._shards_lock:
+                metric._remote.pop(source, None)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(names: Tuple[str, ...], values: Tuple[str, ...], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def render_openmetrics() -> str:
+    """Render every registered metric in the OpenMetrics text format."""
+    lines = []
+    for metric in _registry:
+        family = metric.name[:-len("_total")] if metric.kind == "counter" and metric.name.endswith("_total") \
+            else metric.name
+        lines.append(f"# TYPE {family} {metric.kind}")
+        lines.append(f"# HELP {family} {_escape(metric.description)}")
+
+        if isinstance(metric, Histogram):
+            for key, slot in sorted(metric.values().items()):
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (float("inf"),), slot):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else _format_number(bound)
+                    lines.append(f"{family}_bucket{_label_text(metric.labels, key, ('le', le))} {int(cumulative)}")
+                lines.append(f"{family}_sum{_label_text(metric.labels, key)} {_format_number(slot[-2])}")
+                lines.append(f"{family}_count{_label_text(metric.labels, key)} {int(slot[-1])}")
+        else:
+            suffix = "_total" if metric.kind == "counter" else ""
+            values = metric.values() or ({(): 0.0} if not metric.labels else {})
+            for key, value in sorted(values.items()):
+                lines.append(f"{family}{suffix}{_label_text(metric.labels, key)} {_format_number(value)}")
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render_openmetrics().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", OPENMETRICS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # keep scrapes out of the console
+        pass
+
+
+def start_metrics_server(port: int = METRICS_PORT, host: str = "0.0.0.0") -> Optional[ThreadingHTTPServer]:
+    """Serve /metrics on a daemon thread. Returns None when disabled (port 0)."""
+    if not port:
+        return None
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    print(f"OpenMetrics endpoint: http://{host}:{port}/metrics")
+    return server
+
+
+# End-to-end runs
+plan_duration = Histogram(
+    "travel_plan_duration_seconds",
+    "plan_trip latency by outcome",
+    labels=("outcome",),
+)
+runs_in_flight = Gauge(
+    "travel_runs_in_flight",
+    "Planning runs currently executing",
+)
+
+# Workflow steps (research agents, each planner iteration, each critique, final report)
+step_duration = Histogram(
+    "travel_step_duration_seconds",
+    "Workflow step latency (iteration is the revision round for loop steps, else empty)",
+    labels=("step", "iteration"),
+)
+step_errors = Counter(
+    "travel_step_errors_total",
+    "Workflow steps that raised an exception",
+    labels=("step",),
+)
+
+# Manager review loop
+reviews = Counter(
+    "travel_reviews_total",
+    "Manager reviews by decision (approval rate = approved / all)",
+    labels=("decision",),
+)
+revision_iterations = Histogram(
+    "travel_revision_iterations",
+    "Review rounds needed per plan",
+    buckets=(1, 2, 3, 4, 5),
+)
+review_scores = Histogram(
+    "travel_review_score",
+    "Manager quality score (0-10) of each draft by review round",
+    labels=("round",),
+    buckets=(2, 4, 5, 6, 7, 8, 9, 10),
+)
+
+# External calls
+llm_calls = Counter(
+    "travel_llm_calls_total",
+    "Agent runs (LLM calls) by agent and outcome",
+    labels=("agent", "outcome"),
+)
+llm_tokens = Counter(
+    "travel_llm_tokens_total",
+    "LLM tokens by agent and kind (input, cached = input tokens served from the provider's prompt cache, output)",
+    labels=("agent", "kind"),
+)
+tool_calls = Counter(
+    "travel_tool_calls_total",
+    "Tool calls requested by agents, by agent, tool and outcome (ok, error, or refused: call_limit, round_limit)",
+    labels=("agent", "tool", "outcome"),
+)
+tool_calls_per_run = Histogram(
+    "travel_tool_calls_per_run",
+    "Tool calls requested per agent run (including refused calls)",
+    labels=("agent",),
+    buckets=(0, 1, 2, 3, 4, 6, 8, 12),
+)
+search_calls = Counter(
+    "travel_search_calls_total",
+    "Tavily web searches by outcome",
+    labels=("outcome",),
+)
+
+# Research phase degradation
+research_timeouts = Counter(
+    "travel_research_timeouts_total",
+    "Research agent runs that missed their deadline",
+    labels=("agent", "fallback"),
+)
+
+
+# Runs stopped before completion (UI clear, superseded query, page closed, API call)
+runs_cancelled = Counter(
+    "travel_runs_cancelled_total",
+    "Planning runs cancelled while in flight, by reason (user, superseded, disconnected, shared, other)",
+    labels=("reason",),
+)
@@ -0,0 +1,156 @@
+"""Template-based markdown renderer for the final travel report."""
+import re
+from typing import Dict, List, Optional, Tuple, get_args
+from core.budget import compute_budget, format_amount, render_budget_table, table_cell
+from core.schemas import (
+    AccommodationOptions,
+    ActivitiesInfo,
+    DailyItinerary,
+    DestinationInfo,
+    ReportSection,
+)
+
+# Second-level sections of the documented report format, in order
+REPORT_SECTIONS: List[str] = list(get_args(ReportSection))
+
+# Sections rendered from the planner's structured plan, and the DailyItinerary field behind each.
+# The other sections come from the research outputs, which a revision does not change.
+PLAN_SECTION_FIELDS: Dict[str, str] = {
+    "Executive Summary": "executive_summary",
+    "Day-by-Day Itinerary": "days",
+    "Transportation Guide": "transportation_guide",
+    "Budget Breakdown": "budget_items",
+    "Additional Notes and Travel Tips": "additional_notes",
+}
+
+_SECTION_HEADING_PATTERN = re.compile(r"^##\s+(.+?)\s*$", re.MULTILINE)
+
+
+def render_itinerary_table(plan: DailyItinerary) -> str:
+    """Render the three-column Day-by-Day Itinerary table."""
+    rows = [
+        "| Day | Activities & Timing | Notes |",
+        "|-----|---------------------|-------|",
+    ]
+    for day in sorted(plan.days, key=lambda d: d.day_number):
+        rows.append(f"| **Day {day.day_number}: {table_cell(day.theme)}** | | |")
+        for slot in day.slots:
+            rows.append(
+                f"| {slot.start_time} – {slot.end_time} | {table_cell(slot.activity)} | {table_cell(slot.notes)} |"
+            )
+    return "\n".join(rows)
+
+
+def _render_destination(destination: Optional[DestinationInfo]) -> List[str]:
+    if destination is None:
+        return ["_Destination research was not available for this plan._"]
+    lines = ["### Top Attractions"]
+    lines += [f"- **{a.name}** ({a.area}) — {a.description}" for a in destination.top_attractions]
+    lines += [
+        "",
+        f"**Best time to visit:** {destination.best_time_to_visit}",
+        "",
+        f"**Weather:** {destination.weather_info}",
+        "",
+        f"**Local tips:** {destination.local_tips}",
+    ]
+    return lines
+
+
+def _render_accommodation(accommodation: Optional[AccommodationOptions]) -> List[str]:
+    if accommodation is None:
+        return ["_Hotel research was not available for this plan._"]
+    lines = [
+        "| Hotel | Area | Price Band | Nightly Rate | Highlights |",
+        "|-------|------|------------|--------------|------------|",
+    ]
+    for hotel in accommodation.hotel_recommendations:
+        rate = f"{format_amount(hotel.nightly_rate_min)}–{format_amount(hotel.nightly_rate_max)} {hotel.currency}"
+        lines.append(
+            f"| {table_cell(hotel.name)} | {table_cell(hotel.area)} | {hotel.price_band} | {rate} | {table_cell(hotel.highlights)} |"
+        )
+    lines += [
+        "",
+        f"**Typical budget:** {accommodation.budget_range}",
+        "",
+        f"**Booking tips:** {accommodation.booking_tips}",
+    ]
+    return lines
+
+
+def _render_activities(activities: Optional[ActivitiesInfo]) -> List[str]:
+    if activities is None:
+        return ["_Activities research was not available for this plan._"]
+    lines = []
+    for activity in activities.recommended_activities:
+        cost = "free" if activity.estimated_cost == 0 else f"~{format_amount(activity.estimated_cost)} {activity.currency}"
+        lines.append(f"- **{activity.name}** ({activity.area}, {cost}) — {activity.description}")
+    lines += [
+        "",
+        f"**Local experiences:** {activities.local_experiences}",
+        "",
+        f"**Typical costs:** {activities.estimated_costs}",
+    ]
+    return lines
+
+
+def render_travel_report(
+    plan: DailyItinerary,
+    destination: Optional[DestinationInfo] = None,
+    accommodation: Optional[AccommodationOptions] = None,
+    activities: Optional[ActivitiesInfo] = None,
+) -> str:
+    """
+    Assemble the comprehensive markdown travel report from structured outputs.
+
+    Produces the same section layout the itinerary planner used to generate
+    token by token, so the only LLM output needed is the structured plan itself.
+    Budget subtotals, totals and the USD estimate come from core.budget.
+    Missing research inputs are rendered as a short placeholder instead of failing.
+    """
+    transportation = plan.transportation_guide
+    if not transportation and activities is not None:
+        transportation = activities.transportation_options
+
+    sections = [
+        f"# Comprehensive Travel Plan: {plan.destination} {plan.trip_days} Day Trip",
+        "## Executive Summary",
+        plan.executive_summary,
+        "## Destination Overview",
+        "\n".join(_render_destination(destination)),
+        "## Accommodation Recommendations",
+        "\n".join(_render_accommodation(accommodation)),
+        "## Activities & Experiences",
+        "\n".join(_render_activities(activities)),
+        "## Day-by-Day Itinerary",
+        render_itinerary_table(plan),
+        "## Transportation Guide",
+        transportation,
+        "## Budget Breakdown",
+        render_budget_table(compute_budget(plan.budget_items, plan.currency, plan.trip_days)),
+        "## Additional Notes and Travel Tips",
+        plan.additional_notes,
+    ]
+    return "\n\n".join(sections) + "\n"
+
+
+def split_sections(markdown: str) -> Tuple[str, Dict[str, str]]:
+    """
+    Split a report into its title line and its '## ' sections (heading -> body).
+    Text before the first section heading, other than the title, is dropped.
+    """
+    title = next((line for line in markdown.splitlines() if line.startswith("# ")), "")
+    headings = list(_SECTION_HEADING_PATTERN.finditer(markdown))
+    sections = {}
+    for i, heading in enumerate(headings):
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(markdown)
+        sections[heading.group(1)] = markdown[heading.end():end].strip()
+    return title, sections
+
+
+def join_sections(title: str, sections: Dict[str, str]) -> str:
+    """Inverse of split_sections."""
+    parts = [title] if title else []
+    for heading, body in sections.items():
+        parts += [f"## {heading}", body]
+    return "\n\n".join(parts) + "\n"
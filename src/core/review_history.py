@@ -0,0 +1,137 @@
+"""Local history of Manager review scores and the score-based stopping policy for revisions."""
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+from core.checkpoints import STORE_PURGE_INTERVAL_SECONDS
+
+REVIEW_HISTORY_DB_PATH = Path(os.getenv("REVIEW_HISTORY_DB_PATH", ".checkpoints/review_history.db"))
+# Reviews older than this are deleted (0 keeps them forever)
+REVIEW_HISTORY_RETENTION_DAYS = float(os.getenv("REVIEW_HISTORY_RETENTION_DAYS", "90"))
+# Review rounds without history (initial draft + 1 revision), and the hard cap with an extra round
+DEFAULT_REVIEW_ROUNDS = 2
+MAX_REVIEW_ROUNDS = int(os.getenv("REVIEW_MAX_ROUNDS", "3"))
+# Skip a revision expected to improve the score by less than this (0-10 scale)
+REVIEW_MIN_GAIN = float(os.getenv("REVIEW_MIN_GAIN", "0.5"))
+# Allow a round beyond DEFAULT_REVIEW_ROUNDS when the expected gain is at least this
+REVIEW_EXTRA_GAIN = float(os.getenv("REVIEW_EXTRA_GAIN", "1.5"))
+# Past revisions needed before the policy overrides the default; scores within the band are "similar"
+REVIEW_MIN_SAMPLES = int(os.getenv("REVIEW_MIN_SAMPLES", "8"))
+REVIEW_SCORE_BAND = float(os.getenv("REVIEW_SCORE_BAND", "1.0"))
+# Only the most recent revisions count, so the estimate follows prompt and model changes
+REVIEW_HISTORY_WINDOW = int(os.getenv("REVIEW_HISTORY_WINDOW", "200"))
+# Before an extra round has history of its own, it is assumed to gain this share of the round before
+REVIEW_GAIN_DECAY = float(os.getenv("REVIEW_GAIN_DECAY", "0.5"))
+# Share of skippable revisions that run anyway, so history keeps measuring what they gain
+REVIEW_EXPLORE_RATE = float(os.getenv("REVIEW_EXPLORE_RATE", "0.1"))
+
+
+@dataclass(frozen=True)
+class GainEstimate:
+    """Mean score change of the next revision, from past runs with a similar score at the same round."""
+    mean_gain: float
+    samples: int
+    extrapolated: bool = False
+
+
+class ReviewHistoryStore:
+    """
+    Every Manager review's score, keyed by (run_id, iteration), in a local SQLite file.
+    Consecutive reviews of one run give the score gain a revision produced.
+    """
+
+    def __init__(self, path: Path = REVIEW_HISTORY_DB_PATH, retention_days: float = REVIEW_HISTORY_RETENTION_DAYS):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS reviews (
+                run_id TEXT NOT NULL,
+                iteration INTEGER NOT NULL,
+                score REAL NOT NULL,
+                criteria TEXT NOT NULL,
+                approved INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (run_id, iteration)
+            );
+        """)
+        self.purge_expired()
+
+    def record(self, run_id: str, iteration: int, score: float, criteria: Dict[str, float], approved: bool) -> None:
+        """Store one review (iteration counts from 0)."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO reviews VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, iteration, score, json.dumps(criteria), int(approved), time.time()),
+            )
+        if time.monotonic() - self._purged_at >= STORE_PURGE_INTERVAL_SECONDS:
+            self.purge_expired()
+
+    def purge_expired(self) -> None:
+        """Delete reviews older than the retention window."""
+        self._purged_at = time.monotonic()
+        if self.retention_days <= 0:
+            return
+        with self._lock:
+            self._conn.execute("DELETE FROM reviews WHERE created_at < ?", (time.time() - self.retention_days * 86400,))
+
+    def expected_gain(self, iteration: int, score: float) -> Optional[GainEstimate]:
+        """
+        How much the next revision improved the score in past runs reviewed at this iteration:
+        runs with a similar score first, all runs at this iteration if those are too few, and
+        failing both the previous iteration's gain scaled by REVIEW_GAIN_DECAY (diminishing
+        returns). None when history has fewer than REVIEW_MIN_SAMPLES revisions to learn from.
+        """
+        query = (
+            "SELECT AVG(gain), COUNT(*) FROM ("
+            "SELECT b.score - a.score AS gain FROM reviews a "
+            "JOIN reviews b ON b.run_id = a.run_id AND b.iteration = a.iteration + 1 "
+            "WHERE a.iteration = ? AND a.approved = 0 {band} ORDER BY b.created_at DESC LIMIT ?)"
+        )
+        with self._lock:
+            near = self._conn.execute(query.format(band="AND ABS(a.score - ?) <= ?"),
+                                      (iteration, score, REVIEW_SCORE_BAND, REVIEW_HISTORY_WINDOW)).fetchone()
+            overall = self._conn.execute(query.format(band=""), (iteration, REVIEW_HISTORY_WINDOW)).fetchone()
+        for mean_gain, samples in (near, overall):
+            if samples >= REVIEW_MIN_SAMPLES:
+                return GainEstimate(mean_gain=mean_gain, samples=samples)
+        if iteration > 0:
+            previous = self.expected_gain(iteration - 1, score)
+            if previous is not None:
+                return GainEstimate(previous.mean_gain * REVIEW_GAIN_DECAY, previous.samples, extrapolated=True)
+        return None
+
+
+def review_action(iteration: int, estimate: Optional[GainEstimate]) -> str:
+    """
+    Stopping policy for a draft the Manager did not approve, after review number iteration + 1:
+    'stop_low_gain' when history says a revision barely helps, 'extra_round' when a round past
+    the default is expected to pay off, otherwise 'revise' (the default of one revision applies).
+    A few low-gain revisions still run ('explore', same as 'revise') to keep the history current.
+    """
+    if estimate is None:
+        return "revise"
+    if estimate.mean_gain < REVIEW_MIN_GAIN:
+        return "explore" if random.random() < REVIEW_EXPLORE_RATE else "stop_low_gain"
+    if iteration + 1 >= DEFAULT_REVIEW_ROUNDS and estimate.mean_gain >= REVIEW_EXTRA_GAIN \
+            and iteration + 1 < MAX_REVIEW_ROUNDS:
+        return "extra_round"
+    return "revise"
+
+
+_store: Optional[ReviewHistoryStore] = None
+
+
+def get_review_history() -> ReviewHistoryStore:
+    """Return the process-wide review history store (opened lazily)."""
+    global _store
+    if _store is None:
+        _store = ReviewHistoryStore()
+    return _store
@@ -0,0 +1,181 @@
+"""Per-run token, dollar and wall-clock budget that every agent call is charged against."""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+from core.metrics import Counter
+
+# Limits per plan_trip run (0 disables a limit). Multi-city legs share their run's budget.
+RUN_BUDGET_TOKENS = int(os.getenv("RUN_BUDGET_TOKENS", "300000"))
+RUN_BUDGET_USD = float(os.getenv("RUN_BUDGET_USD", "0.10"))
+RUN_BUDGET_SECONDS = float(os.getenv("RUN_BUDGET_SECONDS", "300"))
+# Below this fraction of any limit the run stops starting optional work (another revision round)
+RUN_BUDGET_LOW_FRACTION = float(os.getenv("RUN_BUDGET_LOW_FRACTION", "0.2"))
+
+# USD per million tokens: (input, cached input, output). Unknown models are priced as the dearest.
+MODEL_PRICES: Dict[str, Tuple[float, float, float]] = {
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+}
+_FALLBACK_PRICE = max(MODEL_PRICES.values(), key=lambda price: price[2])
+
+budget_charged_tokens = Counter(
+    "travel_budget_tokens_total",
+    "Tokens charged to run budgets by agent",
+    labels=("agent",),
+)
+budget_events = Counter(
+    "travel_budget_events_total",
+    "Run budget limits exhausted and the actions taken because of them",
+    labels=("event", "limit"),
+)
+
+
+def call_cost(model_id: str, input_tokens: int, output_tokens: int, cached_tokens: int = 0) -> float:
+    """USD cost of one model call from its token counts."""
+    price_in, price_cached, price_out = MODEL_PRICES.get(model_id, _FALLBACK_PRICE)
+    uncached = max(input_tokens - cached_tokens, 0)
+    return (uncached * price_in + cached_tokens * price_cached + output_tokens * price_out) / 1_000_000
+
+
+@dataclass
+class _AgentSpend:
+    calls: int = 0
+    tokens: int = 0
+    cached_tokens: int = 0
+    usd: float = 0.0
+    seconds: float = 0.0
+
+
+@dataclass
+class RunBudget:
+    """
+    Limits on tokens, dollars and wall-clock time for one run, and what it has spent.
+    Charges come from any thread or task of the run; each limit's exhaustion is logged once.
+    """
+    max_tokens: int = RUN_BUDGET_TOKENS
+    max_usd: float = RUN_BUDGET_USD
+    max_seconds: float = RUN_BUDGET_SECONDS
+    low_fraction: float = RUN_BUDGET_LOW_FRACTION
+    started: float = field(default_factory=time.monotonic)
+    tokens: int = 0
+    usd: float = 0.0
+    by_agent: Dict[str, _AgentSpend] = field(default_factory=dict)
+    exhausted_limits: Dict[str, str] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def _usage(self) -> Dict[str, Tuple[float, float]]:
+        """(spent, limit) for every enabled limit."""
+        usage = {"tokens": (self.tokens, self.max_tokens), "usd": (self.usd, self.max_usd),
+                 "seconds": (self.elapsed, self.max_seconds)}
+        return {name: pair for name, pair in usage.items() if pair[1] > 0}
+
+    def charge(self, agent: str, model_id: str, metrics: Any, seconds: float) -> None:
+        """Charge one agent run, given its agno run metrics (input/output/cached tokens, cost)."""
+        input_tokens = getattr(metrics, "input_tokens", 0) or 0
+        output_tokens = getattr(metrics, "output_tokens", 0) or 0
+        cached_tokens = getattr(metrics, "cache_read_tokens", 0) or 0
+        cost = getattr(metrics, "cost", None)
+        if cost is None:
+            cost = call_cost(model_id, input_tokens, output_tokens, cached_tokens)
+        with self._lock:
+            self.tokens += input_tokens + output_tokens
+            self.usd += cost
+            spend = self.by_agent.setdefault(agent, _AgentSpend())
+            spend.calls += 1
+            spend.tokens += input_tokens + output_tokens
+            spend.cached_tokens += cached_tokens
+            spend.usd += cost
+            spend.seconds += seconds
+        budget_charged_tokens.inc(agent, amount=input_tokens + output_tokens)
+        self.exhausted(after=agent)
+
+    def exhausted(self, after: str = "") -> Optional[str]:
+        """The first limit the run has used up (logged the first time it is seen), or None."""
+        for name, (spent, limit) in self._usage().items():
+            if spent < limit:
+                continue
+            with self._lock:
+                first = name not in self.exhausted_limits
+                if first:
+                    self.exhausted_limits[name] = after or "check"
+            if first:
+                budget_events.inc("exhausted", name)
+                print(f"   Run budget exhausted: {name} {spent:,.4g}/{limit:,.4g}"
+                      + (f" after {after}" if after else ""))
+            return name
+        return None
+
+    def has_spend(self, agent: str) -> bool:
+        """Whether agent has been charged in this run, so shortfall can price its next call."""
+        with self._lock:
+            return agent in self.by_agent and self.by_agent[agent].calls > 0
+
+    def shortfall(self, agents: Iterable[str]) -> Optional[str]:
+        """
+        The limit that one more call of each agent (at its average cost so far) would
+        exceed or leave below the low-water mark, or None if the run can afford it.
+        """
+        exhausted = self.exhausted()
+        if exhausted:
+            return exhausted
+        with self._lock:
+            spends = [self.by_agent[a] for a in agents if a in self.by_agent and self.by_agent[a].calls]
+            next_round = {
+                "tokens": sum(s.tokens / s.calls for s in spends),
+                "usd": sum(s.usd / s.calls for s in spends),
+                "seconds": sum(s.seconds / s.calls for s in spends),
+            }
+        for name, (spent, limit) in self._usage().items():
+            if limit - spent - next_round[name] < limit * self.low_fraction:
+                return name
+        return None
+
+    def record_action(self, action: str, limit: str) -> None:
+        """Log a step adapting to the budget (e.g. accepting the current draft)."""
+        budget_events.inc(action, limit)
+        print(f"   Run budget low ({limit}): {action.replace('_', ' ')}")
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Spend and limits, for the trace."""
+        with self._lock:
+            return {
+                "tokens": self.tokens,
+                "usd": round(self.usd, 6),
+                "seconds": round(self.elapsed, 2),
+                "limits": {"tokens": self.max_tokens, "usd": self.max_usd, "seconds": self.max_seconds},
+                "exhausted": dict(self.exhausted_limits),
+                "by_agent": {agent: {"calls": s.calls, "tokens": s.tokens, "cached_tokens": s.cached_tokens,
+                                     "usd": round(s.usd, 6)}
+                             for agent, s in self.by_agent.items()},
+            }
+
+
+# Budget of the run executing in the current context (None outside budget_scope)
+_run_budget: ContextVar[Optional[RunBudget]] = ContextVar("run_budget", default=None)
+
+
+@contextmanager
+def budget_scope(budget: Optional[RunBudget] = None) -> Iterator[RunBudget]:
+    """Charge every agent call made inside the scope (including its tasks) to one budget."""
+    budget = budget or RunBudget()
+    token = _run_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _run_budget.reset(token)
+
+
+def current_budget() -> Optional[RunBudget]:
+    """The current run's budget, if any."""
+    return _run_budget.get()
@@ -1,43 +1,168 @@
 """Pydantic schemas for structured outputs."""
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field
 
+# Price band shared by hotels and the planner's budget tier
+PriceBand = Literal["budget", "mid-range", "luxury"]
+
+# Second-level sections of the documented report format, in order
+ReportSection = Literal[
+    "Executive Summary",
+    "Destination Overview",
+    "Accommodation Recommendations",
+    "Activities & Experiences",
+    "Day-by-Day Itinerary",
+    "Transportation Guide",
+    "Budget Breakdown",
+    "Additional Notes and Travel Tips",
+]
+
+# Budget line item units (how the unit cost is multiplied)
+BudgetUnit = Literal["night", "day", "total"]
+
+
+# Attraction Entry Schema
+class Attraction(BaseModel):
+    name: str = Field(..., description="Name of the attraction or landmark")
+    area: str = Field(..., description="Neighbourhood or district where the attraction is located")
+    description: str = Field(..., description="One or two sentences on why it is worth visiting")
+
+
 # Destination Info Schema
 class DestinationInfo(BaseModel):
     destination: str = Field(..., description="Name of the destination city or region")
-    top_attractions: str = Field(..., description="List of top 3-5 must-visit attractions")
+    top_attractions: List[Attraction] = Field(..., description="Top 3-5 must-visit attractions")
     best_time_to_visit: str = Field(..., description="Best season or months to visit with weather context")
     local_tips: str = Field(..., description="Practical tips for travelers (etiquette, safety, transport)")
     weather_info: str = Field(..., description="Current weather conditions and forecast")
 
 
+# Hotel Entry Schema
+class HotelOption(BaseModel):
+    name: str = Field(..., description="Specific hotel name")
+    area: str = Field(..., description="Neighbourhood or district of the hotel")
+    price_band: PriceBand = Field(..., description="Price band of the hotel")
+    nightly_rate_min: float = Field(..., description="Lowest typical nightly rate, in local currency")
+    nightly_rate_max: float = Field(..., description="Highest typical nightly rate, in local currency")
+    currency: str = Field(..., description="ISO 4217 currency code of the nightly rates (e.g., JPY)")
+    highlights: str = Field(..., description="Brief details on location, amenities and who it suits")
+
+
 # Accommodation Options Schema
 class AccommodationOptions(BaseModel):
     destination: str = Field(..., description="Name of the destination")
-    hotel_recommendations: str = Field(..., description="List of 3-5 specific hotel names with brief details")
+    hotel_recommendations: List[HotelOption] = Field(..., description="3-5 specific hotels across price bands")
     budget_range: str = Field(..., description="Estimated price range per night (e.g., $100-$200)")
     booking_tips: str = Field(..., description="Advice on when and where to book for best rates")
 
 
+# Activity Entry Schema
+class Activity(BaseModel):
+    name: str = Field(..., description="Name of the activity or tour")
+    area: str = Field(..., description="Neighbourhood or district where it takes place")
+    description: str = Field(..., description="What the traveler will do")
+    estimated_cost: float = Field(..., description="Estimated cost per person in local currency (0 if free)")
+    currency: str = Field(..., description="ISO 4217 currency code of the estimated cost")
+
+
 # Activities Info Schema
 class ActivitiesInfo(BaseModel):
     destination: str = Field(..., description="Name of the destination")
-    recommended_activities: str = Field(..., description="List of specific activities or tours to do")
+    recommended_activities: List[Activity] = Field(..., description="Specific activities or tours to do")
     transportation_options: str = Field(..., description="Best ways to get around (metro, taxi, walking)")
     local_experiences: str = Field(..., description="Unique cultural experiences or food options")
     estimated_costs: str = Field(..., description="Estimated costs for activities and transport")
 
 
+# Combined Research Schema (fast mode: one agent returns all three research outputs)
+class ResearchBundle(BaseModel):
+    destination: DestinationInfo = Field(..., description="Destination research: attractions, weather and local tips")
+    accommodation: AccommodationOptions = Field(..., description="Accommodation research: hotels across price bands")
+    activities: ActivitiesInfo = Field(..., description="Activities research: things to do, transport and costs")
+
+
+# Itinerary Slot Schema
+class ItinerarySlot(BaseModel):
+    start_time: str = Field(..., description="Start time in 24-hour HH:MM format")
+    end_time: str = Field(..., description="End time in 24-hour HH:MM format")
+    activity: str = Field(..., description="What happens in this slot")
+    notes: str = Field(..., description="Practical tips: booking advice, transport mode, timing considerations")
+
+
+# Itinerary Day Schema
+class ItineraryDay(BaseModel):
+    day_number: int = Field(..., description="Day number starting at 1")
+    theme: str = Field(..., description="Short theme for the day (e.g., 'Temples & Culture')")
+    slots: List[ItinerarySlot] = Field(..., description="Time slots for the day in chronological order")
+
+
+# Budget Line Item Schema
+class BudgetLineItem(BaseModel):
+    category: str = Field(..., description="Budget category (Accommodation, Meals, Transportation, Activities, ...)")
+    unit_cost: float = Field(..., description="Cost per unit in local currency")
+    unit: BudgetUnit = Field(..., description="'night', 'day' or 'total' (a one-off amount)")
+    quantity: float = Field(..., description="Number of units (nights or days); 1 for 'total'")
+    notes: str = Field(..., description="Details, booking tips, cost-saving options")
+
+
 # Daily Itinerary Schema
 class DailyItinerary(BaseModel):
     destination: str = Field(..., description="Name of the destination")
-    trip_duration: str = Field(..., description="Duration of the trip (e.g., '5 days')")
-    day_by_day_plan: str = Field(..., description="Detailed markdown formatted itinerary, organized by day")
+    trip_days: int = Field(..., description="Duration of the trip in days")
+    currency: str = Field(..., description="ISO 4217 code of the local currency used for the budget")
+    executive_summary: str = Field(..., description="Short overview of the trip and its highlights")
+    days: List[ItineraryDay] = Field(..., description="Day-by-day plan, one entry per day")
+    transportation_guide: str = Field(..., description="How to get around during the trip")
+    budget_items: List[BudgetLineItem] = Field(..., description="Per-person budget line items")
+    additional_notes: str = Field(..., description="Additional notes and travel tips")
+
+
+# Per-Criterion Review Scores Schema
+class CriterionScores(BaseModel):
+    completeness: float = Field(..., description="0-10: covers destination, hotels, activities and every day")
+    coherence: float = Field(..., description="0-10: the day-by-day plan flows logically")
+    practicality: float = Field(..., description="0-10: activities are feasible within the timeframe")
+    budget_alignment: float = Field(..., description="0-10: recommendations match the stated budget")
+
+
+# Section Revision Schema (planner output when only flagged sections are regenerated)
+class PlanSectionRevision(BaseModel):
+    executive_summary: Optional[str] = Field(None, description="Revised executive summary, or null if not flagged")
+    days: Optional[List[ItineraryDay]] = Field(
+        None, description="Only the revised days, each with its day_number, or null if the itinerary is not flagged"
+    )
+    transportation_guide: Optional[str] = Field(None, description="Revised transportation guide, or null if not flagged")
+    budget_items: Optional[List[BudgetLineItem]] = Field(
+        None, description="The complete revised list of budget line items, or null if the budget is not flagged"
+    )
+    additional_notes: Optional[str] = Field(None, description="Revised additional notes, or null if not flagged")
 
 
 # Critique Result Schema
 class CritiqueResult(BaseModel):
     is_approved: bool = Field(..., description="True if the plan is ready for the user, False if it needs revision")
+    quality_score: float = Field(..., description="Overall plan quality from 0 (unusable) to 10 (ready to ship as is)")
+    criterion_scores: CriterionScores = Field(..., description="Score for each review criterion, 0-10")
+    sections_to_revise: List[ReportSection] = Field(
+        ..., description="Report sections that need changes (empty when approved)"
+    )
+    days_to_revise: List[int] = Field(
+        ..., description="Day numbers whose schedule needs changes (empty if none, or if every day does)"
+    )
     overall_assessment: str = Field(..., description="Brief summary of the critique")
     specific_feedback: str = Field(..., description="Detailed feedback on what is good and what needs improvement")
     improvement_suggestions: str = Field(..., description="Actionable steps to fix the identified issues")
 
+
+# Manager Review Decision Schema (output of the review step, read by the loop end condition)
+class ReviewDecision(BaseModel):
+    is_approved: bool = Field(..., description="Whether the Manager approved the draft")
+    revision_iteration: int = Field(..., description="Number of reviews completed so far in this run")
+    feedback: str = Field(..., description="Manager feedback passed to the team lead")
+    budget_limit: Optional[str] = Field(
+        None, description="Run budget limit (tokens, usd or seconds) that ends the revision loop early, if any"
+    )
+    quality_score: Optional[float] = Field(None, description="Manager's 0-10 quality score of the draft, if given")
+    review_action: Optional[str] = Field(
+        None, description="Stopping policy verdict: 'revise', 'explore', 'stop_low_gain' or 'extra_round'"
+    )
@@ -0,0 +1,200 @@
+"""Cross-process SQLite cache for search, research and plan results, with single-flight computation."""
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from core.checkpoints import STORE_PURGE_INTERVAL_SECONDS, decode_content, encode_content
+from core.metrics import Counter
+
+SHARED_CACHE_DB_PATH = Path(os.getenv("SHARED_CACHE_DB_PATH", ".checkpoints/shared_cache.db"))
+# Freshness per namespace (0 disables that cache)
+SEARCH_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "21600"))
+RESEARCH_CACHE_TTL_SECONDS = float(os.getenv("RESEARCH_CACHE_TTL_SECONDS", "21600"))
+PLAN_CACHE_TTL_SECONDS = float(os.getenv("PLAN_CACHE_TTL_SECONDS", "3600"))
+# A process computing a key holds its lease this long; a crashed holder's lease simply expires
+SINGLE_FLIGHT_LEASE_SECONDS = float(os.getenv("SINGLE_FLIGHT_LEASE_SECONDS", "120"))
+
+CACHE_TTLS: Dict[str, float] = {
+    "search": SEARCH_CACHE_TTL_SECONDS,
+    "research": RESEARCH_CACHE_TTL_SECONDS,
+    "plan": PLAN_CACHE_TTL_SECONDS,
+}
+
+shared_cache_requests = Counter(
+    "travel_shared_cache_requests_total",
+    "Shared cache lookups by namespace and outcome (hit, miss, coalesced onto another caller's computation)",
+    labels=("namespace", "outcome"),
+)
+
+
+def cache_key(*parts: Any) -> str:
+    """Case- and whitespace-insensitive key from the parts that determine a result."""
+    return "|".join(" ".join(str(part).lower().split()) for part in parts)
+
+
+class SharedCache:
+    """
+    Cached values keyed by (namespace, key) in a SQLite file shared by every worker process.
+
+    get_or_compute() runs a computation once per key across all processes: callers in the
+    same process await the leader's future, other processes wait on a lease row in the
+    leases table and read the leader's value when it lands. WAL mode lets every worker
+    read while one writes.
+    """
+
+    def __init__(self, path: Path = SHARED_CACHE_DB_PATH, lease_seconds: float = SINGLE_FLIGHT_LEASE_SECONDS):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._inflight: Dict[Tuple[int, str, str], asyncio.Future] = {}
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            );
+            CREATE TABLE IF NOT EXISTS leases (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            );
+        """)
+        self.purge_expired()
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """The cached value, or None when missing or expired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM entries WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (namespace, key, time.time()),
+            ).fetchone()
+        return decode_content(row[0]) if row else None
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float) -> None:
+        """Store a value for ttl seconds."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                (namespace, key, encode_content(value), time.time() + ttl),
+            )
+        if time.monotonic() - self._purged_at >= STORE_PURGE_INTERVAL_SECONDS:
+            self.purge_expired()
+
+    def _acquire(self, namespace: str, key: str, owner: str) -> bool:
+        """Take the key's lease unless another live owner holds it."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO leases VALUES (?, ?, ?, ?) ON CONFLICT(namespace, key) DO UPDATE "
+                "SET owner = excluded.owner, expires_at = excluded.expires_at WHERE leases.expires_at <= ?",
+                (namespace, key, owner, now + self.lease_seconds, now),
+            )
+        return cursor.rowcount == 1
+
+    def _release(self, namespace: str, key: str, owner: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM leases WHERE namespace = ? AND key = ? AND owner = ?",
+                               (namespace, key, owner))
+
+    def purge_expired(self) -> None:
+        """Delete expired entries and abandoned leases."""
+        now = time.time()
+        self._purged_at = time.monotonic()
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+            self._conn.execute("DELETE FROM leases WHERE expires_at <= ?", (now,))
+
+    async def get_or_compute(self, namespace: str, key: str, compute: Callable[[], Awaitable[Any]],
+                             ttl: Optional[float] = None,
+                             cacheable: Callable[[Any], bool] = lambda value: value is not None) -> Any:
+        """
+        The cached value for key, or the result of compute() (stored when cacheable), computed
+        by one caller at a time across every process. A leader's error reaches the callers
+        waiting on it in this process; if the leader is cancelled, the next waiter takes over.
+        """
+        ttl = CACHE_TTLS.get(namespace, 0.0) if ttl is None else ttl
+        if ttl <= 0:
+            return await compute()
+
+        # Futures belong to one event loop, so same-process coalescing is per loop
+        inflight_key = (id(asyncio.get_running_loop()), namespace, key)
+        while True:
+            cached = self.get(namespace, key)
+            if cached is not None:
+                shared_cache_requests.inc(namespace, "hit")
+                return cached
+
+            leader = self._inflight.get(inflight_key)
+            if leader is not None:
+                shared_cache_requests.inc(namespace, "coalesced")
+                done, value = await asyncio.shield(leader)
+                if done:
+                    return value
+                continue  # the leader was cancelled; retry (and possibly lead)
+
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[inflight_key] = future
+            try:
+                value = await self._compute_once(namespace, key, compute, ttl, cacheable)
+            except asyncio.CancelledError:
+                future.set_result((False, None))
+                raise
+            except Exception as e:
+                future.set_exception(e)
+                future.exception()  # retrieved here, so a leader without waiters logs nothing
+                raise
+            else:
+                future.set_result((True, value))
+                return value
+            finally:
+                del self._inflight[inflight_key]
+
+    async def _compute_once(self, namespace: str, key: str, compute: Callable[[], Awaitable[Any]],
+                            ttl: float, cacheable: Callable[[Any], bool]) -> Any:
+        """Compute under the cross-process lease, or wait for the process holding it."""
+        owner = f"{os.getpid()}:{uuid.uuid4().hex}"
+        delay = 0.05
+        waited = False
+        while not self._acquire(namespace, key, owner):
+            waited = True
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 1.0)
+            cached = self.get(namespace, key)
+            if cached is not None:
+                shared_cache_requests.inc(namespace, "coalesced")
+                return cached
+
+        try:
+            # Another process may have finished between our lookup and taking the lease
+            cached = self.get(namespace, key) if waited else None
+            if cached is not None:
+                shared_cache_requests.inc(namespace, "coalesced")
+                return cached
+            shared_cache_requests.inc(namespace, "miss")
+            value = await compute()
+            if cacheable(value):
+                self.set(namespace, key, value, ttl)
+            return value
+        finally:
+            self._release(namespace, key, owner)
+
+
+_cache: Optional[SharedCache] = None
+
+
+def get_shared_cache() -> SharedCache:
+    """Return the process-wide handle on the shared cache (opened lazily)."""
+    global _cache
+    if _cache is None:
+        _cache = SharedCache()
+    return _cache
@@ -0,0 +1,338 @@
+"""Durable local spool for trace exports, uploaded to Langfuse in the background."""
+import argparse
+import atexit
+import base64
+import json
+import os
+import random
+import struct
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple
+from core.metrics import Counter
+
+TRACE_SPOOL_ENABLED = os.getenv("TRACE_SPOOL", "1").lower() not in ("0", "false", "no")
+TRACE_SPOOL_DIR = Path(os.getenv("TRACE_SPOOL_DIR", ".trace_spool"))
+TRACE_SPOOL_MAX_MB = float(os.getenv("TRACE_SPOOL_MAX_MB", "256"))
+TRACE_SPOOL_SEGMENT_MB = float(os.getenv("TRACE_SPOOL_SEGMENT_MB", "4"))
+# Best-effort upload time at interpreter exit; whatever is left is replayed on the next start
+TRACE_SPOOL_EXIT_DRAIN_SECONDS = float(os.getenv("TRACE_SPOOL_EXIT_DRAIN_SECONDS", "5"))
+
+# HTTP statuses that mean the batch itself is bad; any other error is retried
+_REJECTED_STATUS_CODES = (400, 413, 422)
+
+_RECORD_HEADER = struct.Struct(">I")  # 4-byte big-endian payload length
+_CURSOR_FILE = "cursor.json"
+
+spool_records = Counter(
+    "travel_trace_spool_records_total",
+    "Trace export batches by spool outcome (spooled, uploaded, dropped)",
+    labels=("outcome",),
+)
+
+
+class TraceSpool:
+    """
+    Append-only segment files of OTLP export payloads (one length-prefixed record
+    per export batch). Segments rotate at a fixed size; when the spool exceeds its
+    cap, the oldest segments are dropped. A cursor remembers how far the oldest
+    segment has been uploaded, so replay resumes in order after a restart.
+    """
+
+    def __init__(self, directory: Path = TRACE_SPOOL_DIR, max_bytes: int = int(TRACE_SPOOL_MAX_MB * 2**20),
+                 segment_bytes: int = int(TRACE_SPOOL_SEGMENT_MB * 2**20)):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    # Writing
+    def append(self, payload: bytes) -> None:
+        """Append one record to the newest segment (rotating and enforcing the cap as needed)."""
+        with self._lock:
+            segments = self._segments()
+            active = segments[-1] if segments else self._segment_path(1)
+            if active.exists() and active.stat().st_size + len(payload) > self.segment_bytes:
+                active = self._segment_path(self._sequence(active) + 1)
+            with open(active, "ab") as f:
+                f.write(_RECORD_HEADER.pack(len(payload)) + payload)
+            self._enforce_cap()
+        spool_records.inc("spooled")
+
+    def _enforce_cap(self) -> None:
+        segments = self._segments()
+        total = sum(p.stat().st_size for p in segments)
+        while total > self.max_bytes and len(segments) > 1:
+            oldest = segments.pop(0)
+            total -= oldest.stat().st_size
+            dropped = sum(1 for _ in self._read_records(oldest, self._cursor_offset(oldest)))
+            oldest.unlink()
+            spool_records.inc("dropped", amount=dropped)
+            print(f"Trace spool over {self.max_bytes / 2**20:g} MiB: dropped {dropped} oldest batch(es)")
+
+    # Reading
+    def pending(self) -> Iterator[Tuple[Path, int, bytes]]:
+        """Yield (segment, end offset, payload) for every record not yet uploaded, oldest first."""
+        for segment in self._segments():
+            yield from ((segment, end, payload)
+                        for end, payload in self._read_records(segment, self._cursor_offset(segment)))
+
+    def commit(self, segment: Path, end_offset: int) -> None:
+        """Mark everything up to end_offset of segment as uploaded."""
+        with self._lock:
+            segments = self._segments()
+            for older in segments[:segments.index(segment) if segment in segments else 0]:
+                older.unlink()  # replay is in order, so earlier segments are fully uploaded
+            if segment.exists() and segment != segments[-1] and end_offset >= segment.stat().st_size:
+                segment.unlink()  # fully uploaded and no longer written to
+                (self.directory / _CURSOR_FILE).unlink(missing_ok=True)
+            else:
+                (self.directory / _CURSOR_FILE).write_text(
+                    json.dumps({"segment": segment.name, "offset": end_offset}), encoding="utf-8"
+                )
+
+    def stats(self) -> dict:
+        segments = self._segments()
+        records = sum(1 for _ in self.pending())
+        return {
+            "directory": str(self.directory),
+            "segments": len(segments),
+            "bytes": sum(p.stat().st_size for p in segments),
+            "pending_batches": records,
+            "cap_bytes": self.max_bytes,
+        }
+
+    def purge(self) -> int:
+        """Delete every segment. Returns the number of segments removed."""
+        with self._lock:
+            segments = self._segments()
+            for p in segments:
+                p.unlink()
+            (self.directory / _CURSOR_FILE).unlink(missing_ok=True)
+        return len(segments)
+
+    # Helpers
+    def _segments(self) -> List[Path]:
+        return sorted(self.directory.glob("*.seg"))
+
+    def _segment_path(self, sequence: int) -> Path:
+        return self.directory / f"{sequence:010d}.seg"
+
+    @staticmethod
+    def _sequence(segment: Path) -> int:
+        return int(segment.stem)
+
+    def _cursor_offset(self, segment: Path) -> int:
+        cursor = self.directory / _CURSOR_FILE
+        if not cursor.exists():
+            return 0
+        try:
+            data = json.loads(cursor.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return 0
+        return int(data.get("offset", 0)) if data.get("segment") == segment.name else 0
+
+    @staticmethod
+    def _read_records(segment: Path, offset: int) -> Iterator[Tuple[int, bytes]]:
+        try:
+            with open(segment, "rb") as f:
+                f.seek(offset)
+                while True:
+                    header = f.read(_RECORD_HEADER.size)
+                    if len(header) < _RECORD_HEADER.size:
+                        return
+                    (size,) = _RECORD_HEADER.unpack(header)
+                    payload = f.read(size)
+                    if len(payload) < size:
+                        return  # record still being written (or torn by a crash)
+                    yield f.tell(), payload
+        except FileNotFoundError:
+            return
+
+
+class SpoolUploader:
+    """Uploads spooled records to an OTLP/HTTP endpoint in order, with exponential backoff."""
+
+    def __init__(self, spool: TraceSpool, endpoint: str, headers: dict, timeout: float = 10.0,
+                 max_backoff: float = 300.0):
+        self.spool = spool
+        self.endpoint = endpoint
+        self.headers = {**headers, "Content-Type": "application/x-protobuf"}
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="trace-spool-uploader", daemon=True)
+        self._thread.start()
+
+    def notify(self) -> None:
+        """Wake the uploader (new records were spooled)."""
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+
+    def _run(self) -> None:
+        backoff = 1.0
+        while not self._stopped.is_set():
+            try:
+                self.drain()
+                backoff = 1.0
+                self._wake.wait(5.0)
+                self._wake.clear()
+            except (OSError, urllib.error.URLError) as e:
+                delay = min(backoff, self.max_backoff) * random.uniform(0.5, 1.0)
+                print(f"Trace upload failed ({e}); retrying in {delay:.0f}s, spans stay spooled")
+                self._stopped.wait(delay)
+                backoff = min(backoff * 2, self.max_backoff)
+
+    def drain(self, deadline: Optional[float] = None) -> int:
+        """Upload every pending record, oldest first. Raises on a retryable failure. Returns records sent."""
+        sent = 0
+        for segment, end, payload in self.spool.pending():
+            if deadline is not None and time.monotonic() > deadline:
+                break
+            if self._post(payload):
+                spool_records.inc("uploaded")
+            else:
+                spool_records.inc("dropped")  # rejected by the server; retrying would never succeed
+            self.spool.commit(segment, end)
+            sent += 1
+        return sent
+
+    def _post(self, payload: bytes) -> bool:
+        request = urllib.request.Request(self.endpoint, data=payload, headers=self.headers, method="POST")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout):
+                return True
+        except urllib.error.HTTPError as e:
+            # Only a malformed or oversized batch is dropped. Auth and routing errors (401/403/404)
+            # are fixed by configuration, so the batch stays spooled and is retried with backoff
+            if e.code not in _REJECTED_STATUS_CODES:
+                raise
+            print(f"Trace batch rejected by {self.endpoint} (HTTP {e.code}); dropping it")
+            return False
+
+
+class SpoolingSpanExporter:
+    """OpenTelemetry SpanExporter that writes batches to the local spool instead of the network."""
+
+    def __init__(self, spool: TraceSpool, uploader: Optional[SpoolUploader] = None):
+        self.spool = spool
+        self.uploader = uploader
+
+    def export(self, spans: Sequence):
+        from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+        from opentelemetry.sdk.trace.export import SpanExportResult
+
+        try:
+            self.spool.append(encode_spans(spans).SerializeToString())
+        except OSError as e:
+            print(f"Trace spool write failed: {e}")
+            return SpanExportResult.FAILURE
+        if self.uploader:
+            self.uploader.notify()
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        if self.uploader:
+            self.uploader.stop()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return True  # export() is already durable once it returns
+
+
+def langfuse_otlp_target() -> Tuple[str, dict]:
+    """Langfuse OTLP traces endpoint and auth headers, from the same env vars the SDK reads."""
+    base_url = (os.getenv("LANGFUSE_BASE_URL") or os.getenv("LANGFUSE_HOST") or "https://cloud.langfuse.com")
+    path = os.getenv("LANGFUSE_OTEL_TRACES_EXPORT_PATH") or "api/public/otel/v1/traces"
+    public_key = os.getenv("LANGFUSE_PUBLIC_KEY", "")
+    secret_key = os.getenv("LANGFUSE_SECRET_KEY", "")
+    auth = base64.b64encode(f"{public_key}:{secret_key}".encode("utf-8")).decode("ascii")
+    return f"{base_url.rstrip('/')}/{path.lstrip('/')}", {
+        "Authorization": f"Basic {auth}",
+        "x-langfuse-public-key": public_key,
+    }
+
+
+def install_trace_spool(langfuse_client) -> Optional[SpoolUploader]:
+    """
+    Route the Langfuse span processor's exports through the local spool.
+
+    The processor is kept (it applies Langfuse's project filtering and propagated
+    attributes); only its network exporter is replaced, which relies on SDK internals,
+    so any mismatch leaves the default exporter in place.
+    """
+    if not TRACE_SPOOL_ENABLED:
+        return None
+    try:
+        from langfuse._client.span_processor import LangfuseSpanProcessor
+
+        provider = langfuse_client._resources.tracer_provider
+        processors = provider._active_span_processor._span_processors
+        processor = next(p for p in processors if isinstance(p, LangfuseSpanProcessor))
+        batch = processor._batch_processor
+        original = batch._exporter
+    except (AttributeError, ImportError, StopIteration):
+        print("Trace spool not installed: unsupported Langfuse SDK layout; exporting directly")
+        return None
+
+    endpoint, headers = langfuse_otlp_target()
+    spool = TraceSpool()
+    uploader = SpoolUploader(spool, getattr(original, "_endpoint", endpoint), headers)
+    batch._exporter = SpoolingSpanExporter(spool, uploader)
+    uploader.start()
+    atexit.register(_drain_at_exit, uploader)
+    return uploader
+
+
+def _drain_at_exit(uploader: SpoolUploader) -> None:
+    try:
+        uploader.drain(deadline=time.monotonic() + TRACE_SPOOL_EXIT_DRAIN_SECONDS)
+    except (OSError, urllib.error.URLError):
+        pass  # left in the spool; replayed by the next process
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description="Inspect or drain the local trace spool.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="Show spool size and pending batches")
+    inspect_parser = sub.add_parser("inspect", help="List pending batches and their spans")
+    inspect_parser.add_argument("--limit", type=int, default=20)
+    sub.add_parser("drain", help="Upload every pending batch to Langfuse now")
+    sub.add_parser("purge", help="Delete every spooled batch without uploading")
+    args = parser.parse_args()
+
+    load_dotenv()
+    spool = TraceSpool()
+
+    if args.command == "status":
+        for key, value in spool.stats().items():
+            print(f"{key}: {value}")
+    elif args.command == "inspect":
+        from opentelemetry.proto.collector.trace.v1.trace_service_pb2 import ExportTraceServiceRequest
+
+        for i, (segment, end, payload) in enumerate(spool.pending()):
+            if i >= args.limit:
+                print("...")
+                break
+            request = ExportTraceServiceRequest.FromString(payload)
+            names = [span.name for rs in request.resource_spans for ss in rs.scope_spans for span in ss.spans]
+            print(f"{segment.name}@{end}: {len(payload)} bytes, {len(names)} span(s): {', '.join(names[:5])}"
+                  + (" ..." if len(names) > 5 else ""))
+    elif args.command == "drain":
+        endpoint, headers = langfuse_otlp_target()
+        sent = SpoolUploader(spool, endpoint, headers).drain()
+        print(f"Uploaded {sent} batch(es) to {endpoint}")
+    elif args.command == "purge":
+        print(f"Removed {spool.purge()} segment(s)")
@@ -0,0 +1,420 @@
+"""Local rule-based parser that turns a free-text travel request into a typed trip spec."""
+import argparse
+import json
+import os
+import re
+import time
+from dataclasses import asdict, dataclass, field, replace
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from core.budget import convert_to_usd
+
+# Bundled gazetteer of cities and countries; point GAZETTEER_PATH at your own JSON file to extend it.
+GAZETTEER_PATH = Path(os.getenv("GAZETTEER_PATH", Path(__file__).parent / "data" / "gazetteer.json"))
+
+DEFAULT_TRIP_DAYS = 3
+DEFAULT_BUDGET_TIER = "mid-range"
+
+# Place names that are also common words or names; only trusted when capitalized mid-sentence
+_AMBIGUOUS_PLACES = {"nice", "split", "male", "us", "la", "georgia", "jordan", "rio", "petra", "goa", "lima", "america"}
+
+_NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "fourteen": 14, "twenty": 20,
+}
+_NUMBER = r"(\d+|" + "|".join(sorted(_NUMBER_WORDS, key=len, reverse=True)) + r")"
+
+_DAYS_PATTERN = re.compile(_NUMBER + r"[\s-]*days?\b", re.IGNORECASE)
+_NIGHTS_PATTERN = re.compile(_NUMBER + r"[\s-]*nights?\b", re.IGNORECASE)
+_WEEKS_PATTERN = re.compile(_NUMBER + r"[\s-]*weeks?\b|\b(?:a|one)?\s*week[\s-]*long\b", re.IGNORECASE)
+_WEEKEND_PATTERN = re.compile(r"\b(long\s+)?weekend\b", re.IGNORECASE)
+
+# "Thailand (Bangkok, Chiang Mai, Islands)" -> region + parenthesized leg list
+_LEG_LIST_PATTERN = re.compile(r"(?:([A-Z][\w'-]*(?:\s+[A-Z][\w'-]*)*)\s*)?\(([^)]+)\)")
+_LEG_SEPARATOR_PATTERN = re.compile(r"\s*(?:,|/|&|->|→|\band\b)\s*")
+_TOKEN_PATTERN = re.compile(r"[^\W_]+(?:'[^\W_]+)*")
+_ORIGIN_PATTERN = re.compile(
+    r"\b(?:from|leaving|departing(?: from)?|flying out of|(?:live|living|lived|based|residing)\s+in)\s+$",
+    re.IGNORECASE,
+)
+# Words that introduce a destination, and the separators that continue a list of them ("to Tokyo and Kyoto")
+_DESTINATION_PATTERN = re.compile(
+    r"\b(?:to|in|into|visit(?:ing)?|through|then|around|across|explor(?:e|ing))\s+(?:the\s+)?$", re.IGNORECASE
+)
+_LIST_CONTINUATION_PATTERN = re.compile(r"\s*(?:,|/|&|->|→|\band\b|\bthen\b)(?:\s*(?:and|then)\b)?\s*", re.IGNORECASE)
+# Places mentioned as past trips or comparisons, not as where to go
+_NOT_DESTINATION_PATTERN = re.compile(
+    r"\b(?:been|went|gone|back)\s+to\s+$|\b(?:last|previous|past)\s+(?:trip|visit|holiday|vacation)\s+to\s+$"
+    r"|\blike\s+(?:my|our|the)\b[^.,;!?]*$",
+    re.IGNORECASE,
+)
+
+# Counted rules read the party size from the request; the others imply it (or leave it open)
+_COUNTED_TRAVELER_RULES = (
+    (re.compile(r"\bfamily of " + _NUMBER + r"\b", re.IGNORECASE), "family"),
+    (re.compile(_NUMBER + r"\s+(?:people|persons|adults|travell?ers|friends|guests|of us)\b", re.IGNORECASE), "group"),
+)
+_TRAVELER_RULES: Tuple[Tuple[re.Pattern, Optional[int], str], ...] = (
+    (re.compile(r"\b(solo|alone|by myself|single travell?er)\b", re.IGNORECASE), 1, "solo"),
+    (re.compile(r"\b(couple|honeymoon|romantic|anniversary|my (wife|husband|partner|girlfriend|boyfriend))\b",
+                re.IGNORECASE), 2, "couple"),
+    (re.compile(r"\b(family|kids|children|toddlers?)\b", re.IGNORECASE), None, "family"),
+    (re.compile(r"\b(friends|group)\b", re.IGNORECASE), None, "group"),
+)
+
+_INTERESTS_PATTERN = re.compile(
+    r"\b(?:interested in|interests? (?:are|include)|(?:who )?loves?|enjoys?|into|focus(?:ed|ing)? on|passionate about)"
+    r"\s+([^.;!?\n]+)", re.IGNORECASE,
+)
+_INTEREST_SPLIT = re.compile(r"\s*(?:,|/|&|\band\b|\bor\b)\s*", re.IGNORECASE)
+_INTEREST_STOP = re.compile(r"\s+(?:with|on a|for|during|in|at|budget is)\b.*$", re.IGNORECASE)
+_INTEREST_KEYWORDS = (
+    "temples", "museums", "food", "street food", "hiking", "beaches", "nightlife", "shopping", "history",
+    "art", "nature", "culture", "architecture", "wine", "diving", "snorkeling", "skiing", "photography",
+    "wildlife", "festivals", "markets", "cafes", "onsen", "surfing", "castles", "gardens",
+)
+_INTEREST_KEYWORD_PATTERN = re.compile(r"\b(" + "|".join(_INTEREST_KEYWORDS) + r")\b", re.IGNORECASE)
+
+_BUDGET_TIERS = (
+    ("mid-range", re.compile(r"\bmid[- ]?range\b|\bmoderate\b", re.IGNORECASE)),
+    ("luxury", re.compile(r"\b(luxury|luxurious|high[- ]end|5[- ]star|upscale)\b", re.IGNORECASE)),
+    ("budget", re.compile(r"\b(budget[- ](friendly|travel\w*|hotels?|trip)|on a (tight )?budget|cheap|"
+                          r"backpack\w*|low[- ]cost|hostels?)\b", re.IGNORECASE)),
+)
+_CURRENCY_SYMBOLS = {"$": "USD", "€": "EUR", "£": "GBP", "¥": "JPY", "₹": "INR", "฿": "THB", "Rp": "IDR"}
+_AMOUNT_PATTERN = re.compile(
+    r"(?P<symbol>[$€£¥₹฿]|Rp\.?)\s?(?P<amount>\d[\d,]*(?:\.\d+)?)\s?(?P<k>k\b)?"
+    r"|(?P<amount2>\d[\d,]*(?:\.\d+)?)\s?(?P<k2>k\b)?\s?(?P<code>USD|EUR|GBP|JPY|AUD|CAD|SGD|THB|IDR|INR|dollars|euros)\b"
+)
+_PER_DAY_USD_TIERS = ((120.0, "budget"), (400.0, "mid-range"))  # above the last bound: luxury
+
+_MONTHS = ("January", "February", "March", "April", "May", "June", "July", "August", "September", "October",
+           "November", "December")
+_WHEN_PATTERN = re.compile(
+    r"\b(" + "|".join(_MONTHS) + r")\b|\b(spring|summer|autumn|fall|winter|christmas|new year'?s?|cherry blossom season)\b",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class Place:
+    """A destination mentioned in the request, resolved against the gazetteer when possible."""
+    name: str
+    kind: str  # "city", "country" or "place" (not in the gazetteer)
+    country: Optional[str] = None
+    confidence: float = 1.0
+
+
+@dataclass(frozen=True)
+class TripSpec:
+    """
+    Structured view of a travel request. Fields the request does not mention hold
+    defaults; confidence maps each field to how sure the parser is (0 = defaulted).
+    """
+    query: str
+    destinations: Tuple[Place, ...] = ()
+    region: Optional[str] = None
+    origin: Optional[str] = None
+    days: int = DEFAULT_TRIP_DAYS
+    travelers: Optional[int] = None
+    traveler_type: Optional[str] = None
+    interests: Tuple[str, ...] = ()
+    budget_tier: str = DEFAULT_BUDGET_TIER
+    budget_amount: Optional[float] = None
+    budget_currency: Optional[str] = None
+    when: Optional[str] = None
+    confidence: Mapping[str, float] = field(default_factory=dict)
+
+    def __post_init__(self):
+        object.__setattr__(self, "destinations", tuple(self.destinations))
+        object.__setattr__(self, "interests", tuple(self.interests))
+        object.__setattr__(self, "confidence", MappingProxyType(dict(self.confidence)))
+
+    @property
+    def destination(self) -> Optional[str]:
+        """The main destination as a search-friendly string, e.g. "Kyoto, Japan"."""
+        if not self.destinations:
+            return None
+        place = self.destinations[0]
+        country = self.region if self.region and self.region != place.name else place.country
+        return f"{place.name}, {country}" if place.kind != "country" and country else place.name
+
+    @property
+    def is_multi_city(self) -> bool:
+        return len(self.destinations) >= 2
+
+    def for_leg(self, name: str, days: int) -> "TripSpec":
+        """The spec of one leg of a multi-city trip."""
+        place = next((p for p in self.destinations if p.name == name), Place(name, "place"))
+        return replace(self, destinations=(place,), days=days)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """JSON-friendly form, for run metadata, checkpoints and traces."""
+        data = {k: getattr(self, k) for k in self.__dataclass_fields__ if k not in ("destinations", "confidence")}
+        data["interests"] = list(self.interests)
+        data["destinations"] = [asdict(p) for p in self.destinations]
+        data["confidence"] = dict(self.confidence)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "TripSpec":
+        values = dict(data)
+        values["destinations"] = tuple(Place(**p) for p in values.get("destinations", ()))
+        return cls(**values)
+
+
+class Gazetteer:
+    """
+    Cities and countries (with aliases) keyed by their lowercased word sequence, so
+    matching is a few dict lookups per word of the request (longest name first).
+    """
+
+    def __init__(self, countries: List[dict], cities: List[dict]):
+        self.entries: Dict[Tuple[str, ...], Place] = {}
+        for country in countries:
+            for name in [country["name"], *country.get("aliases", ())]:
+                self.entries.setdefault(_words(name), Place(country["name"], "country"))
+        for city in cities:
+            for name in [city["name"], *city.get("aliases", ())]:
+                self.entries[_words(name)] = Place(city["name"], "city", city.get("country"))
+        self.max_words = max((len(key) for key in self.entries), default=1)
+        self.first_words = {key[0] for key in self.entries if key}
+
+    def find(self, text: str) -> List[Tuple[int, str, Place]]:
+        """(position, matched text, place) for every gazetteer name in the text, in order."""
+        tokens = list(_TOKEN_PATTERN.finditer(text))
+        words = [t.group(0).lower() for t in tokens]
+        found, i = [], 0
+        while i < len(tokens):
+            if words[i] not in self.first_words:
+                i += 1
+                continue
+            for n in range(min(self.max_words, len(tokens) - i), 0, -1):
+                place = self.entries.get(tuple(words[i:i + n]))
+                if place is not None:
+                    start, end = tokens[i].start(), tokens[i + n - 1].end()
+                    found.append((start, text[start:end], place))
+                    i += n
+                    break
+            else:
+                i += 1
+        return found
+
+    def lookup(self, name: str) -> Optional[Place]:
+        return self.entries.get(_words(name))
+
+
+def _words(text: str) -> Tuple[str, ...]:
+    return tuple(w.lower() for w in _TOKEN_PATTERN.findall(text))
+
+
+@lru_cache(maxsize=1)
+def load_gazetteer() -> Gazetteer:
+    """Load and index the gazetteer (cached for the life of the process)."""
+    with open(GAZETTEER_PATH, encoding="utf-8") as f:
+        data = json.load(f)
+    return Gazetteer(data.get("countries", []), data.get("cities", []))
+
+
+def _number(token: str) -> int:
+    return int(token) if token.isdigit() else _NUMBER_WORDS[token.lower()]
+
+
+def _parse_days(query: str) -> Tuple[int, float]:
+    match = _DAYS_PATTERN.search(query)
+    if match:
+        return _number(match.group(1)), 0.95 if match.group(1).isdigit() else 0.9
+    match = _NIGHTS_PATTERN.search(query)
+    if match:
+        return _number(match.group(1)) + 1, 0.85
+    match = _WEEKS_PATTERN.search(query)
+    if match:
+        return 7 * (_number(match.group(1)) if match.group(1) else 1), 0.8
+    match = _WEEKEND_PATTERN.search(query)
+    if match:
+        return (3 if match.group(1) else 2), 0.7
+    return DEFAULT_TRIP_DAYS, 0.0
+
+
+def _trusted(query: str, start: int, matched: str, place: Place) -> Optional[float]:
+    """Confidence for a gazetteer hit, or None when an ambiguous name is probably a common word."""
+    capitalized = matched[:1].isupper()
+    if matched.lower() in _AMBIGUOUS_PLACES:
+        sentence_start = not query[:start].strip() or query[:start].rstrip()[-1:] in ".!?\n"
+        return 0.6 if capitalized and not sentence_start else None
+    return 0.95 if capitalized else 0.75
+
+
+def _place_role(query: str, start: int) -> str:
+    """How the words before a place introduce it: "origin", "excluded", "destination" or "" (unclear)."""
+    before = query[max(0, start - 40):start]
+    if _ORIGIN_PATTERN.search(before):
+        return "origin"
+    if _NOT_DESTINATION_PATTERN.search(before):
+        return "excluded"
+    return "destination" if _DESTINATION_PATTERN.search(before) else ""
+
+
+def _parse_leg_list(query: str, gazetteer: Gazetteer) -> Optional[Tuple[List[Place], Optional[str]]]:
+    """
+    An explicit leg list, "Thailand (Bangkok, Chiang Mai, Islands)": (legs, region) when the
+    parentheses follow a destination in the gazetteer or every item is in the gazetteer, so
+    "my interests (Temples, Food)" or "from London (Heathrow, Terminal 5)" are not legs.
+    """
+    for match in _LEG_LIST_PATTERN.finditer(query):
+        items = [i.strip() for i in _LEG_SEPARATOR_PATTERN.split(match.group(2)) if i.strip()]
+        if len(items) < 2 or not all(i[0].isupper() and len(i.split()) <= 4 for i in items):
+            continue
+        region = match.group(1)
+        places = [gazetteer.lookup(item) or (gazetteer.lookup(f"{region} {item}") if region else None)
+                  for item in items]
+        region_is_destination = bool(region) and gazetteer.lookup(region) is not None \
+            and _place_role(query, match.start(1)) in ("destination", "")
+        if not region_is_destination and not all(places):
+            continue
+        legs = [replace(place, confidence=0.95) if place else Place(item, "place", region, 0.6)
+                for item, place in zip(items, places)]
+        return legs, region
+    return None
+
+
+def _parse_places(query: str) -> Tuple[List[Place], Optional[str], Optional[str], float]:
+    """(destinations in travel order, region, origin, confidence)."""
+    gazetteer = load_gazetteer()
+
+    # An explicit leg list wins: "Thailand (Bangkok, Chiang Mai, Islands)"
+    leg_list = _parse_leg_list(query, gazetteer)
+    if leg_list is not None:
+        return leg_list[0], leg_list[1], None, 0.9
+
+    # Places introduced as destinations ("to Rome", "through Japan and Korea") are the trip;
+    # other mentions count only when the request introduces none
+    origin: Optional[str] = None
+    introduced: List[Place] = []
+    mentioned: List[Place] = []
+    previous_end = None
+    for start, matched, place in gazetteer.find(query):
+        confidence = _trusted(query, start, matched, place)
+        if confidence is None:
+            continue
+        role = _place_role(query, start)
+        if role == "origin":
+            origin = origin or place.name
+            continue
+        if role == "excluded":
+            continue
+        place = replace(place, confidence=confidence)
+        continues_list = previous_end is not None and _LIST_CONTINUATION_PATTERN.fullmatch(query[previous_end:start])
+        if role == "destination" or (continues_list and introduced):
+            # "Lisbon, then Porto": the list's earlier items are destinations too
+            if continues_list and not introduced and mentioned:
+                introduced.append(mentioned[-1])
+            if all(p.name != place.name for p in introduced):
+                introduced.append(place)
+        elif all(p.name != place.name for p in mentioned):
+            mentioned.append(place)
+        previous_end = start + len(matched)
+    places = introduced or mentioned
+
+    # "Kyoto, Japan": the country only qualifies its cities
+    city_countries = {p.country for p in places if p.kind == "city"}
+    destinations = [p for p in places if not (p.kind == "country" and p.name in city_countries)]
+    region = next((p.name for p in places if p.kind == "country" and p.name in city_countries), None)
+    if len(city_countries) > 1:
+        region = None
+    confidence = min((p.confidence for p in destinations), default=0.0)
+    return destinations, region, origin, confidence
+
+
+def _parse_travelers(query: str) -> Tuple[Optional[int], Optional[str], float]:
+    for pattern, kind in _COUNTED_TRAVELER_RULES:
+        match = pattern.search(query)
+        if match:
+            count = _number(match.group(1))
+            return count, "couple" if count == 2 and kind == "group" else kind, 0.9
+    for pattern, count, kind in _TRAVELER_RULES:
+        if pattern.search(query):
+            return count, kind, 0.9 if count is not None else 0.7
+    return None, None, 0.0
+
+
+def _parse_interests(query: str) -> Tuple[List[str], float]:
+    match = _INTERESTS_PATTERN.search(query)
+    if match:
+        phrase = _INTEREST_STOP.sub("", match.group(1))
+        interests = [i.strip().lower() for i in _INTEREST_SPLIT.split(phrase) if i.strip()]
+        if interests:
+            return interests, 0.9
+    keywords = list(dict.fromkeys(m.lower() for m in _INTEREST_KEYWORD_PATTERN.findall(query)))
+    return keywords, 0.6 if keywords else 0.0
+
+
+def _parse_budget(query: str, days: int, travelers: Optional[int]) -> Tuple[str, Optional[float], Optional[str], float]:
+    amount = currency = None
+    match = _AMOUNT_PATTERN.search(query)
+    if match:
+        raw = match.group("amount") or match.group("amount2")
+        amount = float(raw.replace(",", "")) * (1000 if match.group("k") or match.group("k2") else 1)
+        code = match.group("code")
+        currency = {"dollars": "USD", "euros": "EUR"}.get((code or "").lower(), code) if code \
+            else _CURRENCY_SYMBOLS[match.group("symbol").rstrip(".")]
+
+    for tier, pattern in _BUDGET_TIERS:
+        if pattern.search(query):
+            return tier, amount, currency, 0.9
+
+    usd = convert_to_usd(amount, currency) if amount and currency else None
+    if usd:
+        per_day = usd / max(days, 1) / max(travelers or 1, 1)
+        tier = next((t for bound, t in _PER_DAY_USD_TIERS if per_day < bound), "luxury")
+        return tier, amount, currency, 0.6
+    return DEFAULT_BUDGET_TIER, amount, currency, 0.0
+
+
+@lru_cache(maxsize=1024)
+def parse_trip_spec(query: str) -> TripSpec:
+    """Parse a travel request into a TripSpec. Pure, local and cached: safe to call from every step."""
+    destinations, region, origin, places_confidence = _parse_places(query)
+    days, days_confidence = _parse_days(query)
+    travelers, traveler_type, travelers_confidence = _parse_travelers(query)
+    interests, interests_confidence = _parse_interests(query)
+    budget_tier, amount, currency, budget_confidence = _parse_budget(query, days, travelers)
+    when_match = _WHEN_PATTERN.search(query)
+
+    return TripSpec(
+        query=query,
+        destinations=tuple(destinations),
+        region=region,
+        origin=origin,
+        days=days,
+        travelers=travelers,
+        traveler_type=traveler_type,
+        interests=tuple(interests),
+        budget_tier=budget_tier,
+        budget_amount=amount,
+        budget_currency=currency,
+        when=when_match.group(0).title() if when_match else None,
+        confidence={
+            "destinations": places_confidence,
+            "days": days_confidence,
+            "travelers": travelers_confidence,
+            "interests": interests_confidence,
+            "budget_tier": budget_confidence,
+            "when": 0.9 if when_match else 0.0,
+        },
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parse a travel request into a trip spec.")
+    parser.add_argument("query", help="Free-text travel request")
+    args = parser.parse_args()
+
+    load_gazetteer()  # compile once, outside the timing
+    start = time.perf_counter()
+    spec = parse_trip_spec.__wrapped__(args.query)
+    elapsed_us = (time.perf_counter() - start) * 1e6
+    print(json.dumps(spec.as_dict(), indent=2, ensure_ascii=False))
+    print(f"Parsed in {elapsed_us:,.0f} µs")
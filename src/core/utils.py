@@ -1,6 +1,42 @@
 """Utility functions for agent observation and wrapping."""
+import asyncio
+import inspect
+import time
+from typing import Any
 from agno.agent import Agent
 from langfuse import observe
+from core.diagnostics import activity
+from core.metrics import llm_calls, llm_tokens, tool_calls_per_run
+from core.run_budget import current_budget
+
+# Agno reports most run failures through the returned output's status instead of raising
+def _run_outcome(result: Any) -> str:
+    return "error" if str(getattr(result, "status", "")).lower().endswith("error") else "ok"
+
+
+# Charge a finished agent run to the current plan_trip run's budget (no-op outside budget_scope)
+def _charge_budget(agent: Agent, agent_name: str, result: Any, started: float) -> None:
+    budget = current_budget()
+    if budget is not None and getattr(result, "metrics", None) is not None:
+        budget.charge(agent_name, getattr(agent.model, "id", ""), result.metrics, time.perf_counter() - started)
+
+
+# Count a finished agent run's tokens; cached input tokens show how much of the prompt the provider's cache served
+def _record_tokens(agent_name: str, result: Any) -> None:
+    metrics = getattr(result, "metrics", None)
+    if metrics is None:
+        return
+    for kind, attribute in (("input", "input_tokens"), ("cached", "cache_read_tokens"), ("output", "output_tokens")):
+        tokens = getattr(metrics, attribute, 0) or 0
+        if tokens:
+            llm_tokens.inc(agent_name, kind, amount=tokens)
+
+
+# Count the tool calls of a finished run of an agent that has tools
+def _record_tool_calls(agent: Agent, agent_name: str, result: Any) -> None:
+    if agent.tools and result is not None:
+        tool_calls_per_run.observe(len(getattr(result, "tools", None) or []), agent_name)
+
 
 # Function to make an agent observable for Langfuse tracing
 def make_agent_observable(agent: Agent, agent_name: str) -> None:
@@ -25,7 +61,18 @@ def make_agent_observable(agent: Agent, agent_name: str) -> None:
         
         # NOTE: We need this synchronous wrapper because the 'Manager' (critique_agent)
         # in workflows/critique_logic.py is called using .run() inside a sync step.
-        return original_run_method(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            with activity(agent_name):
+                result = original_run_method(*args, **kwargs)
+        except Exception:
+            llm_calls.inc(agent_name, "error")
+            raise
+        llm_calls.inc(agent_name, _run_outcome(result))
+        _record_tokens(agent_name, result)
+        _record_tool_calls(agent, agent_name, result)
+        _charge_budget(agent, agent_name, result, started)
+        return result
     
     # 3. Replace the agent's .run method with our new observed wrapper.
     #    Now, whenever agent.run() is called, run_with_observation() runs instead.
@@ -38,7 +85,35 @@ def make_agent_observable(agent: Agent, agent_name: str) -> None:
     async def arun_with_observation(*args, **kwargs):
         # IMPORTANT: Original async method is awaited exactly ONCE.
         # No double-execution happens here.
-        return await original_arun_method(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            with activity(agent_name):
+                result = await original_arun_method(*args, **kwargs)
+        except Exception:
+            llm_calls.inc(agent_name, "error")
+            raise
+        llm_calls.inc(agent_name, _run_outcome(result))
+        _record_tokens(agent_name, result)
+        _record_tool_calls(agent, agent_name, result)
+        _charge_budget(agent, agent_name, result, started)
+        return result
     
     agent.arun = arun_with_observation  # type: ignore[method-assign]
 
+
+
+# Function to resolve the different return types of Workflow.arun across agno versions
+async def collect_run_output(response: Any) -> Any:
+    """
+    Agno versions differ: some return WorkflowRunOutput directly from arun(),
+    others a coroutine or an AsyncIterator of events. Returns the final output.
+    """
+    if asyncio.iscoroutine(response):
+        return await response
+    if inspect.isasyncgen(response):
+        result = None
+        async for item in response:
+            result = item
+        return result
+    # Already a WorkflowRunOutput (sync return)
+    return response
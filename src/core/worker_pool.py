@@ -0,0 +1,318 @@
+"""Supervisor that runs plan_trip in N worker processes behind one Gradio front."""
+import asyncio
+import importlib
+import multiprocessing
+import os
+import pickle
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Dict, List, Optional
+from agno.run.base import RunStatus
+from agno.run.workflow import WorkflowRunOutput
+from core.cancellation import RunCancelled
+from core.metrics import Counter, absorb_metrics, retire_metrics, snapshot_metrics
+from core.shared_cache import cache_key
+
+# Worker processes (0 runs plans in the front process itself)
+PLAN_WORKERS = int(os.getenv("PLAN_WORKERS", "0"))
+# Plans one worker runs concurrently on its event loop (they mostly wait on LLM and search calls)
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "4"))
+# How often each worker pushes its metrics to the front
+WORKER_METRICS_INTERVAL_SECONDS = float(os.getenv("WORKER_METRICS_INTERVAL_SECONDS", "5"))
+
+worker_restarts = Counter(
+    "travel_worker_restarts_total",
+    "Worker processes restarted after exiting unexpectedly",
+)
+
+
+def _resolve(target: str) -> Callable:
+    """Import 'module:attribute'."""
+    module, _, attribute = target.partition(":")
+    return getattr(importlib.import_module(module), attribute)
+
+
+def _worker_main(index: int, conn: Connection, plan_target: str, cancel_target: str) -> None:
+    """
+    Worker process: run each plan request as a task on one event loop and report its
+    outcome. A reader thread feeds the pipe's messages into the loop; another pushes
+    metric snapshots.
+    """
+    plan_trip, cancel_trip = _resolve(plan_target), _resolve(cancel_target)
+    send_lock = threading.Lock()
+    stopped = threading.Event()
+
+    def send(message: tuple) -> None:
+        with send_lock:
+            conn.send(message)
+
+    async def run(job_id: str, query: str, run_id: str, executor: Optional[str]) -> None:
+        try:
+            result = await plan_trip(query, run_id=run_id, executor=executor)
+        except RunCancelled as e:
+            send(("cancelled", job_id, e.reason))
+        except asyncio.CancelledError:  # cancelled before plan_trip registered the run, or shutting down
+            send(("cancelled", job_id, "cancelled before the run started"))
+        except Exception as e:
+            try:
+                pickle.dumps(e)
+            except Exception:
+                e = RuntimeError(f"{type(e).__name__}: {e}")
+            send(("error", job_id, e))
+        else:
+            # Status and metadata (degraded inputs, budget stop) travel with the content, so the front
+            # sees failed and degraded plans exactly as the in-process plan_trip reports them
+            if result is None:
+                send(("done", job_id, None))
+            else:
+                status = getattr(result, "status", None)
+                send(("done", job_id, (getattr(result, "content", None), getattr(status, "value", status),
+                                       getattr(result, "metadata", None))))
+        finally:
+            try:
+                send(("metrics", snapshot_metrics()))
+            except (BrokenPipeError, OSError):
+                pass
+
+    async def serve() -> None:
+        loop = asyncio.get_running_loop()
+        inbox: asyncio.Queue = asyncio.Queue()
+
+        def read() -> None:
+            try:
+                while True:
+                    message = conn.recv()
+                    loop.call_soon_threadsafe(inbox.put_nowait, message)
+                    if message[0] == "stop":
+                        return
+            except (EOFError, OSError):  # the front went away
+                loop.call_soon_threadsafe(inbox.put_nowait, ("stop",))
+
+        threading.Thread(target=read, name="worker-inbox", daemon=True).start()
+        tasks: Dict[str, asyncio.Task] = {}  # by run_id
+        while True:
+            message = await inbox.get()
+            if message[0] == "run":
+                run_id = message[3]
+                task = tasks[run_id] = asyncio.ensure_future(run(*message[1:]))
+                task.add_done_callback(lambda done, run_id=run_id: tasks.pop(run_id, None))
+            elif message[0] == "cancel":
+                run_id, reason = message[1:]
+                if not cancel_trip(run_id, reason) and run_id in tasks:
+                    tasks[run_id].cancel()
+            elif message[0] == "stop":
+                for task in tasks.values():
+                    task.cancel()
+                await asyncio.gather(*tasks.values(), return_exceptions=True)
+                return
+
+    def push_metrics() -> None:
+        while not stopped.wait(WORKER_METRICS_INTERVAL_SECONDS):
+            try:
+                send(("metrics", snapshot_metrics()))
+            except (BrokenPipeError, OSError):
+                return
+
+    threading.Thread(target=push_metrics, name="worker-metrics", daemon=True).start()
+    send(("ready", os.getpid()))
+    try:
+        asyncio.run(serve())
+    finally:
+        stopped.set()
+
+
+@dataclass
+class _Job:
+    future: asyncio.Future
+    loop: asyncio.AbstractEventLoop
+    run_id: str
+    key: str = ""
+
+
+@dataclass
+class _Worker:
+    index: int
+    process: Any
+    conn: Connection
+    source: str
+    jobs: Dict[str, _Job] = field(default_factory=dict)
+    alive: bool = True
+    send_lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def send(self, message: tuple) -> None:
+        with self.send_lock:
+            self.conn.send(message)
+
+
+class WorkerPool:
+    """
+    N spawned worker processes, each running the plan function on its own event loop, so
+    CPU-side work (structured-output parsing, report rendering, span export) uses N cores.
+    The front process keeps the Gradio queue and sessions; pool.plan_trip and
+    pool.cancel_trip stand in for main.plan_trip and main.cancel_trip. Requests go to the
+    least-loaded worker, except that a request identical to one in flight (same query and
+    executor) goes to the worker running it, so the two coalesce there; a cancel goes to
+    the worker running that run_id.
+    Workers share the checkpoint and shared-cache SQLite files, write their own trace spool,
+    and push metric snapshots that the front's /metrics endpoint serves as one set of totals.
+    A worker that exits is restarted; its in-flight requests fail so they can be resubmitted.
+    """
+
+    def __init__(self, workers: int = PLAN_WORKERS, plan_target: str = "main:plan_trip",
+                 cancel_target: str = "main:cancel_trip"):
+        self.size = max(workers, 1)
+        self.plan_target = plan_target
+        self.cancel_target = cancel_target
+        self._context = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._spawn_lock = threading.Lock()
+        self._workers: List[_Worker] = []
+        self._closing = False
+
+    @property
+    def capacity(self) -> int:
+        """Plans the pool runs at once (the front's queue should admit this many)."""
+        return self.size * WORKER_CONCURRENCY
+
+    def start(self) -> "WorkerPool":
+        """Spawn every worker and wait until each has imported the app."""
+        self._workers = [self._spawn(index) for index in range(self.size)]
+        print(f"Started {self.size} plan worker process(es), {WORKER_CONCURRENCY} concurrent plans each")
+        return self
+
+    def _spawn(self, index: int) -> _Worker:
+        front, back = self._context.Pipe()
+        # Each worker spools its own trace exports; the spool is set up when the child imports the app
+        spool_dir = os.path.join(os.getenv("TRACE_SPOOL_DIR", ".trace_spool"), f"worker-{index}")
+        with self._spawn_lock:
+            previous = os.environ.get("TRACE_SPOOL_DIR")
+            os.environ["TRACE_SPOOL_DIR"] = spool_dir
+            try:
+                process = self._context.Process(
+                    target=_worker_main, args=(index, back, self.plan_target, self.cancel_target),
+                    name=f"plan-worker-{index}", daemon=True,
+                )
+                process.start()
+            finally:
+                if previous is None:
+                    os.environ.pop("TRACE_SPOOL_DIR", None)
+                else:
+                    os.environ["TRACE_SPOOL_DIR"] = previous
+        back.close()
+
+        message = front.recv()  # ("ready", pid)
+        worker = _Worker(index=index, process=process, conn=front, source=f"worker-{index}-{message[1]}")
+        threading.Thread(target=self._read, args=(worker,), name=f"plan-worker-{index}-reader", daemon=True).start()
+        return worker
+
+    def _read(self, worker: _Worker) -> None:
+        """Resolve the worker's jobs as its messages arrive; restart it if it exits."""
+        try:
+            while True:
+                message = worker.conn.recv()
+                kind = message[0]
+                if kind == "metrics":
+                    absorb_metrics(worker.source, message[1])
+                    continue
+                with self._lock:
+                    job = worker.jobs.pop(message[1], None)
+                if job is None:
+                    continue
+                if kind == "done":
+                    self._resolve(job, result=message[2])
+                elif kind == "cancelled":
+                    self._resolve(job, error=RunCancelled(job.run_id, message[2]))
+                else:
+                    self._resolve(job, error=message[2])
+        except (EOFError, OSError):
+            pass
+
+        retire_metrics(worker.source)
+        with self._lock:
+            worker.alive = False
+            orphans, worker.jobs = list(worker.jobs.values()), {}
+        for job in orphans:
+            self._resolve(job, error=RuntimeError("Plan worker exited before the run finished"))
+        if self._closing:
+            return
+        worker.process.join(timeout=1)
+        print(f"Plan worker {worker.index} exited (code {worker.process.exitcode}); restarting")
+        worker_restarts.inc()
+        try:
+            replacement = self._spawn(worker.index)
+        except (EOFError, OSError) as e:
+            print(f"Plan worker {worker.index} failed to restart: {e}")
+            return
+        with self._lock:
+            self._workers[worker.index] = replacement
+
+    @staticmethod
+    def _resolve(job: _Job, result: Any = None, error: Optional[BaseException] = None) -> None:
+        def settle() -> None:
+            if job.future.done():
+                return
+            if error is not None:
+                job.future.set_exception(error)
+            else:
+                job.future.set_result(result)
+        job.loop.call_soon_threadsafe(settle)
+
+    async def plan_trip(self, query: str, run_id: Optional[str] = None, executor: Optional[str] = None) -> Any:
+        """Run plan_trip on a worker (see the class docstring); same contract as main.plan_trip."""
+        from workflows.executors import get_executor  # the front imports the app anyway; core stays import-light
+
+        run_id = run_id or uuid.uuid4().hex
+        job_id = uuid.uuid4().hex
+        loop = asyncio.get_running_loop()
+        # Keyed like main.plan_trip's coalescing, so "no executor" and the default executor's name match
+        job = _Job(future=loop.create_future(), loop=loop, run_id=run_id,
+                   key=cache_key(get_executor(executor).name, query))
+        with self._lock:
+            workers = [w for w in self._workers if w.alive]
+            if not workers:
+                raise RuntimeError("No plan worker is running")
+            worker = next((w for w in workers if any(j.key == job.key for j in w.jobs.values())), None) \
+                or min(workers, key=lambda w: len(w.jobs))
+            worker.jobs[job_id] = job
+        worker.send(("run", job_id, query, run_id, executor))
+
+        try:
+            outcome = await job.future
+        except asyncio.CancelledError:
+            # The caller went away (e.g. Gradio cancelled the event): stop the worker's run too
+            self.cancel_trip(run_id, "request cancelled")
+            raise
+        if outcome is None:
+            return None
+        content, status, metadata = outcome
+        return WorkflowRunOutput(input=query, content=content, run_id=run_id,
+                                 status=RunStatus(status) if status else RunStatus.completed, metadata=metadata)
+
+    def cancel_trip(self, run_id: str, reason: str = "cancelled by user") -> bool:
+        """Cancel a run on whichever worker has it in flight. False if none does."""
+        with self._lock:
+            worker = next((w for w in self._workers if any(j.run_id == run_id for j in w.jobs.values())), None)
+        if worker is None:
+            return False
+        try:
+            worker.send(("cancel", run_id, reason))
+        except (BrokenPipeError, OSError):
+            return False
+        return True
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Stop every worker, cancelling the runs they have in flight."""
+        self._closing = True
+        for worker in self._workers:
+            try:
+                worker.send(("stop",))
+            except (BrokenPipeError, OSError):
+                pass
+        deadline = time.monotonic() + timeout
+        for worker in self._workers:
+            worker.process.join(timeout=max(deadline - time.monotonic(), 0))
+            if worker.process.is_alive():
+                worker.process.terminate()
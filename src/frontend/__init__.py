@@ -1,4 +1,4 @@
 """Frontend module for the Travel Planning Application."""
-from .app import create_gradio_interface
+from .app import EXAMPLE_QUERIES, create_gradio_interface
 
-__all__ = ["create_gradio_interface"]
+__all__ = ["EXAMPLE_QUERIES", "create_gradio_interface"]
@@ -1,13 +1,33 @@
 """Gradio interface for the Travel Planning Workflow."""
+import uuid
 import gradio as gr
+from core.cancellation import RunCancelled
+from core.checkpoints import CHECKPOINT_TTL_HOURS
+from frontend.session_store import BoundedStore
 
+# Executor requested by the "Fast mode" checkbox (unchecked requests use the server's PLAN_EXECUTOR)
+FAST_EXECUTOR = "fast"
 
-def create_gradio_interface(plan_trip_func):
+# Example queries shown under the query box (also the load generator's query mix)
+EXAMPLE_QUERIES = [
+    "Plan a 7-day romantic trip to Paris, France for a couple. Include museums, fine dining, and scenic walks. Luxury budget.",
+    "Plan a 5-day adventure trip to Bali, Indonesia for a solo traveler. Focus on surfing, hiking, and local culture. Budget-friendly.",
+    "Plan a 4-day family trip to Tokyo, Japan with 2 kids (ages 8 and 10). Include kid-friendly activities, theme parks, and safe accommodations. Mid-range budget.",
+    "Plan a 6-day cultural immersion trip to Istanbul, Turkey. Interested in history, architecture, and authentic Turkish cuisine. Mid-range budget.",
+    "Plan a 10-day backpacking trip through Thailand (Bangkok, Chiang Mai, Islands). Focus on street food, temples, and beaches. Budget-conscious."
+]
+
+
+def create_gradio_interface(plan_trip_func, cancel_trip_func=None):
     """
     Create a modern Gradio interface for the travel planning workflow.
     
     Args:
-        plan_trip_func: The async function that runs the travel planning workflow
+        plan_trip_func: The async function that runs the travel planning workflow,
+            called as plan_trip_func(query, run_id=..., executor=...) (executor is None
+            unless fast mode is selected)
+        cancel_trip_func: Optional function called as cancel_trip_func(run_id, reason) to stop
+            a session's in-flight run when the user clears, submits a new query or leaves the page
         
     Returns:
         tuple: (gr.Blocks interface, str css, gr.Theme theme) for launch()
@@ -171,16 +191,44 @@ def create_gradio_interface(plan_trip_func):
     }
     """
     
-    # Store the latest travel plan for export
-    latest_travel_plan = {"content": ""}
+    # Run IDs of failed runs by query, so resubmitting the same query resumes
+    # from the last checkpointed step instead of starting over (kept as long as their checkpoints)
+    failed_run_ids = BoundedStore("failed_runs", ttl_seconds=CHECKPOINT_TTL_HOURS * 3600)
+    # Run currently in flight for each browser session (keyed by Gradio session hash)
+    in_flight_run_ids = {}
+
+    def cancel_session_run(request: gr.Request, reason: str):
+        """Cancel the run this browser session has in flight, if any."""
+        session = request.session_hash if request else None
+        run_id = in_flight_run_ids.pop(session, None) if session else None
+        if run_id and cancel_trip_func:
+            cancel_trip_func(run_id, reason)
+
+    def cancel_superseded_run(request: gr.Request):
+        cancel_session_run(request, "superseded by a new query")
+
+    def cancel_abandoned_run(request: gr.Request):
+        cancel_session_run(request, "page closed")
+
+    def clear_interface(request: gr.Request):
+        cancel_session_run(request, "cleared by user")
+        return (
+            "",
+            "**Ready to plan your trip!** Enter your query and click 'Generate Travel Plan'.",
+            "",
+            gr.update(visible=False),
+            ""
+        )
     
     # Async handler for Gradio (Gradio 6.x natively supports async event handlers)
-    async def run_travel_planner(query: str):
+    async def run_travel_planner(query: str, fast_mode: bool, request: gr.Request):
         """
         Async handler to run the travel planning workflow.
 
         Args:
             query: User's travel planning query
+            fast_mode: Run the fast pipeline (one combined research agent, one planner pass, no review)
+            request: Gradio request, used to track the session's in-flight run
 
         Returns:
             tuple: (status_message, result_markdown, copy_btn_visible, markdown_storage)
@@ -193,13 +241,36 @@ def create_gradio_interface(plan_trip_func):
                 ""  # Clear markdown storage
             )
 
+        executor = FAST_EXECUTOR if fast_mode else None
+        # Keyed by mode too, so a failed run only resumes in the pipeline that checkpointed it
+        query_key = f"{executor or 'default'}|{query.strip()}"
+        run_id = failed_run_ids.pop(query_key) or uuid.uuid4().hex
+        session = request.session_hash if request else None
+        if session:
+            in_flight_run_ids[session] = run_id
+
         try:
-            result = await plan_trip_func(query)
+            result = await plan_trip_func(query, run_id=run_id, executor=executor)
+            # Agno reports most run failures through the status; handle them like raised errors (resumable)
+            if result is not None and str(getattr(result, "status", "")).lower().endswith("error"):
+                raise RuntimeError(f"The planning run ended with an error: {result.content or 'no details'}")
 
             if result and result.content:
                 status_msg = "**Travel Plan Generated Successfully!**"
 
                 # Format the result
+                if fast_mode:
+                    workflow_info = """- **Workflow:** Fast Travel Planning (single pass)
+- **Research Agent:** Combined Researcher (destination, hotels and activities in one run)
+- **Planning Agent:** Itinerary Planner (Team Lead)
+- **Review Agent:** None (fast mode skips the Manager review)
+- **Status:** Complete"""
+                else:
+                    workflow_info = """- **Workflow:** Travel Planning with Manager Approval
+- **Research Agents:** Destination, Hotels, Activities (ran in parallel)
+- **Planning Agent:** Itinerary Planner (Team Lead)
+- **Review Agent:** Critique Agent (Manager)
+- **Status:** Approved and Complete"""
                 result_markdown = f"""
 
 {result.content}
@@ -207,19 +278,12 @@ def create_gradio_interface(plan_trip_func):
 ---
 
 ### Workflow Information
-- **Workflow:** Travel Planning with Manager Approval
-- **Research Agents:** Destination, Hotels, Activities (ran in parallel)
-- **Planning Agent:** Itinerary Planner (Team Lead)
-- **Review Agent:** Critique Agent (Manager)
-- **Status:** Approved and Complete
+{workflow_info}
 
 ---
 
 *Generated by Travel Planning AI Workflow*
 """
-                # Store the latest plan for export
-                latest_travel_plan["content"] = result_markdown
-
                 return (
                     status_msg,
                     result_markdown,
@@ -234,8 +298,17 @@ def create_gradio_interface(plan_trip_func):
                     ""  # Clear markdown storage
                 )
 
+        except RunCancelled as e:
+            return (
+                f"**Planning cancelled** ({e.reason}).",
+                "## Cancelled\n\nThe previous request was stopped before it finished.",
+                gr.update(visible=False),  # Hide copy button
+                ""  # Clear markdown storage
+            )
+
         except Exception as e:
-            error_msg = f"**Error occurred during planning:** {str(e)}"
+            failed_run_ids.put(query_key, run_id)
+            error_msg = f"**Error occurred during planning:** {str(e)} (submit the same query again to resume)"
             error_detail = f"""## Error Occurred
 
 **Error Message:**
@@ -258,6 +331,10 @@ Review the README.md for setup instructions.
                 gr.update(visible=False),  # Hide copy button
                 ""  # Clear markdown storage
             )
+
+        finally:
+            if session and in_flight_run_ids.get(session) == run_id:
+                del in_flight_run_ids[session]
     
     # Define theme for launch()
     theme = gr.themes.Base(primary_hue="slate", secondary_hue="slate").set(
@@ -303,6 +380,10 @@ Review the README.md for setup instructions.
             4. **Revision Loop** - If needed, the planner revises based on feedback
             
             5. **Final Delivery** - You receive the manager-approved travel plan!
+
+            **Fast mode** trades depth for speed: one combined researcher covers the destination,
+            hotels and activities in a single run, and the planner drafts the plan once with no
+            Manager review. The plan arrives sooner but has not been checked by a reviewer.
             
             **Observability:** All steps are traced with Langfuse for full transparency.
             """)
@@ -320,6 +401,12 @@ Review the README.md for setup instructions.
                     lines=5,
                     max_lines=10
                 )
+
+                fast_mode = gr.Checkbox(
+                    label="Fast mode",
+                    info="One combined research agent and a single planner pass, with no Manager review. Quicker, less thorough.",
+                    value=False
+                )
                 
                 with gr.Row():
                     submit_btn = gr.Button("Generate Travel Plan", variant="primary", size="lg")
@@ -328,16 +415,8 @@ Review the README.md for setup instructions.
                 # Example queries
                 gr.Markdown("### Example Queries")
                 
-                examples = [
-                    "Plan a 7-day romantic trip to Paris, France for a couple. Include museums, fine dining, and scenic walks. Luxury budget.",
-                    "Plan a 5-day adventure trip to Bali, Indonesia for a solo traveler. Focus on surfing, hiking, and local culture. Budget-friendly.",
-                    "Plan a 4-day family trip to Tokyo, Japan with 2 kids (ages 8 and 10). Include kid-friendly activities, theme parks, and safe accommodations. Mid-range budget.",
-                    "Plan a 6-day cultural immersion trip to Istanbul, Turkey. Interested in history, architecture, and authentic Turkish cuisine. Mid-range budget.",
-                    "Plan a 10-day backpacking trip through Thailand (Bangkok, Chiang Mai, Islands). Focus on street food, temples, and beaches. Budget-conscious."
-                ]
-                
                 gr.Examples(
-                    examples=examples,
+                    examples=EXAMPLE_QUERIES,
                     inputs=query_input,
                     label=None
                 )
@@ -368,24 +447,29 @@ Review the README.md for setup instructions.
         """)
         
         # Event handlers
+        # A new submission first cancels the session's previous run (unqueued, so it
+        # is not stuck behind that run), which frees its worker slot for the new one
         submit_btn.click(
+            fn=cancel_superseded_run,
+            inputs=None,
+            outputs=None,
+            queue=False
+        ).then(
             fn=run_travel_planner,
-            inputs=[query_input],
+            inputs=[query_input, fast_mode],
             outputs=[status_output, result_output, copy_btn, markdown_storage],
             api_name="generate_travel_plan"
         )
         
         clear_btn.click(
-            fn=lambda: (
-                "",
-                "**Ready to plan your trip!** Enter your query and click 'Generate Travel Plan'.",
-                "",
-                gr.update(visible=False),
-                ""
-            ),
+            fn=clear_interface,
             inputs=None,
-            outputs=[query_input, status_output, result_output, copy_btn, markdown_storage]
+            outputs=[query_input, status_output, result_output, copy_btn, markdown_storage],
+            queue=False
         )
+
+        # Closing the page abandons the request; stop it instead of finishing it
+        interface.unload(cancel_abandoned_run)
         
         # Copy button handler - uses JavaScript to copy from hidden textbox
         copy_btn.click(
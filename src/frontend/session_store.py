@@ -0,0 +1,98 @@
+"""Bounded in-memory store for per-session UI state: LRU and TTL eviction under a byte cap."""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from core.metrics import Counter, Gauge
+
+# Default limits of a bounded UI store
+SESSION_STORE_MAX_ENTRIES = int(os.getenv("SESSION_STORE_MAX_ENTRIES", "1000"))
+SESSION_STORE_TTL_SECONDS = float(os.getenv("SESSION_STORE_TTL_SECONDS", "3600"))
+SESSION_STORE_MAX_MB = float(os.getenv("SESSION_STORE_MAX_MB", "32"))
+
+store_evictions = Counter(
+    "travel_session_store_evictions_total",
+    "Entries dropped from bounded UI stores by store and reason (lru, ttl, bytes)",
+    labels=("store", "reason"),
+)
+store_bytes = Gauge(
+    "travel_session_store_bytes",
+    "Approximate bytes held by bounded UI stores",
+    labels=("store",),
+)
+
+
+class BoundedStore:
+    """
+    String values by key, kept in least-recently-used order. An entry expires ttl_seconds
+    after it was last written; the least recently used entries are evicted when the store
+    exceeds max_entries or max_bytes (UTF-8 size of keys and values). Expired entries are
+    dropped on every write, so idle sessions do not hold memory past their TTL.
+    """
+
+    def __init__(self, name: str, max_entries: int = SESSION_STORE_MAX_ENTRIES,
+                 ttl_seconds: float = SESSION_STORE_TTL_SECONDS,
+                 max_bytes: int = int(SESSION_STORE_MAX_MB * 2**20)):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[str, float, int]]" = OrderedDict()  # value, expires_at, size
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def put(self, key: str, value: str) -> None:
+        """Store value under key as the most recently used entry, evicting as needed."""
+        size = len(key.encode("utf-8")) + len(value.encode("utf-8"))
+        with self._lock:
+            self._remove(key)
+            now = time.monotonic()
+            self._entries[key] = (value, now + self.ttl_seconds, size)
+            self._bytes += size
+            store_bytes.inc(self.name, amount=size)
+            self._expire(now)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                reason = "lru" if len(self._entries) > self.max_entries else "bytes"
+                self._remove(next(iter(self._entries)))
+                store_evictions.inc(self.name, reason)
+
+    def get(self, key: str) -> Optional[str]:
+        """The value under key (now the most recently used), or None if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                self._remove(key)
+                store_evictions.inc(self.name, "ttl")
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def pop(self, key: str) -> Optional[str]:
+        """Remove and return the value under key (None if absent or expired)."""
+        value = self.get(key)
+        with self._lock:
+            self._remove(key)
+        return value
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+            store_bytes.dec(self.name, amount=entry[2])
+
+    def _expire(self, now: float) -> None:
+        # Entries are in write/read order, not expiry order, so scan them all (cheap at these sizes)
+        for key in [k for k, (_, expires_at, _) in self._entries.items() if expires_at <= now]:
+            self._remove(key)
+            store_evictions.inc(self.name, "ttl")
@@ -0,0 +1,180 @@
+"""Post-processing of search results before they reach the LLM: boilerplate, dedup, ordering and budgets."""
+import os
+import random
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from core.metrics import Counter
+
+SEARCH_RESULT_MAX_CHARS = int(os.getenv("SEARCH_RESULT_MAX_CHARS", "700"))
+SEARCH_TOTAL_MAX_CHARS = int(os.getenv("SEARCH_TOTAL_MAX_CHARS", "2000"))
+# Estimated Jaccard similarity of word shingles above which a sentence counts as already seen
+SEARCH_DEDUP_THRESHOLD = float(os.getenv("SEARCH_DEDUP_THRESHOLD", "0.7"))
+
+CHARS_PER_TOKEN = 4  # rough English average, good enough for savings stats
+
+_SHINGLE_SIZE = 3
+_BANDS, _ROWS = 16, 4  # MinHash LSH: 64 hashes, candidate pairs at roughly Jaccard >= 0.5
+_HASH_MASKS = tuple(random.Random(37).getrandbits(64) for _ in range(_BANDS * _ROWS))
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])")
+_WORD = re.compile(r"[a-z0-9]+")
+_BOILERPLATE_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    r"\b(accept|use|uses) (all )?cookies\b",
+    r"\bcookie (policy|settings|preferences)\b",
+    r"\bprivacy policy\b|\bterms (of use|and conditions)\b",
+    r"\ball rights reserved\b|©|\(c\) \d{4}",
+    r"\b(subscribe|sign up) (to|for) (our|the) newsletter\b",
+    r"\b(sign in|log in|create an account)\b.{0,20}$",
+    r"^\s*(skip to (main )?content|advertisement|sponsored|read more|see more|show more|load more)\b",
+    r"\b(share (this|on)|follow us on) (facebook|twitter|instagram|pinterest|x)\b",
+    r"\bthis (post|article|page) (may )?contains? affiliate links\b",
+    r"\bwe (may )?earn (a )?(small )?commission\b",
+    r"^\s*(home|menu)\s*[>»/|]",
+    r"\bclick here\b",
+)]
+_MARKUP = re.compile(r"!\[[^\]]*\]\([^)]*\)|\[([^\]]*)\]\([^)]*\)|https?://\S+|<[^>]+>|[#*_]{2,}")
+
+search_tokens = Counter(
+    "travel_search_tokens_total",
+    "Estimated search-result tokens by stage (raw from Tavily, removed by reason, kept for the LLM)",
+    labels=("stage",),
+)
+
+
+@dataclass
+class FilterStats:
+    """Estimated tokens of one search response, before and after filtering."""
+    raw: int = 0
+    boilerplate: int = 0
+    duplicate: int = 0
+    budget: int = 0
+
+    @property
+    def kept(self) -> int:
+        return self.raw - self.boilerplate - self.duplicate - self.budget
+
+    def as_dict(self) -> Dict[str, int]:
+        return {"raw_tokens": self.raw, "kept_tokens": self.kept, "removed_boilerplate_tokens": self.boilerplate,
+                "removed_duplicate_tokens": self.duplicate, "removed_budget_tokens": self.budget}
+
+
+@dataclass
+class SeenSentences:
+    """MinHash LSH index of every sentence already shown to an agent during one run."""
+    exact: Set[str] = field(default_factory=set)
+    buckets: Dict[Tuple[int, Tuple[int, ...]], List[Tuple[int, ...]]] = field(default_factory=dict)
+
+    def is_duplicate(self, sentence: str) -> bool:
+        """True if the sentence, or a near-duplicate of it, was already added."""
+        normalized, signature = _fingerprint(sentence)
+        if normalized in self.exact:
+            return True
+        if signature is None:
+            return False
+        return any(_similarity(signature, other) >= SEARCH_DEDUP_THRESHOLD
+                   for band in _bands(signature) for other in self.buckets.get(band, ()))
+
+    def add(self, sentence: str) -> None:
+        normalized, signature = _fingerprint(sentence)
+        self.exact.add(normalized)
+        if signature is not None:
+            for band in _bands(signature):
+                self.buckets.setdefault(band, []).append(signature)
+
+
+def _fingerprint(sentence: str) -> Tuple[str, Optional[Tuple[int, ...]]]:
+    """Normalized text and MinHash signature (None when too short for shingles to be meaningful)."""
+    words = _WORD.findall(sentence.lower())
+    return " ".join(words), _minhash(words) if len(words) >= _SHINGLE_SIZE + 2 else None
+
+
+def _bands(signature: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+    return [(b, signature[b * _ROWS:(b + 1) * _ROWS]) for b in range(_BANDS)]
+
+
+def _minhash(words: List[str]) -> Tuple[int, ...]:
+    shingles = {hash(tuple(words[i:i + _SHINGLE_SIZE])) for i in range(len(words) - _SHINGLE_SIZE + 1)}
+    return tuple(min(h ^ mask for h in shingles) for mask in _HASH_MASKS)
+
+
+def _similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+# Sentences seen by the current run's searches (None outside search_scope: no cross-call dedup)
+_seen_sentences: ContextVar[Optional[SeenSentences]] = ContextVar("seen_sentences", default=None)
+
+
+@contextmanager
+def search_scope() -> Iterator[SeenSentences]:
+    """Deduplicate search results across every search made inside the block (one workflow run)."""
+    seen = SeenSentences()
+    token = _seen_sentences.set(seen)
+    try:
+        yield seen
+    finally:
+        _seen_sentences.reset(token)
+
+
+def _tokens(chars: int) -> int:
+    return (chars + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _relevance(result: dict, query_terms: Set[str]) -> Tuple[float, float]:
+    """Tavily's score first, query-term overlap of the title and content as the tie-breaker."""
+    words = set(_WORD.findall(f"{result.get('title', '')} {result.get('content', '')}".lower()))
+    overlap = len(query_terms & words) / len(query_terms) if query_terms else 0.0
+    return float(result.get("score") or 0.0), overlap
+
+
+def filter_results(query: str, results: List[dict], per_result_chars: int = SEARCH_RESULT_MAX_CHARS,
+                   total_chars: int = SEARCH_TOTAL_MAX_CHARS) -> Tuple[List[Tuple[str, str]], FilterStats]:
+    """
+    Order results by relevance, strip boilerplate, drop sentences already seen in this run
+    and clip to the per-result and total character budgets.
+    Returns (title, content) pairs and the estimated tokens removed at each stage.
+    """
+    seen = _seen_sentences.get() or SeenSentences()
+    query_terms = set(_WORD.findall(query.lower()))
+    ranked = sorted(results, key=lambda r: _relevance(r, query_terms), reverse=True)
+
+    filtered: List[Tuple[str, str]] = []
+    raw = duplicate = clipped = kept = 0
+    for result in ranked:
+        content = result.get("content") or ""
+        raw += len(content)
+        budget = min(per_result_chars, total_chars - kept)
+
+        sentences: List[str] = []
+        used = 0
+        for sentence in _SENTENCE_SPLIT.split(_MARKUP.sub(r"\1", content)):
+            sentence = " ".join(sentence.split())
+            if not sentence or any(p.search(sentence) for p in _BOILERPLATE_PATTERNS):
+                continue
+            if seen.is_duplicate(sentence):
+                duplicate += len(sentence) + 1
+            elif used + len(sentence) > budget and (sentences or budget < 80):
+                clipped += len(sentence) + 1  # not shown, so not remembered either
+            else:
+                if used + len(sentence) > budget:  # one oversized sentence: keep its head
+                    clipped += len(sentence) - budget
+                    sentence = sentence[:budget].rsplit(" ", 1)[0] + "…"
+                seen.add(sentence)
+                sentences.append(sentence)
+                used += len(sentence) + 1
+
+        if sentences:
+            text = " ".join(sentences)
+            filtered.append((result.get("title") or "No title", text))
+            kept += len(text) + 1
+
+    # Whatever was neither kept, duplicated nor clipped is boilerplate, markup or whitespace
+    stats = FilterStats(raw=_tokens(raw), duplicate=_tokens(duplicate), budget=_tokens(clipped))
+    stats.boilerplate = max(stats.raw - stats.duplicate - stats.budget - _tokens(kept), 0)
+    for stage, value in (("raw", stats.raw), ("kept", stats.kept), ("removed_boilerplate", stats.boilerplate),
+                         ("removed_duplicate", stats.duplicate), ("removed_budget", stats.budget)):
+        search_tokens.inc(stage, amount=value)
+    return filtered, stats
@@ -0,0 +1,58 @@
+"""Per-agent caps on tool calls and search rounds, and tool-call telemetry, applied as an agno tool hook."""
+import asyncio
+import inspect
+from collections import defaultdict
+from typing import Any, Callable, Dict, Optional, Set
+from agno.run.base import RunContext
+from core.metrics import tool_calls
+
+# Returned instead of running a tool once the agent is over a cap, so the model answers with what it has
+LIMIT_MESSAGE = (
+    "Search limit reached: no more searches are available for this task. "
+    "Answer now using the information you already have."
+)
+
+
+def tool_budget_hook(agent_name: str, max_calls: Optional[int] = None, max_rounds: Optional[int] = None) -> Callable:
+    """
+    Tool hook that counts every tool call of an agent by outcome and refuses calls past
+    max_calls per run, or issued in a model turn past the first max_rounds that used tools.
+    The calls of one turn run concurrently (agno gathers them), so rounds rather than
+    calls set the agent's search latency. A model that keeps asking after a refusal is
+    bounded by its step's deadline.
+
+    The hook is async, so agno applies it to agents run with arun (every agent here);
+    agno skips async hooks for synchronous tool execution.
+    """
+    # The hook lives as long as its (per-request) agent
+    calls_by_run: Dict[str, int] = defaultdict(int)
+    rounds_by_run: Dict[str, int] = defaultdict(int)
+    open_rounds: Set[str] = set()
+
+    async def hook(function_name: str, function_call: Callable, arguments: Dict[str, Any],
+                   run_context: Optional[RunContext] = None) -> Any:
+        run_id = getattr(run_context, "run_id", "")
+        calls_by_run[run_id] += 1
+        if run_id not in open_rounds:
+            # agno starts every call of a model turn in one asyncio.gather, so they all reach the
+            # hook before a callback scheduled by the first one runs; that callback ends the round
+            open_rounds.add(run_id)
+            rounds_by_run[run_id] += 1
+            asyncio.get_running_loop().call_soon(open_rounds.discard, run_id)
+        if max_calls and calls_by_run[run_id] > max_calls:
+            tool_calls.inc(agent_name, function_name, "call_limit")
+            return LIMIT_MESSAGE
+        if max_rounds and rounds_by_run[run_id] > max_rounds:
+            tool_calls.inc(agent_name, function_name, "round_limit")
+            return LIMIT_MESSAGE
+        try:
+            result = function_call(**arguments)
+            if inspect.isawaitable(result):
+                result = await result
+        except Exception:
+            tool_calls.inc(agent_name, function_name, "error")
+            raise
+        tool_calls.inc(agent_name, function_name, "ok")
+        return result
+
+    return hook
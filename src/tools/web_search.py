@@ -1,25 +1,48 @@
 """Web search tools using Tavily API."""
-from tavily import TavilyClient
+from tavily import AsyncTavilyClient
 from agno.tools import tool
-from langfuse import observe
+from langfuse import get_client, observe
+from core.metrics import search_calls
+from core.shared_cache import cache_key, get_shared_cache
+from tools.search_filter import filter_results
 
 # Tavily Web Search Tool
+# Async so a cancelled run aborts the in-flight HTTP request instead of
+# leaving it running in a worker thread
 @observe(as_type="tool", name="tavily-web-search")
-def search_web(query: str, max_results: int = 3) -> str:
+async def search_web(query: str, max_results: int = 3) -> str:
     """Search the web for travel information using Tavily."""
-    tavily_client = TavilyClient()
-    response = tavily_client.search(query=query, max_results=max_results)
-    
-    results = []
-    for result in response.get("results", []):
-        results.append(f"- {result.get('title', 'No title')}: {result.get('content', 'No content')}")
-    
+    # Raw results are shared across runs and worker processes; filtering stays per run
+    raw_results = await get_shared_cache().get_or_compute(
+        "search", cache_key(query, max_results), lambda: _tavily_search(query, max_results)
+    )
+
+    # Trim, deduplicate and order the results so agents don't pay for syndicated copies
+    filtered, stats = filter_results(query, raw_results)
+    get_client().update_current_span(metadata={"search_filter": stats.as_dict()})
+
+    if raw_results and not filtered:
+        return "No new results: everything found repeats information from earlier searches."
+    results = [f"- {title}: {content}" for title, content in filtered]
     return "\n".join(results) if results else "No results found."
 
 
+async def _tavily_search(query: str, max_results: int) -> list:
+    tavily_client = AsyncTavilyClient()
+    try:
+        response = await tavily_client.search(query=query, max_results=max_results)
+    except Exception:
+        search_calls.inc("error")
+        raise
+    search_calls.inc("ok")
+    return response.get("results", [])
+
+
 # Wrap the search_web function as an agno tool
 @tool
-def web_search_tool(query: str, max_results: int = 3) -> str:
-    """Search the web for travel information."""
-    return search_web(query, max_results)
-
+async def web_search_tool(query: str, max_results: int = 3) -> str:
+    """
+    Search the web for travel information.
+    Searches requested in the same turn run in parallel, so request all the searches you need at once.
+    """
+    return await search_web(query, max_results)
@@ -0,0 +1,59 @@
+"""Step-level checkpointing so interrupted workflow runs can resume."""
+import functools
+import inspect
+from typing import Any, Callable
+from agno.workflow.types import StepInput, StepOutput
+from agno.run import RunContext
+from core.checkpoints import get_checkpoint_store
+from core.diagnostics import activity
+from core.memory_report import step_memory
+from core.metrics import step_duration, step_errors
+
+# Key in the workflow's additional_data that carries the checkpoint run ID
+CHECKPOINT_RUN_ID_KEY = "checkpoint_run_id"
+
+
+def checkpointed(step_key: str, per_iteration: bool = False):
+    """
+    Decorate a function-step executor so its output is checkpointed after it runs.
+
+    When the run already has a checkpoint for this step, the stored output and
+    session_state are restored instead of executing the step again. Loop steps
+    use per_iteration=True so each revision iteration gets its own checkpoint.
+    """
+    def decorator(executor: Callable[..., Any]):
+        @functools.wraps(executor)
+        async def wrapper(step_input: StepInput, run_context: RunContext) -> StepOutput:  # type: ignore[arg-type]
+            if run_context.session_state is None:
+                run_context.session_state = {}
+
+            run_id = (step_input.additional_data or {}).get(CHECKPOINT_RUN_ID_KEY)
+            key = step_key
+            if per_iteration:
+                key = f"{step_key}#{run_context.session_state.get('revision_iteration', 0)}"
+
+            if run_id:
+                saved = get_checkpoint_store().load(run_id, key)
+                if saved is not None:
+                    print(f"   Resumed '{key}' from checkpoint")
+                    run_context.session_state.update(saved.session_state)
+                    return StepOutput(content=saved.content, success=True)
+
+            iteration = str(run_context.session_state.get("revision_iteration", 0)) if per_iteration else ""
+            try:
+                with step_duration.time(step_key, iteration), activity(key), step_memory(step_key):
+                    output = executor(step_input, run_context)
+                    if inspect.isawaitable(output):
+                        output = await output
+            except Exception:
+                step_errors.inc(step_key)
+                raise
+
+            # Degraded outputs (error set on a successful step) are not checkpointed,
+            # so a resumed run retries them instead of keeping the partial result
+            if run_id and output.success and not output.error:
+                get_checkpoint_store().save(run_id, key, output.content, run_context.session_state)
+            return output
+
+        return wrapper
+    return decorator
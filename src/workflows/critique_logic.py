@@ -1,23 +1,28 @@
 """Custom function steps for critique and revision logic."""
-from typing import Any, Dict, List, Union
+from typing import Dict, List, Optional
 from agno.workflow import Step
 from agno.workflow.types import StepInput, StepOutput
 from agno.run import RunContext
-from agents.critique_agent import critique_agent
-from core.schemas import CritiqueResult
-
-# Module-level state for end-condition access.
-# Newer agno versions pass List[StepOutput] to end_condition instead of RunContext,
-# so we mirror the key state here so the condition can still read it.
-_workflow_state: Dict[str, Any] = {
-    "revision_iteration": 0,
-    "is_approved": False,
-    "manager_feedback": "No feedback yet",
-    "previous_draft": "No previous draft",
-}
+from agents.critique_agent import critique_agent_spec
+from agents.factory import get_agent
+from agents.planner_agent import itinerary_planner_spec, itinerary_reviser_spec
+from core.metrics import review_scores, reviews
+from core.report import PLAN_SECTION_FIELDS
+from core.review_history import DEFAULT_REVIEW_ROUNDS, MAX_REVIEW_ROUNDS, get_review_history, review_action
+from core.run_budget import current_budget
+from core.schemas import CritiqueResult, ReviewDecision
+from workflows.checkpointing import CHECKPOINT_RUN_ID_KEY, checkpointed
+from workflows.report_logic import sections_from_feedback
+
+
+def _clamp_score(value: float) -> float:
+    """Scores are asked for on a 0-10 scale; keep a stray value from skewing the history."""
+    return min(max(float(value), 0.0), 10.0)
+
 
 # Function to critique and revise the presented travel plan
-def critique_and_revise(step_input: StepInput, run_context: RunContext) -> StepOutput:  # type: ignore[arg-type]
+@checkpointed("Manager Review", per_iteration=True)
+async def critique_and_revise(step_input: StepInput, run_context: RunContext) -> StepOutput:  # type: ignore[arg-type]
     """
     Manager reviews the itinerary and provides feedback.
     Updates session_state with critique results for the team lead to access.
@@ -35,43 +40,59 @@ def critique_and_revise(step_input: StepInput, run_context: RunContext) -> StepO
     # Get current iteration
     iteration = run_context.session_state.get("revision_iteration", 0)
     
-    print(f"\nManager Review - Review #{iteration + 1}/2")
+    print(f"\nManager Review - Review #{iteration + 1} (up to {MAX_REVIEW_ROUNDS})")
+
+    # With the run budget used up, the draft is accepted as it stands instead of reviewed
+    budget = current_budget()
+    exhausted = budget.exhausted() if budget else None
+    if exhausted:
+        budget.record_action("accept_draft_unreviewed", exhausted)
+        return _budget_decision(run_context, iteration, exhausted, reviewed=False)
     
     # Build critique prompt
+    # The rubric lives in the agent's (static) instructions; the draft comes first and the
+    # per-iteration status last, so repeated reviews share as long a prompt prefix as possible
+    # Only the last allowed round is certainly final; from the default round on, history may or may not grant another
+    if iteration + 1 >= MAX_REVIEW_ROUNDS:
+        review_status = "This is the FINAL review - approve if it's reasonably good."
+    elif iteration + 1 >= DEFAULT_REVIEW_ROUNDS:
+        review_status = "This may be the final review - approve if it's reasonably good."
+    else:
+        review_status = "This is the initial review - provide constructive feedback." if iteration == 0 \
+            else "This is a follow-up review - check that your earlier feedback was addressed."
     critique_prompt = f"""
-    You are the Manager reviewing a travel plan prepared by your team lead.
-    
-    TRAVEL PLAN TO REVIEW (Draft #{iteration + 1}):
+    TRAVEL PLAN TO REVIEW:
     {current_draft}
     
-    {"This is the FINAL review - approve if it's reasonably good." if iteration >= 1 else "This is the initial review - provide constructive feedback."}
+    REVIEW STATUS: review iteration {iteration} (Draft #{iteration + 1}). {review_status}
     
-    Evaluate the plan for:
-    1. Completeness - Does it cover all aspects (destination info, hotels, activities, itinerary)?
-    2. Coherence - Does the day-by-day plan flow logically?
-    3. Practicality - Are the activities feasible within the timeframe?
-    4. Budget alignment - Do recommendations match the stated budget?
+    PREVIOUS FEEDBACK GIVEN:
+    {run_context.session_state.get("manager_feedback") or "No feedback yet"}
     
     Provide your structured assessment with specific improvement suggestions if needed.
     """
     
-    # Run critique agent with session_state
-    response = critique_agent.run(
-        critique_prompt,
-        session_state=run_context.session_state
-    )
+    response = await get_agent(critique_agent_spec).arun(critique_prompt)
     
     # Parse the critique result
     is_approved = False
     feedback_text = ""
+    quality_score: Optional[float] = None
+    criteria: Dict[str, float] = {}
+    sections: List[str] = []
+    days: List[int] = []
     
     if response.content:
         try:
             # Try to get structured output
-            critique_data = getattr(response, 'response_model', None)
+            critique_data = response.content if isinstance(response.content, CritiqueResult) \
+                else getattr(response, 'response_model', None)
             
             if critique_data and isinstance(critique_data, CritiqueResult):
                 is_approved = critique_data.is_approved
+                quality_score = _clamp_score(critique_data.quality_score)
+                criteria = {name: _clamp_score(score) for name, score in critique_data.criterion_scores.model_dump().items()}
+                sections, days = list(critique_data.sections_to_revise), list(critique_data.days_to_revise)
                 feedback_text = f"{critique_data.overall_assessment}\n\nSpecific Feedback:\n{critique_data.specific_feedback}\n\nSuggestions:\n{critique_data.improvement_suggestions}"
             else:
                 # Fallback: parse from content
@@ -89,27 +110,95 @@ def critique_and_revise(step_input: StepInput, run_context: RunContext) -> StepO
         is_approved = iteration >= 1
         feedback_text = "Critique completed"
     
+    # Scores feed the history; for an unapproved draft, history decides whether revising pays off
+    action = None
+    if quality_score is not None:
+        review_scores.observe(quality_score, str(iteration + 1))
+        history = get_review_history()
+        run_id = (step_input.additional_data or {}).get(CHECKPOINT_RUN_ID_KEY)
+        if run_id:
+            history.record(run_id, iteration, quality_score, criteria, is_approved)
+        if not is_approved:
+            estimate = history.expected_gain(iteration, quality_score)
+            action = review_action(iteration, estimate)
+            gain = (f"{estimate.mean_gain:+.2f} over {estimate.samples} past revisions"
+                    + (" of the previous round, decayed" if estimate.extrapolated else "")) if estimate else "no history yet"
+            print(f"   Quality {quality_score:.1f}/10, expected gain of a revision: {gain} -> {action}")
+
+    will_revise = not is_approved and (
+        action == "extra_round" or (action != "stop_low_gain" and iteration + 1 < DEFAULT_REVIEW_ROUNDS)
+    )
+
+    # Which sections the next draft should regenerate (the whole plan when none can be identified)
+    if not is_approved and not sections:
+        sections, days = sections_from_feedback(feedback_text)
+
+    # A revision round the run cannot afford is skipped: the current draft is accepted.
+    # Flagged sections are regenerated by the section reviser, so the round is priced with its
+    # average spend (the planner's until the reviser has run), not the full planner's
+    if will_revise and budget is not None:
+        reviser = itinerary_planner_spec.id
+        if (run_context.session_state.get("current_plan") and any(s in PLAN_SECTION_FIELDS for s in sections)
+                and budget.has_spend(itinerary_reviser_spec.id)):
+            reviser = itinerary_reviser_spec.id
+        shortfall = budget.shortfall((reviser, critique_agent_spec.id))
+        if shortfall:
+            budget.record_action("accept_current_draft", shortfall)
+            run_context.session_state["manager_feedback"] = feedback_text
+            return _budget_decision(run_context, iteration, shortfall, reviewed=True)
+    run_context.session_state["sections_to_revise"] = [] if is_approved else sections
+    run_context.session_state["days_to_revise"] = [] if is_approved else days
+
     # Update session state with critique results
     run_context.session_state["is_approved"] = is_approved
     run_context.session_state["manager_feedback"] = feedback_text
     run_context.session_state["revision_iteration"] = iteration + 1
+    run_context.session_state["review_action"] = action
 
-    # Mirror to module-level state so end_condition can read it
-    # even when newer agno passes List[StepOutput] instead of RunContext
-    _workflow_state["is_approved"] = is_approved
-    _workflow_state["manager_feedback"] = feedback_text
-    _workflow_state["revision_iteration"] = iteration + 1
-    _workflow_state["previous_draft"] = current_draft
-
-    status = "APPROVED" if is_approved else "NEEDS REVISION"
+    if is_approved:
+        status, outcome = "APPROVED", "approved"
+    elif action == "stop_low_gain":
+        status, outcome = "ACCEPTED (a revision is not expected to improve it)", "low_gain"
+    else:
+        status, outcome = "NEEDS REVISION", "revision"
+    reviews.inc(outcome)
     print(f"   Manager Decision: {status}")
     
+    # The decision travels in the step output so the loop end condition can read it
+    # per run (newer agno passes List[StepOutput] to end_condition instead of RunContext)
     return StepOutput(
-        content=feedback_text,
+        content=ReviewDecision(
+            is_approved=is_approved,
+            revision_iteration=iteration + 1,
+            feedback=feedback_text,
+            quality_score=quality_score,
+            review_action=action,
+        ),
         success=True
     )
 
 
+def _budget_decision(run_context: RunContext, iteration: int, limit: str, reviewed: bool) -> StepOutput:
+    """End the revision loop on the current draft because the run budget ran low."""
+    run_context.session_state["is_approved"] = False
+    run_context.session_state["budget_stop"] = limit
+    run_context.session_state["revision_iteration"] = iteration + 1
+    reviews.inc("budget")
+    print(f"   Manager Decision: ACCEPTED ON BUDGET ({limit})")
+    return StepOutput(
+        content=ReviewDecision(
+            is_approved=False,
+            revision_iteration=iteration + 1,
+            feedback=run_context.session_state.get("manager_feedback", "") if reviewed
+            else f"Not reviewed: run budget ({limit}) exhausted",
+            budget_limit=limit,
+        ),
+        success=True,
+        # Not checkpointed: a resumed run gets a fresh budget and may still afford the review
+        error=f"Revision loop ended early: run budget ({limit}) low",
+    )
+
+
 # Custom step for critique
 critique_step = Step(
     name="Manager Review",
@@ -118,26 +207,56 @@ critique_step = Step(
 )
 
 
-def revision_approved_condition(_run_context_or_step_outputs) -> bool:  # type: ignore[arg-type]
+def _latest_decision(step_outputs: List[StepOutput]) -> Optional[ReviewDecision]:
+    """Find the Manager's decision among the step outputs of the last loop iteration."""
+    for output in reversed(step_outputs):
+        if isinstance(output.content, ReviewDecision):
+            return output.content
+    return None
+
+
+def revision_approved_condition(run_context_or_step_outputs) -> bool:  # type: ignore[arg-type]
     """
     End condition for the revision loop between team lead and manager.
-    Returns True to BREAK the loop (when approved or max iterations reached), False to continue.
+    Returns True to BREAK the loop (when approved, the run budget is low, review history says a
+    revision will not pay off, or max iterations reached), False to continue. By default one
+    revision is allowed; history can grant one more round (up to MAX_REVIEW_ROUNDS).
 
-    Checks the mirrored _workflow_state for approval status set by the critique agent.
-    The parameter is ignored because newer agno passes List[StepOutput] instead of RunContext.
+    Newer agno passes the iteration's List[StepOutput] (read the ReviewDecision from it);
+    older versions pass the RunContext (read session_state). Both are per run, so
+    concurrent workflow runs never see each other's approval state.
     """
-    # Read from module-level state (mirrored by critique_and_revise)
-    is_approved: bool = _workflow_state.get("is_approved", False)
-    iteration: int = _workflow_state.get("revision_iteration", 0)
+    if isinstance(run_context_or_step_outputs, list):
+        decision = _latest_decision(run_context_or_step_outputs)
+        is_approved = decision.is_approved if decision else False
+        iteration = decision.revision_iteration if decision else 0
+        budget_limit = decision.budget_limit if decision else None
+        action = decision.review_action if decision else None
+    else:
+        session_state = getattr(run_context_or_step_outputs, "session_state", None) or {}
+        is_approved = session_state.get("is_approved", False)
+        iteration = session_state.get("revision_iteration", 0)
+        budget_limit = session_state.get("budget_stop")
+        action = session_state.get("review_action")
 
     if is_approved:
         print(f"\nTravel plan APPROVED by Manager after {iteration} iteration(s)!")
         return True
 
-    if iteration >= 2:
+    if budget_limit:
+        print(f"\nRun budget low ({budget_limit}) after {iteration} review(s). Accepting the current draft.")
+        return True
+
+    if action == "stop_low_gain":
+        print(f"\nA revision is not expected to improve the plan after {iteration} review(s). Finalizing plan.")
+        return True
+
+    if iteration >= MAX_REVIEW_ROUNDS or (iteration >= DEFAULT_REVIEW_ROUNDS and action != "extra_round"):
         print(f"\nMax iterations reached ({iteration}). Finalizing plan.")
         return True
 
+    if action == "extra_round":
+        print(f"\nHistory expects another revision to pay off: allowing review round {iteration + 1}.")
+
     print(f"\nTeam Lead revising based on Manager feedback...")
     return False
-
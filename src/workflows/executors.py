@@ -0,0 +1,81 @@
+"""Pluggable plan executors: the Parallel+Loop workflow, its fast variant and the delegating Agno Team."""
+import os
+from typing import Any, Callable, Dict, Optional, Type
+from agno.workflow import Workflow
+from agents.factory import agent_scope
+from agents.team import build_travel_team
+from core.trip_spec import TripSpec, parse_trip_spec
+from core.utils import collect_run_output
+from tools.search_filter import search_scope
+from workflows.multi_city import plan_trip_legs, run_multi_city_workflow
+from workflows.travel_workflow import fast_travel_planning_workflow, run_travel_workflow, travel_planning_workflow
+
+# Executor used by plan_trip unless the request names one: "workflow" (default), "fast" or "team"
+PLAN_EXECUTOR = os.getenv("PLAN_EXECUTOR", "workflow")
+
+
+class PlanExecutor:
+    """Runs one planning request end to end and returns its run output (content = markdown report)."""
+    name = "base"
+
+    async def run(self, query: str, run_id: str, spec: Optional[TripSpec] = None) -> Any:
+        raise NotImplementedError
+
+
+class WorkflowExecutor(PlanExecutor):
+    """
+    The checkpointed Parallel+Loop workflow: prefetch, parallel research, planner/manager
+    revision loop and a local final report. Multi-city trips run one workflow per leg.
+    """
+    name = "workflow"
+    workflow: Workflow = travel_planning_workflow
+
+    async def run(self, query: str, run_id: str, spec: Optional[TripSpec] = None) -> Any:
+        spec = spec or parse_trip_spec(query)
+        trip = plan_trip_legs(spec)
+        if trip is not None:
+            return await run_multi_city_workflow(query, trip, run_id, self.workflow)
+        return await run_travel_workflow(query, run_id, spec, self.workflow)
+
+
+class FastWorkflowExecutor(WorkflowExecutor):
+    """
+    Fast mode: the same checkpointed workflow machinery with one combined research agent
+    (a single batched search round) and one planner pass, and no Manager review: two LLM
+    calls per plan (three when the researcher searches) instead of five to seven, for a
+    plan nobody has reviewed.
+    """
+    name = "fast"
+    workflow = fast_travel_planning_workflow
+
+
+class TeamExecutor(PlanExecutor):
+    """
+    An Agno Team whose leader delegates to every member at once and writes the report
+    itself. Not checkpointed: an interrupted run starts over.
+    """
+    name = "team"
+
+    def __init__(self, team_factory: Callable[[], Any] = build_travel_team):
+        self.team_factory = team_factory
+
+    async def run(self, query: str, run_id: str, spec: Optional[TripSpec] = None) -> Any:
+        with agent_scope(), search_scope():
+            team = self.team_factory()
+            return await collect_run_output(team.arun(query, run_id=run_id))
+
+
+EXECUTORS: Dict[str, Type[PlanExecutor]] = {
+    WorkflowExecutor.name: WorkflowExecutor,
+    FastWorkflowExecutor.name: FastWorkflowExecutor,
+    TeamExecutor.name: TeamExecutor,
+}
+
+
+def get_executor(name: Optional[str] = None) -> PlanExecutor:
+    """Instantiate the executor registered under name (PLAN_EXECUTOR when not given)."""
+    name = name or PLAN_EXECUTOR
+    try:
+        return EXECUTORS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown plan executor {name!r}; expected one of {sorted(EXECUTORS)}") from None
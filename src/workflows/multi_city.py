@@ -0,0 +1,192 @@
+"""Multi-city decomposition: plan each leg concurrently and merge the legs into one report."""
+import asyncio
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from agno.run.base import RunStatus
+from agno.run.workflow import WorkflowRunOutput
+from agno.workflow import Workflow
+from core.budget import compute_budget, convert_currency, detect_currency, parse_budget_table, render_budget_table
+from core.report import REPORT_SECTIONS, join_sections, split_sections
+from core.trip_spec import TripSpec
+from workflows.travel_workflow import run_travel_workflow, travel_planning_workflow
+
+_DAY_HEADER_PATTERN = re.compile(r"^\|\s*\*\*Day\s+(\d+)")
+_SUBHEADING_PATTERN = re.compile(r"^### ", re.MULTILINE)
+
+
+@dataclass
+class TripLeg:
+    """One destination of a multi-city trip and the days allotted to it."""
+    name: str
+    start_day: int
+    days: int
+
+    @property
+    def end_day(self) -> int:
+        return self.start_day + self.days - 1
+
+
+@dataclass
+class MultiCityTrip:
+    """A decomposed trip: legs in travel order, separated by optional transit days."""
+    region: Optional[str]
+    total_days: int
+    legs: List[TripLeg]
+    transit_days: bool
+    spec: TripSpec
+
+
+def allocate_days(total_days: int, leg_count: int) -> Tuple[List[int], bool]:
+    """
+    Split the trip across legs, reserving one transit day between consecutive legs
+    when the trip is long enough. Returns (days per leg, whether transit days are used).
+    """
+    transit = leg_count - 1 if total_days - (leg_count - 1) >= leg_count * 2 else 0
+    base, extra = divmod(total_days - transit, leg_count)
+    return [base + (1 if i < extra else 0) for i in range(leg_count)], transit > 0
+
+
+def plan_trip_legs(spec: TripSpec) -> Optional[MultiCityTrip]:
+    """Split a multi-destination trip's days into legs. None for single-destination trips."""
+    destinations = [place.name for place in spec.destinations]
+    total_days = spec.days
+    if len(destinations) < 2 or total_days < len(destinations):
+        return None
+
+    leg_days, transit_days = allocate_days(total_days, len(destinations))
+    legs, day = [], 1
+    for name, days in zip(destinations, leg_days):
+        legs.append(TripLeg(name=name, start_day=day, days=days))
+        day += days + (1 if transit_days else 0)
+    return MultiCityTrip(region=spec.region, total_days=total_days, legs=legs, transit_days=transit_days, spec=spec)
+
+
+def build_leg_query(query: str, trip: MultiCityTrip, leg: TripLeg) -> str:
+    """Rewrite the traveler's request as a single-destination request for one leg."""
+    place = f"{leg.name}, {trip.region}" if trip.region and trip.region not in leg.name else leg.name
+    return (
+        f"Plan a {leg.days}-day leg in {place} (days {leg.start_day}-{leg.end_day} of a "
+        f"{trip.total_days}-day multi-city trip). Cover only this leg.\n"
+        f"Original request: {query}"
+    )
+
+
+def _merge_itineraries(trip: MultiCityTrip, bodies: List[str]) -> str:
+    """Concatenate the legs' itinerary tables, renumbering days and inserting transit days."""
+    rows = [
+        "| Day | Activities & Timing | Notes |",
+        "|-----|---------------------|-------|",
+    ]
+    for i, (leg, body) in enumerate(zip(trip.legs, bodies)):
+        table = [line.strip() for line in body.splitlines() if line.strip().startswith("|")]
+        for line in table[2:]:  # skip the header and separator rows
+            header = _DAY_HEADER_PATTERN.match(line)
+            if header:
+                day = leg.start_day + int(header.group(1)) - 1
+                line = f"| **Day {day}" + line[header.end():]
+            rows.append(line)
+
+        if trip.transit_days and i + 1 < len(trip.legs):
+            nxt = trip.legs[i + 1]
+            rows.append(f"| **Day {leg.end_day + 1}: Transit {leg.name} → {nxt.name}** | | |")
+            rows.append(
+                f"| 08:00 – 18:00 | Check out, travel from {leg.name} to {nxt.name}, check in | "
+                "Book trains, flights or ferries in advance; keep the evening light |"
+            )
+    return "\n".join(rows)
+
+
+def _merge_budgets(trip: MultiCityTrip, reports: List[str]) -> Optional[str]:
+    """
+    Combine the legs' budget line items into one table in the first leg's currency.
+    None when a leg's table cannot be parsed exactly or its currency converted; the
+    legs' own tables are kept instead.
+    """
+    currencies = [detect_currency(report) or "USD" for report in reports]
+    currency = currencies[0]
+
+    items = []
+    for leg, report, leg_currency in zip(trip.legs, reports, currencies):
+        leg_items = parse_budget_table(report)
+        if leg_items is None:
+            return None
+        for item in leg_items:
+            cost = convert_currency(item.unit_cost, leg_currency, currency)
+            if cost is None:
+                return None
+            items.append(item.model_copy(update={
+                "category": f"{leg.name}: {item.category}",
+                "unit_cost": cost,
+            }))
+
+    if not items:
+        return "_Budget details were not available for the individual legs._"
+    table = render_budget_table(compute_budget(items, currency, trip.total_days))
+    return table + "\n\n_Transit between legs is not included in the totals._"
+
+
+def merge_leg_reports(trip: MultiCityTrip, reports: List[str]) -> str:
+    """Merge per-leg markdown reports into one report with the documented section layout."""
+    split = [split_sections(report)[1] for report in reports]
+    place = trip.region or " & ".join(leg.name for leg in trip.legs)
+    route = " → ".join(f"{leg.name} (Days {leg.start_day}–{leg.end_day})" for leg in trip.legs)
+    budget = _merge_budgets(trip, reports)
+
+    sections = {}
+    for heading in REPORT_SECTIONS:
+        if heading == "Day-by-Day Itinerary":
+            sections[heading] = _merge_itineraries(trip, [s.get(heading, "") for s in split])
+        elif heading == "Budget Breakdown" and budget is not None:
+            sections[heading] = budget
+        else:
+            parts = [f"**Route:** {route}"] if heading == "Executive Summary" else []
+            for leg, leg_sections in zip(trip.legs, split):
+                body = _SUBHEADING_PATTERN.sub("#### ", leg_sections.get(heading, ""))
+                if body:
+                    parts.append(f"### {leg.name} (Days {leg.start_day}–{leg.end_day})\n\n{body}")
+            sections[heading] = "\n\n".join(parts)
+
+    title = f"# Comprehensive Travel Plan: {place} {trip.total_days} Day Trip"
+    return join_sections(title, sections)
+
+
+async def run_multi_city_workflow(query: str, trip: MultiCityTrip, run_id: str,
+                                  workflow: Workflow = travel_planning_workflow) -> WorkflowRunOutput:
+    """
+    Plan every leg concurrently (wall time tracks the longest leg) and merge the results.
+    Each leg is checkpointed under its own run ID, so a resumed trip only re-plans failed legs.
+    """
+    print(f"Multi-city trip detected: {' → '.join(leg.name for leg in trip.legs)}")
+    results = await asyncio.gather(
+        *(
+            run_travel_workflow(build_leg_query(query, trip, leg), f"{run_id}-leg{i}",
+                                trip.spec.for_leg(leg.name, leg.days), workflow)
+            for i, leg in enumerate(trip.legs, start=1)
+        ),
+        return_exceptions=True,
+    )
+    # Let every leg finish (and checkpoint) before surfacing the first failure; a leg that
+    # returned an error status failed too, and must not be merged into a completed trip
+    for leg, result in zip(trip.legs, results):
+        if isinstance(result, BaseException):
+            raise result
+        if result is None or str(getattr(result, "status", "")).lower().endswith("error"):
+            raise RuntimeError(f"Leg {leg.name!r} failed; call plan_trip(query, run_id={run_id!r}) to resume the trip")
+
+    reports = [str(result.content or "") for result in results]
+    # A trip with any degraded or budget-stopped leg is reported as such
+    metadata: Dict[str, Any] = {}
+    for leg, result in zip(trip.legs, results):
+        leg_metadata = getattr(result, "metadata", None) or {}
+        for step_name, note in (leg_metadata.get("degraded_inputs") or {}).items():
+            metadata.setdefault("degraded_inputs", {})[f"{leg.name}: {step_name}"] = note
+        if leg_metadata.get("budget_stop"):
+            metadata.setdefault("budget_stop", leg_metadata["budget_stop"])
+    return WorkflowRunOutput(
+        input=query,
+        content=merge_leg_reports(trip, reports),
+        run_id=run_id,
+        status=RunStatus.completed,
+        metadata=metadata or None,
+    )
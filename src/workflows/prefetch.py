@@ -0,0 +1,94 @@
+"""Deterministic search prefetch: run the research team's predictable searches before the agents start."""
+import asyncio
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from agno.workflow.types import StepInput, StepOutput
+from agno.run import RunContext
+from core.trip_spec import TripSpec
+from tools.web_search import search_web
+from workflows.checkpointing import checkpointed
+from workflows.report_logic import ACTIVITIES_STEP_NAME, DESTINATION_STEP_NAME, HOTEL_STEP_NAME, get_trip_spec
+
+PREFETCH_STEP_NAME = "Prefetch Searches"
+
+# PREFETCH_SEARCHES=0 lets every research agent plan its own searches again
+PREFETCH_ENABLED = os.getenv("PREFETCH_SEARCHES", "1").lower() not in ("0", "false", "no")
+# Searches still running at the deadline are cancelled; their agents search for themselves
+PREFETCH_TIMEOUT_SECONDS = float(os.getenv("PREFETCH_TIMEOUT_SECONDS", "15"))
+
+
+@dataclass
+class SearchPlan:
+    """Searches to prefetch for each research step, derived from the run's TripSpec."""
+    destination: str
+    budget_level: str
+    interests: Optional[str] = None
+    searches: Dict[str, List[str]] = field(default_factory=dict)
+
+
+def build_search_plan(spec: TripSpec) -> Optional[SearchPlan]:
+    """The searches each research agent would nearly always start with. None if no destination is known."""
+    destination = spec.destination
+    if not destination:
+        return None
+    interests = ", ".join(spec.interests) or None
+
+    plan = SearchPlan(destination=destination, budget_level=spec.budget_tier, interests=interests)
+    plan.searches = {
+        DESTINATION_STEP_NAME: [
+            f"top attractions and must-see places in {destination}",
+            f"{destination} weather and best time to visit" + (f" in {spec.when}" if spec.when else ""),
+            f"{destination} local tips and cultural etiquette",
+        ],
+        HOTEL_STEP_NAME: [
+            f"best {spec.budget_tier} hotels in {destination}",
+            f"best neighborhoods to stay in {destination}",
+        ],
+        ACTIVITIES_STEP_NAME: [
+            f"{destination} public transportation and getting around",
+            f"{destination} food experiences and local dishes to try",
+            f"unique things to do in {destination}" + (f" for {interests}" if interests else ""),
+        ],
+    }
+    return plan
+
+
+@checkpointed(PREFETCH_STEP_NAME)
+async def prefetch_searches(step_input: StepInput, run_context: RunContext) -> StepOutput:  # type: ignore[arg-type]
+    """
+    Run the search plan concurrently ahead of the research phase. The output maps each
+    research step to its formatted results; research executors inject them into the
+    agent's prompt so most agents answer in a single LLM call with no tool turn.
+    """
+    plan = build_search_plan(get_trip_spec(step_input)) if PREFETCH_ENABLED else None
+    if plan is None:
+        return StepOutput(content={}, success=True)
+
+    tasks = {
+        asyncio.ensure_future(search_web(search)): (step_name, search)
+        for step_name, searches in plan.searches.items()
+        for search in searches
+    }
+    done, pending = await asyncio.wait(tasks, timeout=PREFETCH_TIMEOUT_SECONDS)
+    for task in pending:
+        task.cancel()
+
+    results: Dict[str, List[str]] = {}
+    for task, (step_name, search) in tasks.items():
+        if task in done and task.exception() is None:
+            results.setdefault(step_name, []).append(f'Search: "{search}"\n{task.result()}')
+    fetched = sum(len(blocks) for blocks in results.values())
+    print(f"   Prefetched {fetched}/{len(tasks)} searches for {plan.destination} ({plan.budget_level})")
+
+    content = {step_name: "\n\n".join(blocks) for step_name, blocks in results.items()}
+    # A partial prefetch is still used but not checkpointed, so a resumed run retries it
+    error = None if fetched == len(tasks) else f"{len(tasks) - fetched} of {len(tasks)} prefetch searches failed"
+    return StepOutput(content=content, success=True, error=error)
+
+
+def prefetched_results(step_input: StepInput, step_name: str) -> Optional[str]:
+    """The prefetched search results for a research step, if any."""
+    output = step_input.get_step_output(PREFETCH_STEP_NAME)
+    content = output.content if output else None
+    return content.get(step_name) if isinstance(content, dict) else None
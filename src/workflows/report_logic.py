@@ -0,0 +1,270 @@
+"""Custom function steps for drafting and rendering the travel report."""
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from agno.workflow.types import StepInput, StepOutput
+from agno.run import RunContext
+from agents.factory import get_agent
+from agents.planner_agent import itinerary_planner_spec, itinerary_reviser_spec
+from core.budget import rewrite_budget_breakdown
+from core.geo import build_day_clusters, format_day_clusters
+from core.metrics import revision_iterations, step_duration
+from core.report import PLAN_SECTION_FIELDS, REPORT_SECTIONS, render_travel_report
+from core.schemas import (
+    AccommodationOptions, ActivitiesInfo, DailyItinerary, DestinationInfo, PlanSectionRevision, ResearchBundle
+)
+from core.trip_spec import TripSpec, parse_trip_spec
+from workflows.checkpointing import checkpointed
+
+# Names of the research steps whose structured outputs feed the report
+DESTINATION_STEP_NAME = "Research Destination"
+HOTEL_STEP_NAME = "Find Accommodations"
+ACTIVITIES_STEP_NAME = "Research Activities"
+# Fast mode's single research step, whose ResearchBundle stands in for the three above
+COMBINED_RESEARCH_STEP_NAME = "Combined Research"
+
+# Key in the workflow's additional_data that carries the run's parsed TripSpec
+TRIP_SPEC_KEY = "trip_spec"
+
+# How run budget limits are named in the report note
+BUDGET_LIMIT_LABELS = {"tokens": "token", "usd": "cost", "seconds": "time"}
+
+
+def _structured_output(step_input: StepInput, step_name: str, schema: type):
+    """Return a previous step's content if it is an instance of the expected schema."""
+    step_output = step_input.get_step_output(step_name)
+    content = step_output.content if step_output else None
+    return content if isinstance(content, schema) else None
+
+
+def get_research_outputs(
+    step_input: StepInput,
+) -> Tuple[Optional[DestinationInfo], Optional[AccommodationOptions], Optional[ActivitiesInfo]]:
+    """Collect the structured outputs of the three research agents (None when unavailable)."""
+    bundle = _structured_output(step_input, COMBINED_RESEARCH_STEP_NAME, ResearchBundle)
+    if bundle is not None:
+        return bundle.destination, bundle.accommodation, bundle.activities
+    return (
+        _structured_output(step_input, DESTINATION_STEP_NAME, DestinationInfo),
+        _structured_output(step_input, HOTEL_STEP_NAME, AccommodationOptions),
+        _structured_output(step_input, ACTIVITIES_STEP_NAME, ActivitiesInfo),
+    )
+
+
+def get_trip_spec(step_input: StepInput) -> TripSpec:
+    """The TripSpec attached to the run (parsed from the step's input when none is attached)."""
+    data = (step_input.additional_data or {}).get(TRIP_SPEC_KEY)
+    if data:
+        return data if isinstance(data, TripSpec) else TripSpec.from_dict(data)
+    return parse_trip_spec(step_input.get_input_as_string() or "")
+
+
+def build_attraction_clusters(
+    trip_days: int,
+    destination: Optional[DestinationInfo],
+    activities: Optional[ActivitiesInfo],
+) -> Optional[str]:
+    """Pre-cluster researched attractions by day with the offline POI index."""
+    names: List[str] = []
+    if destination is not None:
+        names += [a.name for a in destination.top_attractions]
+    if activities is not None:
+        names += [a.name for a in activities.recommended_activities]
+    if not names:
+        return None
+
+    place = (destination or activities).destination  # type: ignore[union-attr]
+    return format_day_clusters(build_day_clusters(names, place, trip_days))
+
+
+def build_planner_prompt(step_input: StepInput, session_state: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Build the team lead prompt from the user's query and the research team's findings.
+    Everything that changes between revision rounds goes last, so every planner call of a
+    run repeats the same prefix and the provider's prompt cache can serve it.
+    """
+    query = step_input.get_input_as_string() or ""
+    destination, accommodation, activities = get_research_outputs(step_input)
+
+    sections = [f"TRAVELER REQUEST:\n{query}"]
+    for label, research in zip(("DESTINATION", "HOTEL", "ACTIVITIES"), (destination, accommodation, activities)):
+        if research is not None:
+            sections.append(f"{label} RESEARCH:\n{research.model_dump_json(indent=2)}")
+
+    clusters = build_attraction_clusters(get_trip_spec(step_input).days, destination, activities)
+    if clusters:
+        sections.append(f"PRECOMPUTED DAILY CLUSTERS (nearby attractions grouped by day):\n{clusters}")
+
+    session_state = session_state or {}
+    degraded = session_state.get("degraded_inputs") or {}
+    if degraded:
+        notes = "\n".join(f"- {step}: {note}" for step, note in degraded.items())
+        sections.append(
+            "DEGRADED INPUTS (work with what is available and keep affected sections general):\n" + notes
+        )
+
+    iteration = session_state.get("revision_iteration", 0)
+    if iteration > 0:
+        sections.append(
+            f"REVISION REQUEST (iteration {iteration}):\n"
+            f"MANAGER FEEDBACK:\n{session_state.get('manager_feedback', '')}\n\n"
+            f"PREVIOUS DRAFT:\n{session_state.get('previous_draft', '')}"
+        )
+    return "\n\n".join(sections)
+
+
+# Feedback wording that points at a plan section, for reviews that did not list the sections
+_SECTION_HINTS = {
+    "Executive Summary": re.compile(r"\b(executive )?summary|overview of the trip\b", re.IGNORECASE),
+    "Day-by-Day Itinerary": re.compile(r"\b(itinerary|schedule|day \d+|time slots?|pacing)\b", re.IGNORECASE),
+    "Transportation Guide": re.compile(r"\b(transport\w*|getting around|transit)\b", re.IGNORECASE),
+    "Budget Breakdown": re.compile(r"\b(budget|costs?|prices?|totals?)\b", re.IGNORECASE),
+    "Additional Notes and Travel Tips": re.compile(r"\b(notes|tips)\b", re.IGNORECASE),
+}
+_DAY_REFERENCE = re.compile(r"\bday\s+(\d+)\b", re.IGNORECASE)
+
+
+def sections_from_feedback(feedback: str) -> Tuple[List[str], List[int]]:
+    """Plan sections and day numbers that free-text Manager feedback refers to."""
+    sections = [heading for heading, hint in _SECTION_HINTS.items() if hint.search(feedback)]
+    days = sorted({int(n) for n in _DAY_REFERENCE.findall(feedback)})
+    return sections, days
+
+
+def build_revision_prompt(plan: DailyItinerary, sections: List[str], days: List[int], feedback: str) -> str:
+    """Only the flagged sections of the plan, as the structured fields behind them, then the Manager feedback."""
+    parts = [
+        f"TRIP: {plan.destination}, {plan.trip_days} days, amounts in {plan.currency}",
+        "DAY THEMES (for context): " + "; ".join(f"Day {d.day_number}: {d.theme}" for d in plan.days),
+        "FLAGGED SECTIONS TO REVISE:",
+    ]
+    for heading in sections:
+        field = PLAN_SECTION_FIELDS[heading]
+        value = getattr(plan, field)
+        if field == "days":
+            value = [d.model_dump() for d in value if not days or d.day_number in days]
+        elif field == "budget_items":
+            value = [item.model_dump() for item in value]
+        parts.append(f"### {heading} (field: {field})\n{json.dumps(value, ensure_ascii=False)}")
+    parts.append(f"MANAGER FEEDBACK:\n{feedback}")
+    return "\n\n".join(parts)
+
+
+def apply_plan_revision(
+    plan: DailyItinerary, revision: PlanSectionRevision, sections: List[str]
+) -> Tuple[DailyItinerary, List[str]]:
+    """Splice the revised fields of the flagged sections into the plan. Returns it and the sections changed."""
+    updates: Dict[str, Any] = {}
+    changed = []
+    for heading in sections:
+        field = PLAN_SECTION_FIELDS[heading]
+        value = getattr(revision, field)
+        if value is None or (isinstance(value, list) and not value):
+            continue
+        if field == "days":
+            # Revised days replace the days with the same number; the rest are kept as they were
+            revised = {d.day_number: d for d in value if 1 <= d.day_number <= plan.trip_days}
+            if not revised:
+                continue
+            value = [revised.get(d.day_number, d) for d in plan.days]
+        updates[field] = value
+        changed.append(heading)
+    return plan.model_copy(update=updates), changed
+
+
+async def revise_sections(
+    step_input: StepInput, session_state: Dict[str, Any], plan: DailyItinerary, sections: List[str], days: List[int]
+) -> Optional[StepOutput]:
+    """
+    Regenerate only the flagged sections and re-render the report around them, so a small fix
+    costs a small LLM call. None when the reviser returned nothing usable (revise in full instead).
+    """
+    response = await get_agent(itinerary_reviser_spec).arun(
+        build_revision_prompt(plan, sections, days, session_state.get("manager_feedback", ""))
+    )
+    if not isinstance(response.content, PlanSectionRevision):
+        return None
+    revised, changed = apply_plan_revision(plan, response.content, sections)
+    if not changed:
+        return None
+
+    day_note = f" (days {', '.join(map(str, days))})" if days and "Day-by-Day Itinerary" in changed else ""
+    print(f"   Revised {len(changed)} of {len(REPORT_SECTIONS)} sections: {', '.join(changed)}{day_note}")
+    session_state["current_plan"] = revised.model_dump()
+    return StepOutput(content=render_travel_report(revised, *get_research_outputs(step_input)), success=True)
+
+
+def plan_currency(step_input: StepInput, session_state: Dict[str, Any]) -> Optional[str]:
+    """The run's budget currency: the last structured draft's, else the researched hotel rates' (None if unknown)."""
+    current_plan = session_state.get("current_plan")
+    if current_plan and current_plan.get("currency"):
+        return current_plan["currency"]
+    _, accommodation, _ = get_research_outputs(step_input)
+    hotels = accommodation.hotel_recommendations if accommodation is not None else []
+    return hotels[0].currency if hotels else None
+
+
+# Function to draft (or revise) the itinerary and render it as markdown
+@checkpointed("Create Itinerary", per_iteration=True)
+async def create_itinerary(step_input: StepInput, run_context: RunContext) -> StepOutput:  # type: ignore[arg-type]
+    """
+    Team Lead drafts a structured plan, which is rendered locally into the markdown report.
+    The structured plan is kept in session_state so the final report can be re-rendered.
+    Revisions regenerate only the sections the Manager flagged when it can tell which.
+    """
+    if run_context.session_state is None:
+        run_context.session_state = {}
+
+    session_state = run_context.session_state
+    current_plan = session_state.get("current_plan")
+    flagged = [s for s in session_state.get("sections_to_revise") or [] if s in PLAN_SECTION_FIELDS]
+    if session_state.get("revision_iteration", 0) > 0 and current_plan and flagged:
+        output = await revise_sections(step_input, session_state, DailyItinerary.model_validate(current_plan),
+                                       flagged, session_state.get("days_to_revise") or [])
+        if output is not None:
+            return output
+
+    response = await get_agent(itinerary_planner_spec).arun(
+        build_planner_prompt(step_input, run_context.session_state)
+    )
+
+    plan = response.content
+    if not isinstance(plan, DailyItinerary):
+        # Fallback: the model returned free text instead of the structured plan,
+        # so at least recompute its Budget Breakdown table deterministically
+        content = rewrite_budget_breakdown(str(plan or ""), plan_currency(step_input, session_state),
+                                           get_trip_spec(step_input).days)
+        # An older structured plan no longer matches this draft: the final report must fall back
+        # to the draft the Manager reviewed, and a later revision must start from scratch
+        session_state["current_plan"] = None
+        return StepOutput(content=content, success=True)
+
+    run_context.session_state["current_plan"] = plan.model_dump()
+    return StepOutput(
+        content=render_travel_report(plan, *get_research_outputs(step_input)),
+        success=True
+    )
+
+
+# Function to present the Manager-approved plan without another LLM pass
+def present_final_report(step_input: StepInput, run_context: RunContext) -> StepOutput:  # type: ignore[arg-type]
+    """Render the latest approved structured plan into the final markdown report."""
+    session_state = run_context.session_state or {}
+    plan_data = session_state.get("current_plan")
+
+    with step_duration.time("Present Final Report", ""):
+        if plan_data:
+            plan = DailyItinerary.model_validate(plan_data)
+            content = render_travel_report(plan, *get_research_outputs(step_input))
+        else:
+            content = session_state.get("previous_draft", "")
+
+    budget_stop = session_state.get("budget_stop")
+    if budget_stop:
+        # The loop ended on the run budget, so this draft has not had every review round
+        content += (f"\n\n> Note: this plan was finalized early because the request reached its "
+                    f"{BUDGET_LIMIT_LABELS.get(budget_stop, budget_stop)} budget; it may not have had a full review.\n")
+
+    revision_iterations.observe(session_state.get("revision_iteration", 0))
+
+    return StepOutput(content=content, success=True)
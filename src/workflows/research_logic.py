@@ -0,0 +1,85 @@
+"""Custom function steps for the parallel research phase."""
+import asyncio
+import os
+from typing import Optional, Sequence
+from pydantic import BaseModel
+from agno.workflow.types import StepInput, StepOutput
+from agno.run import RunContext
+from agents.factory import AgentSpec, get_agent
+from core.checkpoints import get_checkpoint_store
+from core.metrics import research_timeouts
+from core.shared_cache import cache_key, get_shared_cache
+from workflows.checkpointing import checkpointed
+from workflows.prefetch import prefetched_results
+
+# Per-agent deadline inside the Parallel research block; bounds the phase's worst-case latency
+RESEARCH_STEP_TIMEOUT_SECONDS = float(os.getenv("RESEARCH_STEP_TIMEOUT_SECONDS", "45"))
+
+
+def _degraded_output(spec: AgentSpec, step_name: str, query: str, timeout: float, run_context: RunContext) -> StepOutput:
+    """
+    Fallback for a research agent that missed its deadline: reuse the latest
+    result for the same query when one exists, otherwise a clearly marked placeholder.
+    The degradation is recorded in session_state so the planner can be told about it.
+    """
+    cached = get_checkpoint_store().latest_output(step_name, query)
+
+    if cached is not None:
+        note = f"timed out after {timeout:g}s; using a cached result from an earlier run"
+        content = cached
+    else:
+        note = f"timed out after {timeout:g}s; no research available"
+        content = f"[DEGRADED] {spec.name} {note}."
+
+    research_timeouts.inc(spec.id, "cached" if cached is not None else "none")
+    print(f"   {step_name}: {note}")
+
+    if run_context.session_state is not None:
+        run_context.session_state.setdefault("degraded_inputs", {})[step_name] = note
+
+    return StepOutput(content=content, success=True, error=f"{step_name} {note}")
+
+
+def build_research_prompt(query: str, prefetched: Optional[str]) -> str:
+    """The user's query, followed by the prefetched search results when there are any."""
+    if not prefetched:
+        return query
+    return (
+        f"{query}\n\n"
+        f"PREFETCHED WEB SEARCH RESULTS (already searched for you):\n{prefetched}\n\n"
+        "Answer from these results. Only call the search tool for essential information they do not cover."
+    )
+
+
+def make_research_executor(spec: AgentSpec, step_name: str, timeout: float = RESEARCH_STEP_TIMEOUT_SECONDS,
+                           prefetch_steps: Optional[Sequence[str]] = None):
+    """
+    Build a checkpointed step executor that runs the request's research agent for spec on the
+    user's query. Structured results are shared across runs and worker processes, so identical
+    queries in flight at the same time run the agent once. The agent is given the searches
+    prefetched for prefetch_steps (default: its own step).
+    """
+
+    @checkpointed(step_name)
+    async def run_research(step_input: StepInput, run_context: RunContext) -> StepOutput:  # type: ignore[arg-type]
+        query = step_input.get_input_as_string() or ""
+        prefetched = [prefetched_results(step_input, name) for name in prefetch_steps or (step_name,)]
+        prompt = build_research_prompt(query, "\n\n".join(block for block in prefetched if block) or None)
+
+        async def research() -> object:
+            response = await get_agent(spec).arun(prompt)
+            return response.content
+
+        try:
+            content = await asyncio.wait_for(
+                get_shared_cache().get_or_compute(
+                    "research", cache_key(step_name, query), research,
+                    cacheable=lambda value: isinstance(value, BaseModel),
+                ),
+                timeout=timeout,
+            )
+        except asyncio.TimeoutError:
+            return _degraded_output(spec, step_name, query, timeout, run_context)
+        return StepOutput(content=content, success=True)
+
+    return run_research
@@ -1,39 +1,69 @@
 """Workflow step definitions."""
 from agno.workflow import Step
-from agents.research_agents import destination_researcher, hotel_finder, activities_researcher
-from agents.planner_agent import itinerary_planner
+from agents.research_agents import (
+    destination_researcher_spec,
+    hotel_finder_spec,
+    activities_researcher_spec,
+    combined_researcher_spec,
+)
+from workflows.report_logic import (
+    DESTINATION_STEP_NAME,
+    HOTEL_STEP_NAME,
+    ACTIVITIES_STEP_NAME,
+    COMBINED_RESEARCH_STEP_NAME,
+    create_itinerary,
+    present_final_report,
+)
+from workflows.prefetch import PREFETCH_STEP_NAME, prefetch_searches
+from workflows.research_logic import make_research_executor
 
 
-# Initial parallel research steps
+# Predictable searches run concurrently before the research agents start
+prefetch_step = Step(
+    name=PREFETCH_STEP_NAME,
+    executor=prefetch_searches,  # type: ignore[arg-type]
+    description="Search attractions, weather, hotels, transport and food for the parsed destination"
+)
+
+# Initial parallel research steps (checkpointed so a resumed run skips them)
 destination_step = Step(
-    name="Research Destination",
-    agent=destination_researcher,
+    name=DESTINATION_STEP_NAME,
+    executor=make_research_executor(destination_researcher_spec, DESTINATION_STEP_NAME),  # type: ignore[arg-type]
     description="Research the destination's attractions, weather, and local tips"
 )
 
 hotel_step = Step(
-    name="Find Accommodations",
-    agent=hotel_finder,
+    name=HOTEL_STEP_NAME,
+    executor=make_research_executor(hotel_finder_spec, HOTEL_STEP_NAME),  # type: ignore[arg-type]
     description="Find suitable hotels and accommodations based on budget"
 )
 
 activities_step = Step(
-    name="Research Activities",
-    agent=activities_researcher,
+    name=ACTIVITIES_STEP_NAME,
+    executor=make_research_executor(activities_researcher_spec, ACTIVITIES_STEP_NAME),  # type: ignore[arg-type]
     description="Research activities, transportation, and local experiences"
 )
 
-# Itinerary planning step
+# Fast mode's single research step: one agent, given every prefetched search, returns all three outputs
+combined_research_step = Step(
+    name=COMBINED_RESEARCH_STEP_NAME,
+    executor=make_research_executor(  # type: ignore[arg-type]
+        combined_researcher_spec, COMBINED_RESEARCH_STEP_NAME,
+        prefetch_steps=(DESTINATION_STEP_NAME, HOTEL_STEP_NAME, ACTIVITIES_STEP_NAME),
+    ),
+    description="Research the destination, accommodations and activities in one agent run"
+)
+
+# Itinerary planning step (structured plan rendered to markdown locally)
 itinerary_step = Step(
     name="Create Itinerary",
-    agent=itinerary_planner,
+    executor=create_itinerary,  # type: ignore[arg-type]
     description="Create a comprehensive day-by-day travel itinerary"
 )
 
-# Final report step
+# Final report step (rendered from the approved structured plan, no LLM call)
 final_report_step = Step(
     name="Present Final Report",
-    agent=itinerary_planner,
+    executor=present_final_report,  # type: ignore[arg-type]
     description="Team Lead presents the Manager-approved travel plan to the user"
 )
-
@@ -1,24 +1,42 @@
 """Main travel planning workflow definition."""
+import asyncio
+from typing import Any, Dict, Optional
 from agno.workflow import Workflow, Parallel, Loop
+from agents.factory import agent_scope
+from core.checkpoints import get_checkpoint_store
+from core.review_history import MAX_REVIEW_ROUNDS
+from core.trip_spec import TripSpec, parse_trip_spec
+from core.utils import collect_run_output
+from tools.search_filter import search_scope
+from workflows.checkpointing import CHECKPOINT_RUN_ID_KEY
 from workflows.steps import (
+    prefetch_step,
     destination_step,
     hotel_step,
     activities_step,
+    combined_research_step,
     itinerary_step,
     final_report_step
 )
 from workflows.critique_logic import critique_step, revision_approved_condition
+from workflows.report_logic import TRIP_SPEC_KEY
+
+# Session state keys copied onto the run output's metadata: a plan built from degraded research
+# or cut short by the run budget is still returned, but must not be cached as a finished plan
+PLAN_QUALITY_KEYS = ("degraded_inputs", "budget_stop")
 
 # Complete Travel Planning Workflow
 travel_planning_workflow = Workflow(
     name="Travel Planning Workflow with Manager Approval",
     description="""
     A streamlined travel planning workflow:
+    0. Predictable searches for the destination are prefetched concurrently
     1. Research Team (destination, hotel, activities) runs in parallel ONCE
     2. Team Lead (itinerary planner) creates comprehensive report
     3. Manager (critique agent) reviews and provides feedback
-    4. Loop (max 1 revision): Team Lead revises report based on Manager feedback
-    5. Team Lead presents final Manager-approved report to user
+    4. Loop (1 revision by default): Team Lead revises report based on Manager feedback;
+       review-score history can skip a revision that won't pay off or allow one more
+    5. Final Manager-approved report is rendered from the structured plan
     """,
     # Initialize session state for tracking workflow progress
     session_state={
@@ -26,17 +44,22 @@ travel_planning_workflow = Workflow(
         "is_approved": False,
         "manager_feedback": "No feedback yet - this is the initial draft",
         "previous_draft": "No previous draft",
+        "current_plan": None,
+        "degraded_inputs": {},
     },
     steps=[  # type: ignore[arg-type]
+        # Step 0: Prefetch the research team's predictable searches (no LLM call)
+        prefetch_step,  # type: ignore[list-item]
         # Step 1: Research Team - Parallel research phase (runs ONCE only)
         Parallel(
             destination_step,  # type: ignore[list-item]
             hotel_step,  # type: ignore[list-item]
             activities_step,  # type: ignore[list-item]
             name="Research Team Phase",
-            description="Research team gathers destination, hotel, and activities data simultaneously"
+            description="Research team gathers destination, hotel, and activities data simultaneously "
+                        "(each agent has its own deadline and degrades to a cached or partial result)"
         ),
-        # Step 2: Team Lead + Manager Loop (max 2 iterations: initial + 1 revision)
+        # Step 2: Team Lead + Manager Loop (initial + 1 revision by default, + 1 more if history says it pays off)
         Loop(
             name="Team Lead <-> Manager Revision Loop",
             description="Itinerary planner (team lead) works with Manager to finalize the plan",
@@ -45,10 +68,74 @@ travel_planning_workflow = Workflow(
                 critique_step,  # type: ignore[list-item] - Manager reviews and approves/requests revision
             ],
             end_condition=revision_approved_condition,  # type: ignore[arg-type]
-            max_iterations=2,  # Initial draft + 1 revision max
+            max_iterations=MAX_REVIEW_ROUNDS,  # The end condition enforces the default of 2
         ),
-        # Step 3: Team Lead presents the final Manager-approved report
+        # Step 3: Render the final Manager-approved report (no LLM call)
         final_report_step,  # type: ignore[list-item] - This becomes the final output to the user
     ],
 )
 
+
+# Latency-optimized variant: one combined research agent and a single planner pass, no Manager review
+fast_travel_planning_workflow = Workflow(
+    name="Fast Travel Planning Workflow",
+    description="""
+    A latency-optimized travel planning workflow:
+    0. Predictable searches for the destination are prefetched concurrently (one batch)
+    1. One combined researcher returns destination, hotel and activities research in a single structured output
+    2. Team Lead (itinerary planner) drafts the plan once; it is rendered into the report locally
+    """,
+    session_state={
+        "revision_iteration": 0,
+        "current_plan": None,
+        "degraded_inputs": {},
+    },
+    steps=[  # type: ignore[arg-type]
+        prefetch_step,  # type: ignore[list-item]
+        combined_research_step,  # type: ignore[list-item]
+        itinerary_step,  # type: ignore[list-item] - single pass; its rendered report is the final output
+    ],
+)
+
+
+async def run_travel_workflow(query: str, run_id: str, spec: Optional[TripSpec] = None,
+                              workflow: Workflow = travel_planning_workflow) -> Any:
+    """
+    Run the workflow for one query with every step checkpointed under run_id.
+    Re-running a failed run_id resumes from its last completed step.
+    The trip spec (parsed from the query when not given) is attached for the steps to read.
+    Degraded research inputs and a run-budget stop are reported in the output's metadata.
+    """
+    spec = spec or parse_trip_spec(query)
+    checkpoints = get_checkpoint_store()
+    if checkpoints.start_run(run_id, query):
+        print(f"Resuming run {run_id} from its last completed step")
+
+    # This run's own session state, read back below to report degraded or budget-stopped plans
+    session_state: Dict[str, Any] = {}
+    # Handle both coroutine and async generator returns (agno versions differ)
+    try:
+        # Each run gets its own agents, so no session state or run history is shared across requests,
+        # and its searches never show the agents a sentence they were already given
+        with agent_scope(), search_scope():
+            result = await collect_run_output(workflow.arun(
+                query,
+                additional_data={CHECKPOINT_RUN_ID_KEY: run_id, TRIP_SPEC_KEY: spec.as_dict()},
+                session_state=session_state,
+            ))
+    except asyncio.CancelledError:
+        # Checkpoints of completed steps are kept, so a cancelled run can still be resumed
+        checkpoints.finish_run(run_id, "cancelled")
+        print(f"Run {run_id} cancelled")
+        raise
+    except BaseException:
+        checkpoints.finish_run(run_id, "failed")
+        print(f"Run {run_id} failed; call plan_trip(query, run_id={run_id!r}) to resume it")
+        raise
+
+    failed = result is None or str(getattr(result, "status", "")).lower().endswith("error")
+    checkpoints.finish_run(run_id, "failed" if failed else "completed")
+    if result is not None:
+        quality = {key: session_state[key] for key in PLAN_QUALITY_KEYS if session_state.get(key)}
+        result.metadata = {**(result.metadata or {}), **quality}
+    return result
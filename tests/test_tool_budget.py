@@ -0,0 +1,61 @@
+"""Tool budget hook run through agno's async tool execution."""
+import asyncio
+from agno.run.base import RunContext
+from agno.tools.function import Function, FunctionCall
+from tools.tool_budget import LIMIT_MESSAGE, tool_budget_hook
+
+
+async def search(query: str) -> str:
+    """Search the web."""
+    await asyncio.sleep(0)
+    return f"results for {query}"
+
+
+def _function(hook, run_id: str = "run-1") -> Function:
+    function = Function.from_callable(search)
+    function.tool_hooks = [hook]
+    function._run_context = RunContext(run_id=run_id, session_id="session")
+    return function
+
+
+async def _turn(function: Function, *queries: str):
+    """One model turn: its calls are executed concurrently, as agno does."""
+    calls = [FunctionCall(function=function, arguments={"query": query}) for query in queries]
+    return await asyncio.gather(*(call.aexecute() for call in calls))
+
+
+def test_async_tool_result_is_awaited():
+    function = _function(tool_budget_hook("researcher"))
+    (result,) = asyncio.run(_turn(function, "kyoto"))
+    assert result.status == "success"
+    assert result.result == "results for kyoto"
+
+
+def test_calls_past_the_cap_are_refused():
+    function = _function(tool_budget_hook("researcher", max_calls=2))
+    results = asyncio.run(_turn(function, "a", "b", "c"))
+    assert [r.result for r in results] == ["results for a", "results for b", LIMIT_MESSAGE]
+
+
+def test_rounds_past_the_cap_are_refused():
+    async def run():
+        function = _function(tool_budget_hook("researcher", max_rounds=2))
+        first = await _turn(function, "a", "b", "c")
+        second = await _turn(function, "d")
+        third = await _turn(function, "e", "f")
+        return first + second + third
+
+    results = [r.result for r in asyncio.run(run())]
+    assert results[:4] == ["results for a", "results for b", "results for c", "results for d"]
+    assert results[4:] == [LIMIT_MESSAGE, LIMIT_MESSAGE]
+
+
+def test_caps_are_per_run():
+    hook = tool_budget_hook("researcher", max_calls=1)
+
+    async def run():
+        first = await _turn(_function(hook, "run-1"), "a")
+        second = await _turn(_function(hook, "run-2"), "b")
+        return first + second
+
+    assert [r.result for r in asyncio.run(run())] == ["results for a", "results for b"]